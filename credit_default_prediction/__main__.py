@@ -0,0 +1,3 @@
+from credit_default_prediction.cli import cli
+
+cli(prog_name="credit_default_prediction")
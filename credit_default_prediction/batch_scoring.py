@@ -0,0 +1,209 @@
+"""Batch scoring of unlabeled loan applications files."""
+
+from __future__ import annotations
+
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import click
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+
+from credit_default_prediction import inference, tracing
+from credit_default_prediction.decision_threshold import load_decision_threshold
+from credit_default_prediction.storage import LoanDataWriter, iter_loan_data_chunks
+from credit_default_prediction.streaming import StreamingStats, peak_rss_bytes
+
+SCORE_COLUMN = "default_probability"
+DECISION_COLUMN = "predicted_default"
+
+
+def score_chunk(
+    model: Pipeline,
+    loan_data: pd.DataFrame,
+    threshold: float | None = None,
+    id_column: str | None = None,
+) -> pd.DataFrame:
+    """Scores a chunk of raw loan applications, keeping their order.
+
+    Applications rejected by the rule-based preprocessing get a missing
+    probability. Given a `threshold`, the predicted default of each accepted
+    application is added.
+    """
+
+    loan_data = loan_data.reset_index(drop=True)
+    probabilities = np.full(len(loan_data), np.nan)
+
+    prepared_loan_data = inference.rule_based_preparation(loan_data)
+    if not prepared_loan_data.empty:
+        X = prepared_loan_data[model.feature_names_in_]
+        probabilities[prepared_loan_data.index.to_numpy()] = tracing.predict_proba(
+            model, X
+        )[:, 1]
+
+    scores = pd.DataFrame({SCORE_COLUMN: probabilities})
+    if id_column:
+        scores.insert(0, id_column, loan_data[id_column].to_numpy())
+    if threshold is not None:
+        predicted_defaults = pd.Series(probabilities > threshold, dtype="Int8")
+        predicted_defaults[np.isnan(probabilities)] = pd.NA
+        scores[DECISION_COLUMN] = predicted_defaults
+
+    return scores
+
+
+def batch_score(
+    model: Pipeline,
+    input_path: os.PathLike,
+    output_path: os.PathLike,
+    chunk_size: int = 100_000,
+    n_workers: int | None = None,
+    threshold: float | None = None,
+    id_column: str | None = None,
+) -> StreamingStats:
+    """Scores a loan applications file chunk by chunk on a pool of threads.
+
+    Chunks are read in order and scored concurrently by `n_workers` threads.
+    The cores are shared between the workers through the booster `nthread`,
+    since XGBoost releases the GIL while predicting. At most two chunks per
+    worker are in flight, and scores are written in input order as soon as
+    the oldest chunk is done, so that memory usage only depends on
+    `chunk_size` and `n_workers`.
+
+    Args:
+        model (Pipeline): Trained pipeline.
+        input_path (os.PathLike): Unlabeled CSV, Parquet or Arrow IPC file.
+        output_path (os.PathLike): Output CSV, Parquet or Arrow IPC file.
+        chunk_size (int): Number of rows per chunk.
+        n_workers (int | None): Number of scoring threads. Defaults to the
+            number of cores.
+        threshold (float | None): Decision threshold. When given, predicted
+            defaults are written next to the probabilities.
+        id_column (str | None): Column identifying the applications, copied
+            to the output.
+
+    Returns:
+        StreamingStats: Scored rows, throughput and peak memory.
+    """
+
+    n_cores = os.cpu_count() or 1
+    n_workers = n_workers or n_cores
+    classifier = model.named_steps["classifier"]
+    n_jobs = classifier.get_params()["n_jobs"]
+    classifier.set_params(n_jobs=max(1, n_cores // n_workers))
+    try:
+        return _batch_score(
+            model, input_path, output_path, chunk_size, n_workers, threshold, id_column
+        )
+    finally:
+        # The caller's pipeline is left as it was given
+        classifier.set_params(n_jobs=n_jobs)
+
+
+def _batch_score(
+    model: Pipeline,
+    input_path: os.PathLike,
+    output_path: os.PathLike,
+    chunk_size: int,
+    n_workers: int,
+    threshold: float | None,
+    id_column: str | None,
+) -> StreamingStats:
+    start = time.perf_counter()
+    rows_read = 0
+    rows_written = 0
+    pending_scores: deque[Future[pd.DataFrame]] = deque()
+
+    with ThreadPoolExecutor(max_workers=n_workers) as executor, LoanDataWriter(
+        output_path
+    ) as writer:
+
+        def write_oldest_scores():
+            nonlocal rows_written
+            scores = pending_scores.popleft().result()
+            writer.write(scores)
+            rows_written += len(scores)
+
+        for chunk in iter_loan_data_chunks(input_path, chunk_size):
+            rows_read += len(chunk)
+            pending_scores.append(
+                executor.submit(score_chunk, model, chunk, threshold, id_column)
+            )
+            if len(pending_scores) >= 2 * n_workers:
+                write_oldest_scores()
+        while pending_scores:
+            write_oldest_scores()
+
+    return StreamingStats(
+        rows_read=rows_read,
+        rows_written=rows_written,
+        elapsed_seconds=time.perf_counter() - start,
+        peak_rss_bytes=peak_rss_bytes(),
+    )
+
+
+@click.command(
+    help="Scores an unlabeled loan applications file with a trained model, in parallel chunks."
+)
+@click.option("--model-path", help="Path to the trained model.")
+@click.option(
+    "--input-path",
+    help="Path to the raw loan applications to score (CSV, Parquet or Arrow IPC).",
+)
+@click.option(
+    "--output-path",
+    help="Path where the default probabilities will be saved, in input order. The file extension sets the format.",
+)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=100_000,
+    show_default=True,
+    help="Number of rows scored at a time.",
+)
+@click.option(
+    "--n-workers",
+    type=int,
+    default=None,
+    help="Number of chunks scored in parallel. Defaults to the number of cores.",
+)
+@click.option(
+    "--decision-threshold-path",
+    default=None,
+    help="Path to the decision threshold selected at training. When given, predicted defaults are written too.",
+)
+@click.option(
+    "--id-column",
+    default=None,
+    help="Column identifying the loan applications, copied to the output.",
+)
+def cli(
+    model_path: os.PathLike,
+    input_path: os.PathLike,
+    output_path: os.PathLike,
+    chunk_size: int,
+    n_workers: int | None,
+    decision_threshold_path: os.PathLike | None,
+    id_column: str | None,
+):
+    trained_model = joblib.load(model_path)
+    threshold = (
+        load_decision_threshold(decision_threshold_path)
+        if decision_threshold_path
+        else None
+    )
+
+    stats = batch_score(
+        trained_model,
+        input_path,
+        output_path,
+        chunk_size=chunk_size,
+        n_workers=n_workers,
+        threshold=threshold,
+        id_column=id_column,
+    )
+    click.echo(stats.report())
@@ -0,0 +1,307 @@
+"""Benchmarks of the pipeline stages over synthetic loan applications."""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import click
+import numpy as np
+
+from credit_default_prediction import inference
+from credit_default_prediction.batch_scoring import SCORE_COLUMN, score_chunk
+from credit_default_prediction.compiled_model import compile_pipeline
+from credit_default_prediction.dataset import TARGET, LoanApplications
+from credit_default_prediction.decision_threshold import DecisionThresholdParams
+from credit_default_prediction.evaluation import HoldoutPredictions, evaluate
+from credit_default_prediction.feature_engineering import (
+    FeatureEngine,
+    engineer_features,
+    get_model_features,
+)
+from credit_default_prediction.hyper_params import HyperParams
+from credit_default_prediction.preprocessing import rule_based_preprocessing
+from credit_default_prediction.scoring import LoanScorer
+from credit_default_prediction.split import SplitParams, split_data
+from credit_default_prediction.synthetic import generate_loan_applications
+from credit_default_prediction.training import ModelParams, train
+
+BENCHMARKED_STAGES = [
+    "split_data",
+    "rule_based_preprocessing",
+    "engineer_features",
+    "train",
+    "score_batch",
+    "score_single_row",
+    "evaluate",
+]
+# Single row latency is averaged over this many calls
+SINGLE_ROW_CALLS = 100
+
+
+@dataclass
+class BenchmarkResult:
+    """Fastest run time of a stage, and its peak memory allocations as
+    traced by `tracemalloc` (Python objects and NumPy buffers, not the
+    memory allocated by XGBoost itself)."""
+
+    stage: str
+    n_rows: int
+    seconds: float
+    peak_memory_bytes: int
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.seconds == 0:
+            return float("inf")
+        return self.n_rows / self.seconds
+
+    def report(self) -> str:
+        return (
+            f"{self.stage:<26} {self.n_rows:>10} rows "
+            f"{self.seconds * 1000:>11.2f} ms "
+            f"{self.peak_memory_bytes / 2**20:>9.1f} MiB"
+        )
+
+
+@dataclass
+class Regression:
+    stage: str
+    n_rows: int
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+    def report(self) -> str:
+        return (
+            f"{self.stage} ({self.n_rows} rows): {self.metric} went from "
+            f"{self.baseline:.6g} to {self.current:.6g} ({self.ratio:.2f}x)"
+        )
+
+
+def measure(
+    stage: str, n_rows: int, function: Callable[[], Any], repeat: int = 3
+) -> tuple[BenchmarkResult, Any]:
+    """Times `repeat` calls of `function`, keeping the fastest, then traces
+    the memory allocations of one more call.
+
+    Memory is traced in a separate call since tracing slows allocations down.
+
+    Returns:
+        tuple[BenchmarkResult, Any]: Result of the benchmark and output of
+            `function`, for the next stages.
+    """
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = function()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(stage, n_rows, min(timings), peak_memory_bytes), output
+
+
+def benchmark_pipeline(
+    n_rows: int, repeat: int = 3, seed: int = 0
+) -> list[BenchmarkResult]:
+    """Benchmarks every stage on `n_rows` synthetic raw loan applications,
+    each stage consuming the output of the previous one, with the
+    parameters of the params file."""
+
+    raw_loan_data = generate_loan_applications(n_rows, seed=seed)
+    model_features = get_model_features()
+    split_params = SplitParams.from_config()
+    hyper_params = HyperParams.from_config()
+    model_params = ModelParams.from_config()
+    threshold_params = DecisionThresholdParams.from_config()
+    results = []
+
+    def run(stage: str, function: Callable[[], Any]) -> Any:
+        result, output = measure(stage, n_rows, function, repeat)
+        results.append(result)
+        return output
+
+    training_dataset, test_dataset = run(
+        "split_data", lambda: split_data(raw_loan_data, split_params)
+    )
+    preprocessed_data = run(
+        "rule_based_preprocessing",
+        lambda: rule_based_preprocessing(training_dataset.data),
+    )
+    feature_store = run(
+        "engineer_features", lambda: engineer_features(preprocessed_data)
+    )
+    train_dataset = LoanApplications.from_dataframe(feature_store[model_features])
+    model = run(
+        "train",
+        lambda: train(
+            train_dataset.X,
+            train_dataset.y,
+            hyper_params,
+            categorical_encoding=model_params.categorical_encoding,
+        ),
+    )
+
+    test_data = test_dataset.data.reset_index(drop=True)
+    scores = run("score_batch", lambda: score_chunk(model, test_data))
+
+    scorer = LoanScorer(compile_pipeline(model, FeatureEngine.from_config()))
+    prepared_test_data = inference.rule_based_preparation(test_data)
+    application = test_data.loc[prepared_test_data.index[0]].to_dict()
+    run(
+        "score_single_row",
+        lambda: [scorer.score([application]) for _ in range(SINGLE_ROW_CALLS)],
+    )
+    # Reported per call
+    results[-1].seconds /= SINGLE_ROW_CALLS
+
+    y_score = scores[SCORE_COLUMN].to_numpy()
+    accepted = ~np.isnan(y_score)
+    predictions = HoldoutPredictions(
+        y_true=test_data[TARGET].to_numpy()[accepted],
+        y_score=y_score[accepted],
+    )
+    run("evaluate", lambda: evaluate(predictions, threshold_params))
+
+    return results
+
+
+def run_benchmarks(
+    sizes: list[int], repeat: int = 3, seed: int = 0
+) -> list[BenchmarkResult]:
+    return [
+        result
+        for n_rows in sizes
+        for result in benchmark_pipeline(n_rows, repeat=repeat, seed=seed)
+    ]
+
+
+def compare_to_baseline(
+    results: list[BenchmarkResult],
+    baseline: list[BenchmarkResult],
+    max_regression: float = 0.25,
+) -> list[Regression]:
+    """Stages slower, or allocating more memory, than in the baseline by more
+    than `max_regression` (0.25 allows 25% more). Stages missing from the
+    baseline are not compared."""
+
+    baseline_results = {(result.stage, result.n_rows): result for result in baseline}
+    regressions = []
+    for result in results:
+        baseline_result = baseline_results.get((result.stage, result.n_rows))
+        if baseline_result is None:
+            continue
+        for metric in ["seconds", "peak_memory_bytes"]:
+            baseline_value = getattr(baseline_result, metric)
+            value = getattr(result, metric)
+            if baseline_value > 0 and value > baseline_value * (1 + max_regression):
+                regressions.append(
+                    Regression(
+                        result.stage, result.n_rows, metric, baseline_value, value
+                    )
+                )
+
+    return regressions
+
+
+def save_benchmark_results(results: list[BenchmarkResult], results_path: os.PathLike):
+    with open(results_path, "w") as results_file:
+        json.dump(
+            {
+                "environment": {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "cpu_count": os.cpu_count(),
+                },
+                "results": [asdict(result) for result in results],
+            },
+            results_file,
+            indent=4,
+        )
+
+
+def load_benchmark_results(results_path: os.PathLike) -> list[BenchmarkResult]:
+    with open(results_path) as results_file:
+        return [
+            BenchmarkResult(**result) for result in json.load(results_file)["results"]
+        ]
+
+
+@click.command(
+    help="Times and memory-profiles every pipeline stage on synthetic loan applications, and fails when a stage regressed from the baseline."
+)
+@click.option(
+    "--n-rows",
+    "sizes",
+    type=int,
+    multiple=True,
+    default=[30_000],
+    show_default=True,
+    help="Number of synthetic loan applications. Can be repeated to benchmark several sizes.",
+)
+@click.option(
+    "--repeat",
+    type=int,
+    default=3,
+    show_default=True,
+    help="Number of timed runs of each stage, the fastest one being kept.",
+)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option(
+    "--output-path",
+    default="benchmarks.json",
+    show_default=True,
+    help="Path where the results will be saved as JSON.",
+)
+@click.option(
+    "--baseline-path",
+    default=None,
+    help="Results of a previous run to compare with.",
+)
+@click.option(
+    "--max-regression",
+    type=float,
+    default=0.25,
+    show_default=True,
+    help="Slowdown or memory increase from the baseline above which the benchmark fails.",
+)
+def cli(
+    sizes: tuple[int, ...],
+    repeat: int,
+    seed: int,
+    output_path: os.PathLike,
+    baseline_path: os.PathLike | None,
+    max_regression: float,
+):
+    results = run_benchmarks(list(sizes), repeat=repeat, seed=seed)
+    for result in results:
+        click.echo(result.report())
+    save_benchmark_results(results, output_path)
+
+    if baseline_path:
+        regressions = compare_to_baseline(
+            results, load_benchmark_results(baseline_path), max_regression
+        )
+        if regressions:
+            raise click.ClickException(
+                "Stages regressed from the baseline:\n"
+                + "\n".join(regression.report() for regression in regressions)
+            )
+        click.echo(f"No stage regressed by more than {max_regression:.0%}.")
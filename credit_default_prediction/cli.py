@@ -0,0 +1,160 @@
+"""Single entry point dispatching to the pipeline commands.
+
+Subcommands are only imported when they are invoked, so that listing them
+with `--help` does not pay for importing pandas, scikit-learn, XGBoost and
+DVCLive.
+"""
+
+from __future__ import annotations
+
+import importlib
+import os
+
+import click
+
+# Subcommand name: (import path of its command, short help)
+SUBCOMMANDS = {
+    "split": (
+        "credit_default_prediction.split:cli",
+        "Split raw loan applications into training and test sets.",
+    ),
+    "preprocess-data": (
+        "credit_default_prediction.preprocessing:cli",
+        "Clean raw loan applications with deterministic rules.",
+    ),
+    "engineer-features": (
+        "credit_default_prediction.feature_engineering:cli",
+        "Engineer features of preprocessed loan applications.",
+    ),
+    "train": (
+        "credit_default_prediction.training:cli",
+        "Train the loan default model.",
+    ),
+    "cross-validate": (
+        "credit_default_prediction.cross_validation:cli",
+        "Cross-validate the trained model on the training data.",
+    ),
+    "evaluate": (
+        "credit_default_prediction.evaluation:cli",
+        "Evaluate the trained model on the test data.",
+    ),
+    "tune-hyperparams": (
+        "credit_default_prediction.hyperparams_tuning:cli",
+        "Search the hyper-parameters maximizing the cross-validated ROC AUC.",
+    ),
+    "compile-model": (
+        "credit_default_prediction.compiled_model:cli",
+        "Compile the trained model into an array-based scorer.",
+    ),
+    "bundle-model": (
+        "credit_default_prediction.model_bundle:cli",
+        "Save the trained model as a versioned bundle for scoring workers.",
+    ),
+    "serve": (
+        "credit_default_prediction.serving:cli",
+        "Serve default probabilities over HTTP.",
+    ),
+    "batch-score": (
+        "credit_default_prediction.batch_scoring:cli",
+        "Score an unlabeled loan applications file in parallel chunks.",
+    ),
+    "compare-encodings": (
+        "credit_default_prediction.encoding_comparison:cli",
+        "Compare the one-hot and native categorical encodings.",
+    ),
+    "evaluate-models": (
+        "credit_default_prediction.model_leaderboard:cli",
+        "Rank many trained models evaluated on the same test data.",
+    ),
+    "generate-loan-data": (
+        "credit_default_prediction.synthetic:cli",
+        "Generate synthetic loan applications with the schema of cr_loan2.csv.",
+    ),
+    "benchmark": (
+        "credit_default_prediction.benchmarks:cli",
+        "Time and memory-profile the pipeline stages on synthetic data.",
+    ),
+    "run-pipeline": (
+        "credit_default_prediction.pipeline_runner:cli",
+        "Run the whole training pipeline in a single process.",
+    ),
+}
+
+
+class LazyGroup(click.Group):
+    """Group of commands imported from their module when first used."""
+
+    def __init__(
+        self, *args, lazy_subcommands: dict[str, tuple[str, str]], **kwargs
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted([*super().list_commands(ctx), *self.lazy_subcommands])
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name not in self.lazy_subcommands:
+            return super().get_command(ctx, cmd_name)
+
+        import_path, _ = self.lazy_subcommands[cmd_name]
+        module_name, command_name = import_path.split(":")
+        command = getattr(importlib.import_module(module_name), command_name)
+        if not isinstance(command, click.Command):
+            raise click.ClickException(
+                f"{import_path} is not a click command, it cannot be run as {cmd_name!r}."
+            )
+
+        return command
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter):
+        """Lists the subcommands with their short help, without importing them."""
+
+        rows = [
+            (cmd_name, short_help)
+            for cmd_name, (_, short_help) in sorted(self.lazy_subcommands.items())
+        ]
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands=SUBCOMMANDS,
+    help="Credit default prediction pipeline.",
+)
+@click.option(
+    "--set",
+    "param_overrides",
+    multiple=True,
+    metavar="SECTION.KEY=VALUE",
+    help="Overrides a parameter of params.yaml for this run, without rewriting the file. Can be repeated.",
+)
+@click.option(
+    "--trace-path",
+    default=None,
+    help="Traces the stages and pipeline steps, logging their timings with the metrics and saving a Chrome trace (chrome://tracing, Perfetto) there.",
+)
+@click.pass_context
+def cli(
+    ctx: click.Context,
+    param_overrides: tuple[str, ...],
+    trace_path: os.PathLike | None,
+):
+    from credit_default_prediction import params
+
+    try:
+        params.set_overrides(param_overrides)
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--set")
+
+    if trace_path:
+        from credit_default_prediction import tracing
+
+        def save_trace():
+            tracing.disable_tracing()
+            tracing.tracer.save_chrome_trace(trace_path)
+
+        tracing.enable_tracing()
+        ctx.call_on_close(save_trace)
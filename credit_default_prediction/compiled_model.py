@@ -0,0 +1,288 @@
+"""Array-based scorer compiled from a trained pipeline."""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+import click
+import joblib
+import numpy as np
+import xgboost as xgb
+from numpy.typing import ArrayLike
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OrdinalEncoder
+
+from credit_default_prediction.decision_threshold import (
+    DEFAULT_DECISION_THRESHOLD,
+    load_decision_threshold,
+)
+from credit_default_prediction.feature_engineering import (
+    FeatureEngine,
+    FeatureTransform,
+    recorded_feature_engine,
+)
+
+
+@dataclass
+class CompiledModel:
+    """Flat, array-based equivalent of the trained pipeline.
+
+    It applies the feature transforms the model was trained with, the median
+    imputation and the one-hot encoding with precomputed arrays, and scores the resulting
+    float32 matrix with the booster `inplace_predict`. Probabilities are the
+    same as the ones of the pipeline it was compiled from.
+
+    Models trained with the `native` categorical encoding take a single column
+    of category codes per categorical feature instead of one-hot columns.
+    The decision threshold selected for the model travels with it.
+    """
+
+    numeric_features: list[str]
+    fill_values: np.ndarray
+    feature_engine: FeatureEngine
+    categorical_features: list[str]
+    categories: list[np.ndarray]
+    category_offsets: np.ndarray
+    zeros_are_missing: bool
+    iteration_range: tuple[int, int]
+    booster: xgb.Booster
+    categorical_encoding: str = "one_hot"
+    decision_threshold: float = DEFAULT_DECISION_THRESHOLD
+
+    @property
+    def n_features(self) -> int:
+        return int(self.category_offsets[-1])
+
+    @property
+    def input_features(self) -> list[str]:
+        """Columns read from the loan applications: derived features are
+        replaced by the columns they are computed from."""
+
+        derived_features = set(self.feature_engine.derived_features)
+        transform_columns = [
+            column
+            for transform in self.feature_engine.transforms
+            for column in transform.columns
+        ]
+        return [
+            feature
+            for feature in dict.fromkeys(
+                self.numeric_features + transform_columns + self.categorical_features
+            )
+            if feature not in derived_features
+        ]
+
+    def transform(self, loan_data: Mapping[str, ArrayLike]) -> np.ndarray:
+        """Builds the model feature matrix from feature-engineering inputs.
+
+        Args:
+            loan_data (Mapping[str, ArrayLike]): Preprocessed loan applications,
+                either as a DataFrame or as a mapping of column arrays.
+
+        Returns:
+            np.ndarray: C-contiguous float32 feature matrix.
+        """
+
+        n_rows = len(np.asarray(loan_data[self.input_features[0]]))
+        features = np.zeros((n_rows, self.n_features), dtype=np.float32)
+
+        engineered_features = self.feature_engine.compute(loan_data)
+        for column, feature in enumerate(self.numeric_features):
+            # Engineered features are fresh arrays, filled in place
+            values = (
+                engineered_features[feature]
+                if feature in engineered_features
+                else np.array(loan_data[feature], dtype=np.float64)
+            )
+            values[np.isnan(values)] = self.fill_values[column]
+            features[:, column] = values
+
+        rows = np.arange(n_rows)
+        for feature, categories, offset in zip(
+            self.categorical_features, self.categories, self.category_offsets
+        ):
+            values = np.asarray(loan_data[feature], dtype=str)
+            codes = np.searchsorted(categories, values)
+            codes[codes == len(categories)] = 0
+            unknown = categories[codes] != values
+            if unknown.any():
+                raise ValueError(
+                    f"Found unknown categories {np.unique(values[unknown]).tolist()} in feature {feature!r}."
+                )
+            if self.categorical_encoding == "native":
+                features[:, offset] = codes
+            else:
+                features[rows, offset + codes] = 1.0
+
+        if self.zeros_are_missing:
+            features[features == 0] = np.nan
+
+        return features
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """Default probability of each row of a feature matrix built by `transform`."""
+
+        return self.booster.inplace_predict(
+            features,
+            iteration_range=self.iteration_range,
+            predict_type="value",
+            missing=np.nan,
+        )
+
+    def save(self, compiled_model_path: os.PathLike):
+        arrays: dict[str, np.ndarray] = {
+            "fill_values": self.fill_values,
+            "category_offsets": self.category_offsets,
+            "booster": np.frombuffer(self.booster.save_raw("ubj"), dtype=np.uint8),
+        }
+        for index, categories in enumerate(self.categories):
+            arrays[f"categories_{index}"] = categories
+        metadata = {
+            "numeric_features": self.numeric_features,
+            "categorical_features": self.categorical_features,
+            "zeros_are_missing": self.zeros_are_missing,
+            "iteration_range": list(self.iteration_range),
+            "categorical_encoding": self.categorical_encoding,
+            "feature_transforms": self.feature_engine.to_params(),
+            "decision_threshold": self.decision_threshold,
+        }
+        arrays["metadata"] = np.array(json.dumps(metadata))
+
+        with open(compiled_model_path, "wb") as compiled_model_file:
+            np.savez(compiled_model_file, **arrays)  # type: ignore
+
+    @classmethod
+    def load(cls, compiled_model_path: os.PathLike) -> CompiledModel:
+        with np.load(compiled_model_path) as arrays:
+            metadata = json.loads(str(arrays["metadata"]))
+            booster = xgb.Booster()
+            booster.load_model(bytearray(arrays["booster"].tobytes()))
+            if "feature_transforms" in metadata:
+                feature_transforms = [
+                    FeatureTransform(**transform)
+                    for transform in metadata["feature_transforms"]
+                ]
+            else:
+                # Compiled before feature transforms were configurable
+                log_transformed = np.asarray(metadata["numeric_features"])[
+                    arrays["log_transformed"]
+                ]
+                feature_transforms = (
+                    [FeatureTransform("log1p", log_transformed.tolist())]
+                    if log_transformed.size
+                    else []
+                )
+
+            return cls(
+                numeric_features=metadata["numeric_features"],
+                fill_values=arrays["fill_values"],
+                feature_engine=FeatureEngine(feature_transforms),
+                categorical_features=metadata["categorical_features"],
+                categories=[
+                    arrays[f"categories_{index}"]
+                    for index in range(len(metadata["categorical_features"]))
+                ],
+                category_offsets=arrays["category_offsets"],
+                zeros_are_missing=metadata["zeros_are_missing"],
+                iteration_range=tuple(metadata["iteration_range"]),  # type: ignore
+                booster=booster,
+                categorical_encoding=metadata.get("categorical_encoding", "one_hot"),
+                decision_threshold=metadata.get(
+                    "decision_threshold", DEFAULT_DECISION_THRESHOLD
+                ),
+            )
+
+
+def prediction_iteration_range(classifier: xgb.XGBClassifier) -> tuple[int, int]:
+    """Boosting rounds the classifier predicts with: up to the best iteration
+    when early stopping found one, otherwise all of them."""
+
+    if hasattr(classifier, "best_iteration"):
+        return 0, classifier.best_iteration + 1
+    return 0, classifier.get_booster().num_boosted_rounds()
+
+
+def compile_pipeline(
+    model: Pipeline,
+    feature_engine: FeatureEngine | None = None,
+    decision_threshold: float = DEFAULT_DECISION_THRESHOLD,
+) -> CompiledModel:
+    """Compiles a pipeline trained by `training.train` into a `CompiledModel`,
+    applying the transforms of `feature_engine`, by default the ones recorded
+    on the pipeline by `training.train_from_config`, and carrying its
+    `decision_threshold`."""
+
+    feature_engine = feature_engine or recorded_feature_engine(model)
+    if feature_engine is None:
+        raise ValueError(
+            "The pipeline does not record the feature transforms it was trained "
+            "with. Pass them as `feature_engine`, or train the model again."
+        )
+
+    infered_transformers = model.named_steps["infered_transformers"]
+    classifier = model.named_steps["classifier"]
+
+    fitted_columns = {
+        name: list(columns) for name, _, columns in infered_transformers.transformers_
+    }
+    imputer = infered_transformers.named_transformers_["num"].named_steps["imputer"]
+    encoder = infered_transformers.named_transformers_["cat"].named_steps["encoder"]
+
+    numeric_features = fitted_columns["num"]
+    categories = [
+        np.asarray(feature_categories, dtype=str)
+        for feature_categories in encoder.categories_
+    ]
+    native_categories = isinstance(encoder, OrdinalEncoder)
+    # Category codes take a single column, one-hot encoded categories one per category
+    category_sizes = [
+        1 if native_categories else len(feature_categories)
+        for feature_categories in categories
+    ]
+
+    return CompiledModel(
+        numeric_features=numeric_features,
+        fill_values=imputer.statistics_.astype(np.float64),
+        feature_engine=feature_engine,
+        categorical_features=fitted_columns["cat"],
+        categories=categories,
+        category_offsets=len(numeric_features)
+        + np.concatenate([[0], np.cumsum(category_sizes)]).astype(np.int64),
+        zeros_are_missing=bool(infered_transformers.sparse_output_),
+        iteration_range=prediction_iteration_range(classifier),
+        booster=classifier.get_booster(),
+        categorical_encoding="native" if native_categories else "one_hot",
+        decision_threshold=decision_threshold,
+    )
+
+
+@click.command(
+    help="Compiles a trained model into an array-based scorer that takes preprocessed loan applications before feature engineering."
+)
+@click.option("--model-path", help="Path to the trained model.")
+@click.option(
+    "--compiled-model-path", help="Path where the compiled model will be saved."
+)
+@click.option(
+    "--decision-threshold-path",
+    default=None,
+    help="Path to the decision threshold of the model, saved with it. Defaults to a 0.5 cutoff.",
+)
+def cli(
+    model_path: os.PathLike,
+    compiled_model_path: os.PathLike,
+    decision_threshold_path: os.PathLike | None,
+):
+    trained_model = joblib.load(model_path)
+    compiled_model = compile_pipeline(
+        trained_model,
+        decision_threshold=(
+            load_decision_threshold(decision_threshold_path)
+            if decision_threshold_path
+            else DEFAULT_DECISION_THRESHOLD
+        ),
+    )
+    compiled_model.save(compiled_model_path)
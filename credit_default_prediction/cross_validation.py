@@ -1,53 +1,182 @@
+"""Cross-validation script."""
+
+from __future__ import annotations
+
 import os
+from dataclasses import dataclass, field
 
 import click
 import joblib
-from sklearn.model_selection import KFold, cross_val_score
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator
+from sklearn.model_selection import KFold, cross_validate
 
-from credit_default_prediction.dataset import LoanApplications
+from credit_default_prediction import params, tracing
+from credit_default_prediction.dataset import load_loan_applications
+from credit_default_prediction.decision_threshold import (
+    DecisionThresholdParams,
+    save_decision_threshold,
+    select_decision_threshold,
+)
 from credit_default_prediction.metrics import save_model_metrics
+from credit_default_prediction.transformer_cache import (
+    TransformerCacheParams,
+    evict_least_recently_used,
+    transformer_memory,
+)
+
+DEFAULT_SCORING = ["accuracy", "precision", "recall", "roc_auc"]
+
+
+@dataclass
+class CrossValidationParams:
+    n_splits: int = 5
+    shuffle: bool = True
+    random_state: int = 42
+    scoring: list[str] = field(default_factory=lambda: list(DEFAULT_SCORING))
+    n_jobs: int | None = None
+
+    @classmethod
+    def from_config(cls) -> CrossValidationParams:
+        return cls(**params.load_stage_params("cross_validation"))
+
+
+@dataclass
+class CrossValidationResults:
+    fold_scores: dict[str, np.ndarray]
+    fit_times: np.ndarray
+    score_times: np.ndarray
+    # Default probability of each application, predicted by the fold model
+    # that was not trained on it
+    out_of_fold_scores: np.ndarray | None = None
+
+    def summary(self) -> dict[str, float]:
+        """Averages every metric and timing over the folds."""
+
+        summary = {
+            f"avg_{metric}": float(scores.mean())
+            for metric, scores in self.fold_scores.items()
+        }
+        summary["avg_fit_time"] = float(self.fit_times.mean())
+        summary["avg_score_time"] = float(self.score_times.mean())
+
+        return summary
+
+
+def cross_validate_model(
+    model: BaseEstimator,
+    X: pd.DataFrame,
+    y: pd.Series,
+    cv_params: CrossValidationParams,
+    out_of_fold: bool = False,
+) -> CrossValidationResults:
+    """Fits `model` once per fold and scores every requested metric
+    off the same fold predictions.
+
+    Args:
+        model (BaseEstimator): Estimator to cross-validate. It is cloned for each fold.
+        X (pd.DataFrame): Features.
+        y (pd.Series): Labels.
+        cv_params (CrossValidationParams): Folds, metrics and parallelism settings.
+        out_of_fold (bool): Also predicts the default probability of every
+            application with the model of the fold it was left out of, without
+            fitting any other model.
+
+    Returns:
+        CrossValidationResults: Per-fold scores and timings.
+    """
+
+    kf = KFold(
+        n_splits=cv_params.n_splits,
+        shuffle=cv_params.shuffle,
+        random_state=cv_params.random_state if cv_params.shuffle else None,
+    )
+    with tracing.span("cross_validate_model", rows=len(X)):
+        cv_results = cross_validate(
+            model,
+            X,
+            y,
+            cv=kf,
+            scoring=cv_params.scoring,
+            n_jobs=cv_params.n_jobs,
+            return_estimator=out_of_fold,
+            return_indices=out_of_fold,
+        )
+
+    out_of_fold_scores = None
+    if out_of_fold:
+        out_of_fold_scores = np.empty(len(X))
+        for fold_model, test_indices in zip(
+            cv_results["estimator"], cv_results["indices"]["test"]
+        ):
+            out_of_fold_scores[test_indices] = fold_model.predict_proba(
+                X.iloc[test_indices]
+            )[:, 1]
+
+    return CrossValidationResults(
+        fold_scores={
+            metric: cv_results[f"test_{metric}"] for metric in cv_params.scoring
+        },
+        fit_times=cv_results["fit_time"],
+        score_times=cv_results["score_time"],
+        out_of_fold_scores=out_of_fold_scores,
+    )
 
 
 @click.command(
     help="Performs cross-validation of the trained model on the training data."
 )
 @click.option(
-    "--train-dataset-path", help="Path to the CSV feature-engineered training data."
+    "--train-dataset-path", help="Path to the feature-engineered training data."
 )
 @click.option("--model-path", help="Path to the trained model.")
-def cli(train_dataset_path: os.PathLike, model_path: os.PathLike):
+@click.option(
+    "--n-jobs",
+    type=int,
+    default=None,
+    help="Number of folds fitted in parallel. Overrides the `cross_validation` params.",
+)
+@click.option(
+    "--decision-threshold-path",
+    default=None,
+    help="Path where the cost-optimal decision threshold, selected on the out-of-fold predictions of the folds, will be saved.",
+)
+def cli(
+    train_dataset_path: os.PathLike,
+    model_path: os.PathLike,
+    n_jobs: int | None,
+    decision_threshold_path: os.PathLike | None,
+):
     trained_model = joblib.load(model_path)
-    train_dataset = LoanApplications.from_path(
+    train_dataset = load_loan_applications(
         train_dataset_path,
     )
-    kf = KFold(n_splits=5, shuffle=True, random_state=42)
+    cv_params = CrossValidationParams.from_config()
+    if n_jobs is not None:
+        cv_params.n_jobs = n_jobs
+    # Folds fitted in earlier runs reuse their cached transformers
+    cache_params = TransformerCacheParams.from_config()
+    memory = transformer_memory(cache_params)
+    trained_model.set_params(memory=memory)
 
-    avg_accuracy = cross_val_score(
+    cv_results = cross_validate_model(
         trained_model,
         train_dataset.X,
         train_dataset.y,
-        cv=kf,
-        scoring="accuracy",
-    ).mean()
-    avg_precision = cross_val_score(
-        trained_model,
-        train_dataset.X,
-        train_dataset.y,
-        cv=kf,
-        scoring="precision",
-    ).mean()
-    avg_recall = cross_val_score(
-        trained_model,
-        train_dataset.X,
-        train_dataset.y,
-        cv=kf,
-        scoring="recall",
-    ).mean()
-    save_model_metrics(
-        {
-            "avg_accuracy": avg_accuracy,
-            "avg_precision": avg_precision,
-            "avg_recall": avg_recall,
-        },
-        phase="cross_validation",
+        cv_params,
+        out_of_fold=decision_threshold_path is not None,
     )
+    evict_least_recently_used(memory, cache_params)
+    save_model_metrics(cv_results.summary(), phase="cross_validation")
+
+    if decision_threshold_path:
+        threshold_params = DecisionThresholdParams.from_config()
+        decision_threshold = select_decision_threshold(
+            train_dataset.y.to_numpy(),
+            cv_results.out_of_fold_scores,  # type: ignore
+            threshold_params,
+        )
+        save_decision_threshold(
+            decision_threshold, threshold_params, decision_threshold_path
+        )
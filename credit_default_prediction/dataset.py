@@ -7,6 +7,15 @@ from dataclasses import dataclass
 
 import pandas as pd
 
+from credit_default_prediction.storage import (
+    map_loan_data,
+    read_loan_data,
+    storage_format,
+    write_loan_data,
+)
+
+TARGET = "loan_status"
+
 
 @dataclass
 class LoanApplications:
@@ -17,14 +26,19 @@ class LoanApplications:
     def data(self) -> pd.DataFrame:
         return pd.concat([self.X, self.y], axis=1)
 
+    def save(self, dataset_path: os.PathLike):
+        """Saves loan applications as CSV, Parquet or Arrow IPC
+        depending on the file extension of `dataset_path`."""
+
+        write_loan_data(self.data, dataset_path)
+
     def save_to_csv(self, csv_path: os.PathLike):
-        as_dataframe = pd.concat([self.X, self.y], axis=1)
-        as_dataframe.to_csv(csv_path, index=False)
+        self.save(csv_path)
 
     @classmethod
     def from_dataframe(cls, loan_data: pd.DataFrame) -> LoanApplications:
-        X = loan_data.drop("loan_status", axis=1)
-        y = loan_data["loan_status"]
+        X = loan_data.drop(TARGET, axis=1)
+        y = loan_data[TARGET]
 
         return cls(X=X, y=y)
 
@@ -32,10 +46,56 @@ class LoanApplications:
     def from_path(
         cls, dataset_path: os.PathLike, columns: list[str] | None = None
     ) -> LoanApplications:
-        loan_data = pd.read_csv(dataset_path)
-        if columns:
-            loan_data = loan_data[columns]
-
+        loan_data = read_loan_data(dataset_path, columns=columns)
         loan_dataset = LoanApplications.from_dataframe(loan_data)
 
         return cls(X=loan_dataset.X, y=loan_dataset.y)
+
+
+@dataclass
+class MappedLoanApplications:
+    """Loan applications backed by a memory-mapped Arrow IPC file.
+
+    `X`, `y` and `data` are views on the columns of `loan_data`, so that
+    accessing them never copies the dataset.
+    """
+
+    loan_data: pd.DataFrame
+
+    @property
+    def X(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                column: self.loan_data[column]
+                for column in self.loan_data.columns
+                if column != TARGET
+            },
+            copy=False,
+        )
+
+    @property
+    def y(self) -> pd.Series:
+        return self.loan_data[TARGET]
+
+    @property
+    def data(self) -> pd.DataFrame:
+        return self.loan_data
+
+    def save(self, dataset_path: os.PathLike):
+        write_loan_data(self.loan_data, dataset_path)
+
+    @classmethod
+    def from_path(
+        cls, dataset_path: os.PathLike, columns: list[str] | None = None
+    ) -> MappedLoanApplications:
+        return cls(loan_data=map_loan_data(dataset_path, columns=columns))
+
+
+def load_loan_applications(
+    dataset_path: os.PathLike, columns: list[str] | None = None
+) -> LoanApplications | MappedLoanApplications:
+    """Memory-maps Arrow IPC datasets and reads any other dataset in memory."""
+
+    if storage_format(dataset_path) == "arrow":
+        return MappedLoanApplications.from_path(dataset_path, columns=columns)
+    return LoanApplications.from_path(dataset_path, columns=columns)
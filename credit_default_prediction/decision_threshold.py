@@ -0,0 +1,163 @@
+"""Decision threshold sweep and cost-optimal cutoff selection."""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from credit_default_prediction import params
+
+# Probability above which `XGBClassifier.predict` predicts a default
+DEFAULT_DECISION_THRESHOLD = 0.5
+
+
+@dataclass
+class DecisionCosts:
+    """Cost of each outcome of a credit decision, per loan application.
+
+    A false negative approves an applicant who defaults, a false positive
+    rejects an applicant who would have repaid.
+    """
+
+    true_positive: float = 0.0
+    false_positive: float = 1.0
+    true_negative: float = 0.0
+    false_negative: float = 5.0
+
+
+@dataclass
+class DecisionThresholdParams:
+    costs: DecisionCosts = field(default_factory=DecisionCosts)
+    target_approval_rate: float = 0.8
+
+    @classmethod
+    def from_config(cls) -> DecisionThresholdParams:
+        threshold_params = dict(params.load_stage_params("decision_threshold"))
+        costs = DecisionCosts(**threshold_params.pop("costs"))
+
+        return cls(costs=costs, **threshold_params)
+
+
+def threshold_sweep(
+    y_true: np.ndarray,
+    y_score: np.ndarray,
+    thresholds: np.ndarray | None = None,
+    costs: DecisionCosts | None = None,
+) -> pd.DataFrame:
+    """Outcome of the credit decision at each threshold, predicting a default
+    when the probability is above the threshold.
+
+    Scores are sorted once and the confusion counts at every threshold are
+    read off the cumulative count of defaults at or below it, in
+    O(n log n). Without `thresholds`, every distinct score is swept, so that
+    every possible decision is covered.
+
+    Returns:
+        pd.DataFrame: Confusion counts, precision, recall, F1 score, approval
+            rate and, given `costs`, expected loss per application at each
+            threshold.
+    """
+
+    order = np.argsort(y_score, kind="stable")
+    sorted_scores = y_score[order]
+    defaults_at_or_below = np.concatenate([[0], np.cumsum(y_true[order])])
+    if thresholds is None:
+        # Below the lowest score, every applicant is predicted to default
+        thresholds = np.unique(np.concatenate([[0.0], sorted_scores]))
+
+    n_rows = len(y_true)
+    n_at_or_below = np.searchsorted(sorted_scores, thresholds, side="right")
+    fn = defaults_at_or_below[n_at_or_below]
+    tn = n_at_or_below - fn
+    tp = defaults_at_or_below[-1] - fn
+    fp = n_rows - n_at_or_below - tp
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(tp + fn > 0, tp / (tp + fn), 0.0)
+        f1 = np.where(
+            precision + recall > 0,
+            2 * precision * recall / (precision + recall),
+            0.0,
+        )
+
+    sweep = pd.DataFrame(
+        {
+            "threshold": thresholds,
+            "tp": tp,
+            "fp": fp,
+            "tn": tn,
+            "fn": fn,
+            "precision": precision,
+            "recall": recall,
+            "f1": f1,
+            # Applicants predicted not to default get their loan
+            "approval_rate": n_at_or_below / n_rows,
+        }
+    )
+    if costs is not None:
+        sweep["expected_loss"] = (
+            tp * costs.true_positive
+            + fp * costs.false_positive
+            + tn * costs.true_negative
+            + fn * costs.false_negative
+        ) / n_rows
+
+    return sweep
+
+
+def cost_optimal_threshold(sweep: pd.DataFrame) -> pd.Series:
+    """Row of a sweep with costs minimizing the expected loss."""
+
+    return sweep.iloc[int(np.argmin(sweep["expected_loss"].to_numpy()))]
+
+
+def recall_at_approval_rate(sweep: pd.DataFrame, approval_rate: float) -> float:
+    """Share of defaults caught when approving at most `approval_rate`
+    of the applications."""
+
+    # Recall decreases as more applications are approved
+    within_approval_rate = sweep[sweep["approval_rate"] <= approval_rate]
+    if within_approval_rate.empty:
+        return 1.0
+
+    return float(within_approval_rate["recall"].min())
+
+
+def select_decision_threshold(
+    y_true: np.ndarray, y_score: np.ndarray, threshold_params: DecisionThresholdParams
+) -> dict[str, float]:
+    """Cost-optimal cutoff, with the outcome of the credit decision at it."""
+
+    sweep = threshold_sweep(y_true, y_score, costs=threshold_params.costs)
+    optimal = cost_optimal_threshold(sweep)
+
+    return {
+        "threshold": float(optimal["threshold"]),
+        "expected_loss": float(optimal["expected_loss"]),
+        "approval_rate": float(optimal["approval_rate"]),
+        "precision": float(optimal["precision"]),
+        "recall": float(optimal["recall"]),
+    }
+
+
+def save_decision_threshold(
+    decision_threshold: dict[str, float],
+    threshold_params: DecisionThresholdParams,
+    decision_threshold_path: os.PathLike,
+):
+    with open(decision_threshold_path, "w") as decision_threshold_file:
+        json.dump(
+            {**decision_threshold, "costs": asdict(threshold_params.costs)},
+            decision_threshold_file,
+            indent=4,
+        )
+
+
+def load_decision_threshold(decision_threshold_path: os.PathLike) -> float:
+    with open(decision_threshold_path) as decision_threshold_file:
+        return float(json.load(decision_threshold_file)["threshold"])
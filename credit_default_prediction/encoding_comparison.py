@@ -0,0 +1,165 @@
+"""Comparison of the one-hot and native categorical encodings."""
+
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import time
+from dataclasses import asdict, dataclass
+
+import click
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.metrics import roc_auc_score
+
+from credit_default_prediction import inference, params
+from credit_default_prediction.dataset import LoanApplications, load_loan_applications
+from credit_default_prediction.feature_engineering import get_model_features
+from credit_default_prediction.hyper_params import HyperParams
+from credit_default_prediction.preprocessing import CATEGORICAL_ENCODINGS
+from credit_default_prediction.storage import read_loan_data
+from credit_default_prediction.training import train
+
+
+@dataclass
+class EncodingReport:
+    categorical_encoding: str
+    n_features: int
+    feature_matrix_bytes: int
+    model_bytes: int
+    fit_time: float
+    scoring_time_per_row: float
+    roc_auc: float
+
+
+def matrix_bytes(matrix: np.ndarray | sparse.spmatrix) -> int:
+    """Memory held by a dense or a sparse CSR/CSC feature matrix."""
+
+    if sparse.issparse(matrix):
+        csr_matrix = sparse.csr_matrix(matrix)
+        return (
+            csr_matrix.data.nbytes
+            + csr_matrix.indices.nbytes
+            + csr_matrix.indptr.nbytes
+        )
+    return np.asarray(matrix).nbytes
+
+
+def evaluate_encoding(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    X_test: pd.DataFrame,
+    y_test: pd.Series,
+    hyper_params: HyperParams,
+    categorical_encoding: str,
+) -> EncodingReport:
+    """Trains a model with `categorical_encoding` and measures its cost and ROC AUC."""
+
+    start = time.perf_counter()
+    model = train(
+        X_train, y_train, hyper_params, categorical_encoding=categorical_encoding
+    )
+    fit_time = time.perf_counter() - start
+
+    feature_matrix = model.named_steps["infered_transformers"].transform(X_train)
+
+    start = time.perf_counter()
+    y_score = model.predict_proba(X_test)[:, 1]
+    scoring_time = time.perf_counter() - start
+
+    return EncodingReport(
+        categorical_encoding=categorical_encoding,
+        n_features=feature_matrix.shape[1],
+        feature_matrix_bytes=matrix_bytes(feature_matrix),
+        model_bytes=len(pickle.dumps(model)),
+        fit_time=fit_time,
+        scoring_time_per_row=scoring_time / len(X_test),
+        roc_auc=float(roc_auc_score(y_test, y_score)),
+    )
+
+
+def compare_categorical_encodings(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    X_test: pd.DataFrame,
+    y_test: pd.Series,
+    hyper_params: HyperParams,
+) -> list[EncodingReport]:
+    return [
+        evaluate_encoding(
+            X_train, y_train, X_test, y_test, hyper_params, categorical_encoding
+        )
+        for categorical_encoding in CATEGORICAL_ENCODINGS
+    ]
+
+
+def format_comparison(reports: list[EncodingReport]) -> str:
+    """Table of the encodings, with their differences to the first one."""
+
+    baseline = reports[0]
+    lines = [
+        f"{'encoding':<10}{'features':>10}{'matrix MiB':>12}{'model KiB':>11}"
+        f"{'fit s':>9}{'score µs/row':>14}{'ROC AUC':>9}"
+    ]
+    for report in reports:
+        lines.append(
+            f"{report.categorical_encoding:<10}{report.n_features:>10}"
+            f"{report.feature_matrix_bytes / 2**20:>12.2f}"
+            f"{report.model_bytes / 2**10:>11.1f}{report.fit_time:>9.3f}"
+            f"{report.scoring_time_per_row * 1e6:>14.2f}{report.roc_auc:>9.4f}"
+        )
+    for report in reports[1:]:
+        lines.append(
+            f"{report.categorical_encoding} vs {baseline.categorical_encoding}: "
+            f"fit time x{report.fit_time / baseline.fit_time:.2f}, "
+            f"feature matrix x{report.feature_matrix_bytes / baseline.feature_matrix_bytes:.2f}, "
+            f"scoring time x{report.scoring_time_per_row / baseline.scoring_time_per_row:.2f}, "
+            f"ROC AUC {report.roc_auc - baseline.roc_auc:+.4f}"
+        )
+
+    return "\n".join(lines)
+
+
+@click.command(
+    help="Compares the training time, memory and ROC AUC of the one-hot and native categorical encodings."
+)
+@click.option(
+    "--train-dataset-path", help="Path to the feature-engineered training data."
+)
+@click.option("--test-dataset-path", help="Path to the test data.")
+@click.option(
+    "--report-path",
+    default=None,
+    help="Path of a JSON file where the comparison will be saved.",
+)
+def cli(
+    train_dataset_path: os.PathLike,
+    test_dataset_path: os.PathLike,
+    report_path: os.PathLike | None,
+):
+    train_dataset = load_loan_applications(
+        train_dataset_path,
+        columns=get_model_features(),
+    )
+    test_data = read_loan_data(
+        test_dataset_path,
+        columns=params.get_important_features(),
+    )
+    test_dataset = LoanApplications.from_dataframe(
+        inference.rule_based_preparation(test_data)
+    )
+
+    reports = compare_categorical_encodings(
+        train_dataset.X,
+        train_dataset.y,
+        test_dataset.X,
+        test_dataset.y,
+        HyperParams.from_config(),
+    )
+    click.echo(format_comparison(reports))
+
+    if report_path:
+        with open(report_path, "w") as report_file:
+            json.dump([asdict(report) for report in reports], report_file, indent=4)
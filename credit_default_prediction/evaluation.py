@@ -1,43 +1,148 @@
 """Evaluation script."""
 
+from __future__ import annotations
+
 import os
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 import click
 import joblib
+import numpy as np
 import pandas as pd
-import xgboost as xgb
 from dvclive.live import Live
-from sklearn.metrics import (  # noqa
-    accuracy_score,
-    precision_score,
-    recall_score,
-    roc_auc_score,
-)
+from sklearn.metrics import confusion_matrix, roc_auc_score
 from sklearn.pipeline import Pipeline
 
-from credit_default_prediction import inference, params
+from credit_default_prediction import inference, params, tracing
 from credit_default_prediction.dataset import LoanApplications
+from credit_default_prediction.decision_threshold import (
+    DEFAULT_DECISION_THRESHOLD,
+    DecisionThresholdParams,
+    load_decision_threshold,
+    recall_at_approval_rate,
+    threshold_sweep,
+)
 from credit_default_prediction.experiment_tracking.dvc_experiment_tracker import (
     DVCExperimentTracker,
 )
+from credit_default_prediction.storage import iter_loan_data_chunks, read_loan_data
+
+if TYPE_CHECKING:
+    import xgboost as xgb
+
+SWEEP_THRESHOLDS = np.linspace(0, 1, 101)
+
+
+@dataclass
+class HoldoutPredictions:
+    """Labels and default probabilities of the holdout set, scored once.
+
+    Every metric and plot of the evaluation is derived from them, instead of
+    running the model over the test set again.
+    """
+
+    y_true: np.ndarray
+    y_score: np.ndarray
+    threshold: float = DEFAULT_DECISION_THRESHOLD
+
+    @property
+    def y_pred(self) -> np.ndarray:
+        return (self.y_score > self.threshold).astype(np.int8)
+
+
+def predict_test_set(
+    model: Pipeline,
+    test_dataset_path: os.PathLike,
+    chunk_size: int | None = None,
+    threshold: float = DEFAULT_DECISION_THRESHOLD,
+) -> HoldoutPredictions:
+    """Prepares and scores the test set in a single pass.
+
+    With a `chunk_size`, the test set is read, prepared and scored
+    `chunk_size` rows at a time, so that only the labels and probabilities
+    of the whole test set are kept in memory.
+    """
+
+    columns = params.get_important_features()
+    chunks: Iterator[pd.DataFrame]
+    if chunk_size:
+        chunks = (
+            chunk[columns]
+            for chunk in iter_loan_data_chunks(test_dataset_path, chunk_size)
+        )
+    else:
+        chunks = iter([read_loan_data(test_dataset_path, columns=columns)])
+
+    labels = []
+    scores = []
+    for chunk in chunks:
+        test_dataset = LoanApplications.from_dataframe(
+            inference.rule_based_preparation(chunk)
+        )
+        if test_dataset.y.empty:
+            continue
+        labels.append(test_dataset.y.to_numpy())
+        scores.append(tracing.predict_proba(model, test_dataset.X)[:, 1])
+
+    if not labels:
+        raise ValueError(
+            f"No test application of {test_dataset_path} passed the preprocessing rules."
+        )
+
+    return HoldoutPredictions(
+        y_true=np.concatenate(labels),
+        y_score=np.concatenate(scores),
+        threshold=threshold,
+    )
 
 
-def evaluate(model: Pipeline, X: pd.DataFrame, y: pd.Series) -> dict:
-    y_pred = model.predict(X)
+def evaluate(
+    predictions: HoldoutPredictions,
+    threshold_params: DecisionThresholdParams | None = None,
+) -> dict:
+    """Metrics at the decision threshold of the predictions.
 
-    return {
-        "accuracy": accuracy_score(y, y_pred),
-        "precision": precision_score(y, y_pred),
-        "recall": recall_score(y, y_pred),
-        "ROC_AUC": roc_auc_score(y, model.predict_proba(X)[:, 1]),
+    Given `threshold_params`, also reports the approval rate and expected
+    loss at the threshold, and the recall at the target approval rate.
+    """
+
+    tn, fp, fn, tp = confusion_matrix(
+        predictions.y_true, predictions.y_pred, labels=[0, 1]
+    ).ravel()
+    n_rows = tp + tn + fp + fn
+
+    metrics = {
+        "accuracy": float((tp + tn) / n_rows),
+        "precision": float(tp / (tp + fp)) if tp + fp else 0.0,
+        "recall": float(tp / (tp + fn)) if tp + fn else 0.0,
+        "ROC_AUC": float(roc_auc_score(predictions.y_true, predictions.y_score)),
     }
+    if threshold_params is not None:
+        costs = threshold_params.costs
+        metrics["approval_rate"] = float((tn + fn) / n_rows)
+        metrics["expected_loss"] = float(
+            (
+                tp * costs.true_positive
+                + fp * costs.false_positive
+                + tn * costs.true_negative
+                + fn * costs.false_negative
+            )
+            / n_rows
+        )
+        sweep = threshold_sweep(predictions.y_true, predictions.y_score)
+        metrics["recall_at_approval_rate"] = recall_at_approval_rate(
+            sweep, threshold_params.target_approval_rate
+        )
+
+    return metrics
 
 
-def log_confusion_matrix(model: Pipeline, X: pd.DataFrame, y: pd.Series, live: Live):
-    predictions = model.predict(X)
+def log_confusion_matrix(predictions: HoldoutPredictions, live: Live):
     preds_df = pd.DataFrame()
-    preds_df["actual"] = y.values
-    preds_df["predicted"] = predictions
+    preds_df["actual"] = predictions.y_true
+    preds_df["predicted"] = predictions.y_pred
 
     live.log_plot(
         "confusion_matrix",
@@ -50,10 +155,28 @@ def log_confusion_matrix(model: Pipeline, X: pd.DataFrame, y: pd.Series, live: L
     )
 
 
-def log_roc_curve(model: Pipeline, X: pd.DataFrame, y: pd.Series, live: Live):
-    y_score = model.predict_proba(X)[:, 1].astype(float)
-    y_true = y.to_numpy()
-    live.log_sklearn_plot("roc", y_true, y_score)
+def log_roc_curve(predictions: HoldoutPredictions, live: Live):
+    y_score = predictions.y_score.astype(float)
+    live.log_sklearn_plot("roc", predictions.y_true, y_score)
+
+
+def log_precision_recall_curve(predictions: HoldoutPredictions, live: Live):
+    y_score = predictions.y_score.astype(float)
+    live.log_sklearn_plot(
+        "precision_recall", predictions.y_true, y_score, drop_intermediate=True
+    )
+
+
+def log_threshold_sweep(predictions: HoldoutPredictions, live: Live):
+    live.log_plot(
+        "threshold_sweep",
+        threshold_sweep(predictions.y_true, predictions.y_score, SWEEP_THRESHOLDS),
+        x="threshold",
+        y=["precision", "recall", "f1", "approval_rate"],
+        template="linear",
+        x_label="Threshold",
+        y_label="Score",
+    )
 
 
 def generate_feature_importance_data(
@@ -88,33 +211,50 @@ def log_feature_importance_plot(model: Pipeline, live: Live):
     )
 
 
-def log_plots(model: Pipeline, X: pd.DataFrame, y: pd.Series):
-    with Live(resume=True) as live:
-        log_confusion_matrix(model, X, y, live)
-        log_roc_curve(model, X, y, live)
-        log_feature_importance_plot(model, live)
+def log_plots(model: Pipeline, predictions: HoldoutPredictions, live: Live):
+    log_confusion_matrix(predictions, live)
+    log_roc_curve(predictions, live)
+    log_precision_recall_curve(predictions, live)
+    log_threshold_sweep(predictions, live)
+    log_feature_importance_plot(model, live)
 
 
 @click.command(help="Evaluates a trained model on the test data.")
 @click.option("--model-path", help="Path to the trained model.")
 @click.option("--test-dataset-path", help="Path to the test data.")
-def cli(model_path: os.PathLike, test_dataset_path: os.PathLike):
-    test_dataset = LoanApplications.from_path(
-        test_dataset_path,
-        columns=params.get_important_features(),
-    )
-    # Prepare test dataset
-    prepped_test_data = inference.rule_based_preparation(test_dataset.data)
-    test_dataset = LoanApplications.from_dataframe(prepped_test_data)
-
-    # Evaluate trained model on prepped
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=None,
+    help="Score the test data in chunks of this many rows to bound memory usage.",
+)
+@click.option(
+    "--decision-threshold-path",
+    default=None,
+    help="Path to the decision threshold selected at training. Defaults to a 0.5 cutoff.",
+)
+def cli(
+    model_path: os.PathLike,
+    test_dataset_path: os.PathLike,
+    chunk_size: int | None,
+    decision_threshold_path: os.PathLike | None,
+):
     trained_model = joblib.load(model_path)
-    X_test, y_test = test_dataset.X, test_dataset.y
-    metrics = evaluate(trained_model, X_test, y_test)
+    threshold = (
+        load_decision_threshold(decision_threshold_path)
+        if decision_threshold_path
+        else DEFAULT_DECISION_THRESHOLD
+    )
+    # Score the test set once, every metric and plot derives from it
+    predictions = predict_test_set(
+        trained_model, test_dataset_path, chunk_size, threshold
+    )
+    metrics = evaluate(predictions, DecisionThresholdParams.from_config())
 
     # Save metrics and plots
-    # save_model_metrics(metrics)
     with Live(resume=True) as live:
         experiment_tracker = DVCExperimentTracker(live)
         experiment_tracker.log_metrics(metrics, phase="test")
-    log_plots(trained_model, X_test, y_test)
+        if tracing.tracer.enabled:
+            experiment_tracker.log_timings(tracing.tracer.summary())
+        log_plots(trained_model, predictions, live)
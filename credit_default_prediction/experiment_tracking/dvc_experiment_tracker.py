@@ -6,6 +6,7 @@ from credit_default_prediction.experiment_tracking.experiment_tracker import (
     ExperimentTracker,
 )
 from credit_default_prediction.hyper_params import HyperParams
+from credit_default_prediction.tracing import SpanSummary
 
 
 class DVCExperimentTracker(ExperimentTracker):
@@ -22,3 +23,8 @@ class DVCExperimentTracker(ExperimentTracker):
     ):
         for metric, value in metrics.items():
             self._live.log_metric(f"{phase}/{metric}", value)
+
+    def log_timings(self, timings: dict[str, SpanSummary]):
+        for span_name, summary in timings.items():
+            for metric, value in summary.to_metrics().items():
+                self._live.log_metric(f"timings/{span_name}/{metric}", value)
@@ -1,6 +1,7 @@
 from typing import Literal, Protocol
 
 from credit_default_prediction.hyper_params import HyperParams
+from credit_default_prediction.tracing import SpanSummary
 
 
 class ExperimentTracker(Protocol):
@@ -11,3 +12,5 @@ class ExperimentTracker(Protocol):
         metrics: dict[str, float],
         phase: Literal["cross_validation", "test"],
     ): ...
+
+    def log_timings(self, timings: dict[str, SpanSummary]): ...
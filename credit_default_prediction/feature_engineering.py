@@ -1,47 +1,299 @@
+"""Feature engineering of preprocessed loan applications.
+
+Transforms are listed in the `transforms` of the `feature_engineering` params
+and applied in order, each one reading the output of the previous ones:
+
+- `log1p` replaces each of its `columns` by `log(1 + x)`.
+- `ratio` adds a `name` feature dividing the first of its two `columns` by the
+  second, missing where the denominator is zero.
+- `bin` adds a `name` feature holding the index of the `bins` interval the
+  value of its single column falls in, missing where the value is missing.
+- `interaction` adds a `name` feature multiplying its `columns`.
+
+Each transform runs NumPy ufuncs over the arrays of the columns it reads,
+writing into a single output array per column. Other columns are neither read
+nor copied: the transformed columns are set on a shallow copy of the input, or
+on the input itself when asked to.
+"""
+
+from __future__ import annotations
+
 import os
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass
 
 import click
 import numpy as np
 import pandas as pd
+from numpy.typing import ArrayLike
+from sklearn.pipeline import Pipeline
+
+from credit_default_prediction import params, tracing
+from credit_default_prediction.partitioned_store import update_partitioned_store
+from credit_default_prediction.storage import (
+    downcast_loan_data,
+    read_loan_data,
+    write_loan_data,
+)
+from credit_default_prediction.streaming import stream_transform
+
+LARGE_FEATURES = ["person_income", "loan_amnt"]
+# Number of columns each transform takes, at least and at most
+FEATURE_TRANSFORMS: dict[str, tuple[int, int | None]] = {
+    "log1p": (1, None),
+    "ratio": (2, 2),
+    "bin": (1, 1),
+    "interaction": (2, None),
+}
+
+
+@dataclass
+class FeatureTransform:
+    """Transform of the `feature_engineering` params, see the module docstring."""
+
+    type: str
+    columns: list[str]
+    name: str | None = None
+    bins: list[float] | None = None
+
+    def __post_init__(self):
+        if self.type not in FEATURE_TRANSFORMS:
+            raise ValueError(
+                f"Unknown feature transform {self.type!r}. Expected one of {list(FEATURE_TRANSFORMS)}."
+            )
+        min_columns, max_columns = FEATURE_TRANSFORMS[self.type]
+        if len(self.columns) < min_columns or len(self.columns) > (
+            max_columns or len(self.columns)
+        ):
+            raise ValueError(
+                f"Wrong number of columns for the {self.type} transform: {self.columns}."
+            )
+        if (self.type == "log1p") != (self.name is None):
+            raise ValueError(
+                "log1p transforms its columns in place, other transforms need a name."
+            )
+        if self.type == "bin" and (not self.bins or self.bins != sorted(self.bins)):
+            raise ValueError(
+                f"The bin transform needs increasing bins, got {self.bins}."
+            )
+
+    @property
+    def output_columns(self) -> list[str]:
+        return self.columns if self.name is None else [self.name]
+
+    def compute(self, columns: list[np.ndarray]) -> list[np.ndarray]:
+        """Output arrays of the transform, given the arrays of its columns."""
+
+        if self.type == "log1p":
+            return [np.log1p(values) for values in columns]
+        if self.type == "ratio":
+            numerator, denominator = columns
+            ratio = np.full(len(numerator), np.nan)
+            np.divide(numerator, denominator, out=ratio, where=denominator != 0)
+            return [ratio]
+        if self.type == "bin":
+            (values,) = columns
+            bin_indices = np.searchsorted(
+                np.asarray(self.bins), values, side="right"
+            ).astype(np.float64)
+            bin_indices[np.isnan(values)] = np.nan
+            return [bin_indices]
+
+        product = np.multiply(columns[0], columns[1])
+        for values in columns[2:]:
+            np.multiply(product, values, out=product)
+        return [product]
+
+
+class FeatureEngine:
+    """Applies a list of feature transforms to loan applications."""
+
+    def __init__(self, transforms: list[FeatureTransform]) -> None:
+        self.transforms = transforms
+
+    @classmethod
+    def from_config(cls) -> FeatureEngine:
+        feature_engineering_params = params.load_stage_params("feature_engineering")
+        return cls.from_params(
+            feature_engineering_params.get(
+                "transforms", [{"type": "log1p", "columns": LARGE_FEATURES}]
+            )
+        )
+
+    @classmethod
+    def from_params(cls, transforms: list[dict]) -> FeatureEngine:
+        """Feature engine of transforms listed as in the params, or as
+        returned by `to_params`."""
+
+        return cls([FeatureTransform(**transform) for transform in transforms])
+
+    @property
+    def derived_features(self) -> list[str]:
+        """Features added by the transforms, in order."""
+
+        return [transform.name for transform in self.transforms if transform.name]
+
+    def to_params(self) -> list[dict]:
+        return [
+            {
+                key: value
+                for key, value in asdict(transform).items()
+                if value is not None
+            }
+            for transform in self.transforms
+        ]
+
+    def compute(
+        self, loan_data: pd.DataFrame | Mapping[str, ArrayLike]
+    ) -> dict[str, np.ndarray]:
+        """Arrays of the transformed and derived features, by name.
+
+        Works on a DataFrame as well as on a mapping of column arrays, whose
+        float64 columns are read without being copied.
+        """
+
+        computed: dict[str, np.ndarray] = {}
+        for transform in self.transforms:
+            columns = [
+                (
+                    computed[column]
+                    if column in computed
+                    else np.asarray(loan_data[column], dtype=np.float64)
+                )
+                for column in transform.columns
+            ]
+            computed.update(zip(transform.output_columns, transform.compute(columns)))
+
+        return computed
+
+    def transform(self, loan_data: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+        """Sets the computed features on a shallow copy of `loan_data`, sharing
+        its other columns, or on `loan_data` itself when `inplace`."""
+
+        engineered_data = loan_data if inplace else loan_data.copy(deep=False)
+        for column, values in self.compute(loan_data).items():
+            engineered_data[column] = values
+
+        return engineered_data
+
+
+def record_feature_engine(model: Pipeline, feature_engine: FeatureEngine) -> Pipeline:
+    """Records on a trained pipeline the transforms its training data went
+    through, so that it is compiled with them whatever the params hold
+    later. The transforms are pickled along with the pipeline."""
+
+    model.feature_transforms_ = feature_engine.to_params()
+    return model
+
+
+def recorded_feature_engine(model: Pipeline) -> FeatureEngine | None:
+    """Transforms recorded on a trained pipeline, if any."""
+
+    feature_transforms = getattr(model, "feature_transforms_", None)
+    if feature_transforms is None:
+        return None
+    return FeatureEngine.from_params(feature_transforms)
+
+
+def get_model_features() -> list[str]:
+    """Columns of the feature store the model is trained on: the important
+    columns, followed by the derived features."""
+
+    important_features = params.get_important_features()
+    return important_features + [
+        feature
+        for feature in FeatureEngine.from_config().derived_features
+        if feature not in important_features
+    ]
 
 
 def log_transform_large_features(loan_data: pd.DataFrame) -> pd.DataFrame:
     """Applies log transformation to large features."""
-    LARGE_FEATURES = ["person_income", "loan_amnt"]
 
-    clean_loan_data = loan_data.copy()
-    clean_loan_data[LARGE_FEATURES] = loan_data[LARGE_FEATURES].apply(
-        lambda row: np.log1p(row),  # We add 1 to log argument to avoid log(0) # noqa
+    return FeatureEngine([FeatureTransform("log1p", LARGE_FEATURES)]).transform(
+        loan_data
     )
 
-    return clean_loan_data
-
 
 def engineer_features(clean_loan_data: pd.DataFrame) -> pd.DataFrame:
     """Perform feature engineering on input clean loan
-    applications dataframe."""
+    applications dataframe, with the transforms of the params."""
 
-    # Log tranform large features
-    feature_engineered_data = log_transform_large_features(
-        clean_loan_data,
-    )
+    with tracing.span("engineer_features", rows=len(clean_loan_data)):
+        feature_engineered_data = FeatureEngine.from_config().transform(clean_loan_data)
 
     return feature_engineered_data
 
 
+def engineer_downcast_features(clean_loan_data: pd.DataFrame) -> pd.DataFrame:
+    """Performs feature engineering and shrinks the resulting column types."""
+
+    return downcast_loan_data(engineer_features(clean_loan_data))
+
+
 @click.command(
     help="Performs feature engineering on loan applications data that have preprocessed beforehand. This operation transforms the data to help the model learn better."
 )
 @click.option(
     "--preprocessed-data-path",
-    help="Path to the preprocessed loan applications CSV file.",
+    help="Path to the preprocessed loan applications file or partitioned store.",
 )
 @click.option(
     "--feature-store-path",
-    help="Path where the feature engineered loan applications CSV file will be saved.",
+    help="Path where the feature engineered loan applications will be saved. The file extension sets the format.",
 )
-def cli(preprocessed_data_path: os.PathLike, feature_store_path: os.PathLike):
-    preprocessed_data = pd.read_csv(preprocessed_data_path)
-    preprocessed_data = engineer_features(preprocessed_data)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=None,
+    help="Engineer features in chunks of this many rows to bound memory usage.",
+)
+@click.option(
+    "--downcast",
+    is_flag=True,
+    help="Store floats as float32, labels as int8, other integers as int32 and text as categoricals.",
+)
+@click.option(
+    "--partition-size",
+    type=int,
+    default=None,
+    help="Save the engineered features as a partitioned store directory, of this many preprocessed rows per partition, or following the partitions of a preprocessed store. Only the partitions whose rows changed since the last run are engineered again.",
+)
+def cli(
+    preprocessed_data_path: os.PathLike,
+    feature_store_path: os.PathLike,
+    chunk_size: int | None,
+    downcast: bool,
+    partition_size: int | None,
+):
+    if chunk_size and partition_size:
+        raise click.UsageError(
+            "--chunk-size and --partition-size cannot be used together."
+        )
+
+    transform = engineer_downcast_features if downcast else engineer_features
+    if partition_size:
+        update_stats = update_partitioned_store(
+            preprocessed_data_path,
+            feature_store_path,
+            transform,
+            partition_size=partition_size,
+            transform_params=FeatureEngine.from_config().to_params(),
+        )
+        click.echo(update_stats.report())
+        return
+
+    if chunk_size:
+        stats = stream_transform(
+            preprocessed_data_path,
+            feature_store_path,
+            transform,
+            chunk_size=chunk_size,
+        )
+        click.echo(stats.report())
+        return
+
+    preprocessed_data = read_loan_data(preprocessed_data_path)
+    preprocessed_data = transform(preprocessed_data)
     # Save feature engineered loan applications
-    preprocessed_data.to_csv(feature_store_path, index=False)
+    write_loan_data(preprocessed_data, feature_store_path)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import asdict, dataclass
+from typing import Any
 
 from credit_default_prediction import params
 
@@ -10,12 +11,13 @@ class HyperParams:
     learning_rate: float
     max_depth: float = 4
     min_child_weight: float = 1
+    n_estimators: int = 100
 
     def to_dict(self) -> dict[str, float]:
         return asdict(self)
 
     @classmethod
-    def from_dict(cls, hyper_params: dict[str, float]) -> HyperParams:
+    def from_dict(cls, hyper_params: dict[str, Any]) -> HyperParams:
         return cls(**hyper_params)
 
     @classmethod
@@ -1,35 +1,556 @@
 """Hyper-parameter tuning script."""
 
+from __future__ import annotations
+
+import json
+import math
 import os
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
 
 import click
+import joblib
 import numpy as np
+import pandas as pd
 import xgboost as xgb
-from sklearn.model_selection import GridSearchCV
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import KFold, train_test_split
+
+from credit_default_prediction import params
+from credit_default_prediction.dataset import load_loan_applications
+from credit_default_prediction.feature_engineering import get_model_features
+from credit_default_prediction.preprocessing import (
+    build_infered_transformers,
+    categorical_classifier_params,
+    infer_feature_types,
+)
+from credit_default_prediction.storage import fingerprint_file
+from credit_default_prediction.training import ModelParams
+from credit_default_prediction.transformer_cache import (
+    TransformerCacheParams,
+    evict_least_recently_used,
+    transformer_memory,
+)
+from credit_default_prediction.trial_store import Trial, TrialStore
+
+STRATEGIES = ["halving", "tpe"]
+
+
+@dataclass
+class ParamRange:
+    low: float
+    high: float
+    log: bool = False
+    integer: bool = False
+
+    @property
+    def bounds(self) -> tuple[float, float]:
+        """Bounds of the range in the space the search happens in."""
+
+        if self.log:
+            return math.log(self.low), math.log(self.high)
+        return self.low, self.high
+
+    def to_search_space(self, value: float) -> float:
+        return math.log(value) if self.log else value
+
+    def from_search_space(self, value: float) -> float:
+        if self.log:
+            value = math.exp(value)
+        value = min(max(value, self.low), self.high)
+        if self.integer:
+            return int(round(value))
+        return float(value)
+
+
+SearchSpace = dict[str, ParamRange]
+
+
+@dataclass
+class TuningParams:
+    search_space: SearchSpace
+    strategy: str = "halving"
+    n_trials: int = 27
+    n_jobs: int | None = None
+    n_splits: int = 3
+    random_state: int = 42
+    early_stopping_rounds: int = 20
+    # Share of the training part of each fold held out to stop boosting early
+    early_stopping_fraction: float = 0.2
+    min_n_estimators: int = 25
+    max_n_estimators: int = 400
+    reduction_factor: int = 3
+    n_startup_trials: int = 10
+    categorical_encoding: str = "one_hot"
+
+    @classmethod
+    def from_config(cls) -> TuningParams:
+        tuning_params = dict(params.load_stage_params("tune"))
+        search_space = {
+            name: ParamRange(**param_range)
+            for name, param_range in tuning_params.pop("search_space").items()
+        }
+        # Candidates are tuned for the model that will be trained
+        return cls(
+            search_space=search_space,
+            categorical_encoding=ModelParams.from_config().categorical_encoding,
+            **tuning_params,
+        )
+
+    @property
+    def n_estimators_budgets(self) -> list[int]:
+        """Increasing numbers of boosting rounds of the successive halving rungs."""
+
+        budgets = []
+        budget = self.min_n_estimators
+        while budget < self.max_n_estimators:
+            budgets.append(budget)
+            budget *= self.reduction_factor
+        budgets.append(self.max_n_estimators)
+
+        return budgets
+
+
+TrialsEvaluator = Callable[[list[dict[str, float]], int], list[Trial]]
+
+
+def trial_key(
+    hyper_params: dict[str, float], n_estimators: int, tuning_params: TuningParams
+) -> str:
+    """Identifies a trial by its candidate and everything its score depends on."""
+
+    return json.dumps(
+        {
+            "hyper_params": hyper_params,
+            "n_estimators": n_estimators,
+            "n_splits": tuning_params.n_splits,
+            "random_state": tuning_params.random_state,
+            "early_stopping_rounds": tuning_params.early_stopping_rounds,
+            "early_stopping_fraction": tuning_params.early_stopping_fraction,
+            "categorical_encoding": tuning_params.categorical_encoding,
+        },
+        sort_keys=True,
+    )
+
+
+def transform_fold(
+    X: pd.DataFrame,
+    train_index: np.ndarray,
+    val_index: np.ndarray,
+    numeric_features: list[str],
+    categorical_features: list[str],
+    categorical_encoding: str = "one_hot",
+) -> tuple[np.ndarray, np.ndarray]:
+    """Fits the infered transformers on the training part of a fold
+    and transforms both parts of the fold."""
+
+    infered_transformers = build_infered_transformers(
+        numeric_features=numeric_features,
+        categorical_features=categorical_features,
+        categorical_encoding=categorical_encoding,
+    )
+    X_train = infered_transformers.fit_transform(X.iloc[train_index])
+    X_val = infered_transformers.transform(X.iloc[val_index])
+
+    return X_train, X_val
+
+
+def evaluate_trial(
+    X: pd.DataFrame,
+    y: pd.Series,
+    hyper_params: dict[str, float],
+    n_estimators: int,
+    tuning_params: TuningParams,
+    memory: joblib.Memory | None = None,
+) -> Trial:
+    """Cross-validates a candidate with at most `n_estimators` boosting rounds.
+
+    On each fold, boosting stops early once the ROC AUC on an
+    `early_stopping_fraction` of the training part stops improving for
+    `early_stopping_rounds` rounds. The validation part is only used to score
+    the fold, so that choosing the number of rounds does not bias the trial
+    score. With a `memory`, the transformed folds are shared by every
+    candidate instead of being computed again for each of them.
+    """
+
+    start = time.perf_counter()
+    numeric_features, categorical_features = infer_feature_types(X)
+    kf = KFold(
+        n_splits=tuning_params.n_splits,
+        shuffle=True,
+        random_state=tuning_params.random_state,
+    )
+    transform = memory.cache(transform_fold) if memory else transform_fold
+
+    fold_scores = []
+    best_iterations = []
+    for train_index, val_index in kf.split(X):
+        X_train, X_val = transform(
+            X,
+            train_index,
+            val_index,
+            numeric_features,
+            categorical_features,
+            tuning_params.categorical_encoding,
+        )
+        y_train, y_val = y.iloc[train_index], y.iloc[val_index]
+        fit_rows, stopping_rows = train_test_split(
+            np.arange(len(train_index)),
+            test_size=tuning_params.early_stopping_fraction,
+            random_state=tuning_params.random_state,
+            stratify=y_train,
+        )
+
+        classifier = xgb.XGBClassifier(
+            **hyper_params,
+            n_estimators=n_estimators,
+            early_stopping_rounds=tuning_params.early_stopping_rounds,
+            eval_metric="auc",
+            n_jobs=1,
+            random_state=tuning_params.random_state,
+            **categorical_classifier_params(
+                numeric_features,
+                categorical_features,
+                tuning_params.categorical_encoding,
+            ),
+        )
+        classifier.fit(
+            X_train[fit_rows],
+            y_train.iloc[fit_rows],
+            eval_set=[(X_train[stopping_rows], y_train.iloc[stopping_rows])],
+            verbose=False,
+        )
+
+        fold_scores.append(
+            float(roc_auc_score(y_val, classifier.predict_proba(X_val)[:, 1]))
+        )
+        best_iterations.append(classifier.best_iteration + 1)
+
+    return Trial(
+        hyper_params=hyper_params,
+        n_estimators=n_estimators,
+        fold_scores=fold_scores,
+        best_n_estimators=int(np.median(best_iterations)),
+        fit_time=time.perf_counter() - start,
+        seed=tuning_params.random_state,
+    )
+
+
+def sample_uniformly(
+    search_space: SearchSpace, rng: np.random.Generator
+) -> dict[str, float]:
+    return {
+        name: param_range.from_search_space(rng.uniform(*param_range.bounds))
+        for name, param_range in search_space.items()
+    }
+
+
+class TPESampler:
+    """Tree-structured Parzen Estimator sampler.
+
+    Past trials are split into the best `gamma` fraction and the others.
+    Candidates are drawn around the best trials and the one most likely under
+    the best trials relative to the others is proposed. Each hyper-parameter
+    is modelled independently.
+    """
+
+    def __init__(
+        self,
+        search_space: SearchSpace,
+        n_startup_trials: int = 10,
+        gamma: float = 0.25,
+        n_candidates: int = 24,
+        seed: int | None = None,
+    ) -> None:
+        self._search_space = search_space
+        self._n_startup_trials = n_startup_trials
+        self._gamma = gamma
+        self._n_candidates = n_candidates
+        self._rng = np.random.default_rng(seed)
+
+    def sample(self, trials: list[Trial]) -> dict[str, float]:
+        if len(trials) < self._n_startup_trials:
+            return sample_uniformly(self._search_space, self._rng)
 
-from credit_default_prediction.dataset import LoanApplications
+        ranked_trials = sorted(trials, key=lambda trial: trial.score, reverse=True)
+        n_best = max(1, math.ceil(self._gamma * len(ranked_trials)))
+        best_trials, other_trials = ranked_trials[:n_best], ranked_trials[n_best:]
+
+        candidates = {}
+        log_likelihood_ratio = np.zeros(self._n_candidates)
+        for name, param_range in self._search_space.items():
+            best_values = self._observed(best_trials, name, param_range)
+            other_values = self._observed(other_trials, name, param_range)
+            candidates[name] = self._draw(best_values, param_range)
+            log_likelihood_ratio += self._log_density(
+                candidates[name], best_values, param_range
+            ) - self._log_density(candidates[name], other_values, param_range)
+
+        best_candidate = int(np.argmax(log_likelihood_ratio))
+        return {
+            name: param_range.from_search_space(candidates[name][best_candidate])
+            for name, param_range in self._search_space.items()
+        }
+
+    @staticmethod
+    def _observed(
+        trials: list[Trial], name: str, param_range: ParamRange
+    ) -> np.ndarray:
+        return np.array(
+            [param_range.to_search_space(trial.hyper_params[name]) for trial in trials]
+        )
+
+    @staticmethod
+    def _bandwidth(values: np.ndarray, param_range: ParamRange) -> float:
+        low, high = param_range.bounds
+        return (high - low) / max(1, len(values)) ** 0.2
+
+    def _draw(self, values: np.ndarray, param_range: ParamRange) -> np.ndarray:
+        low, high = param_range.bounds
+        # The prior is a uniform component alongside one kernel per observation
+        components = self._rng.integers(0, len(values) + 1, size=self._n_candidates)
+        uniform_draws = self._rng.uniform(low, high, size=self._n_candidates)
+        kernel_draws = self._rng.normal(
+            np.append(values, 0.0)[components], self._bandwidth(values, param_range)
+        )
+        draws = np.where(components == len(values), uniform_draws, kernel_draws)
+
+        return np.clip(draws, low, high)
+
+    def _log_density(
+        self, x: np.ndarray, values: np.ndarray, param_range: ParamRange
+    ) -> np.ndarray:
+        low, high = param_range.bounds
+        bandwidth = self._bandwidth(values, param_range)
+        kernels = np.exp(-0.5 * ((x[:, None] - values[None, :]) / bandwidth) ** 2) / (
+            bandwidth * math.sqrt(2 * math.pi)
+        )
+        density = (kernels.sum(axis=1) + 1 / (high - low)) / (len(values) + 1)
+
+        return np.log(density)
+
+
+def successive_halving(
+    evaluate: TrialsEvaluator,
+    tuning_params: TuningParams,
+    rng: np.random.Generator,
+    warm_start_trials: list[Trial] | None = None,
+) -> list[Trial]:
+    """Evaluates `n_trials` candidates with few boosting rounds, and only keeps
+    the best `1 / reduction_factor` for the next, bigger budget.
+
+    Candidates are sampled at random, except for the best third of the
+    candidates of `warm_start_trials`, which are tried again.
+    """
+
+    candidates = _best_candidates(
+        warm_start_trials or [], n_candidates=tuning_params.n_trials // 3
+    )
+    candidates += [
+        sample_uniformly(tuning_params.search_space, rng)
+        for _ in range(tuning_params.n_trials - len(candidates))
+    ]
+
+    trials: list[Trial] = []
+    for n_estimators in tuning_params.n_estimators_budgets:
+        rung_trials = evaluate(candidates, n_estimators)
+        trials.extend(rung_trials)
+
+        n_kept = max(1, math.ceil(len(rung_trials) / tuning_params.reduction_factor))
+        ranked_trials = sorted(rung_trials, key=lambda trial: trial.score, reverse=True)
+        candidates = [trial.hyper_params for trial in ranked_trials[:n_kept]]
+
+    return trials
+
+
+def tpe_search(
+    evaluate: TrialsEvaluator,
+    tuning_params: TuningParams,
+    rng: np.random.Generator,
+    warm_start_trials: list[Trial] | None = None,
+) -> list[Trial]:
+    """Evaluates `n_trials` candidates proposed by a TPE sampler, as many at a
+    time as there are parallel workers.
+
+    The sampler also learns from `warm_start_trials`, so that a search can
+    carry on from the trials of earlier searches.
+    """
+
+    sampler = TPESampler(
+        tuning_params.search_space,
+        n_startup_trials=tuning_params.n_startup_trials,
+        seed=int(rng.integers(2**32)),
+    )
+    batch_size = effective_n_jobs(tuning_params.n_jobs)
+
+    trials: list[Trial] = []
+    while len(trials) < tuning_params.n_trials:
+        n_candidates = min(batch_size, tuning_params.n_trials - len(trials))
+        history = (warm_start_trials or []) + trials
+        candidates = [sampler.sample(history) for _ in range(n_candidates)]
+        trials.extend(evaluate(candidates, tuning_params.max_n_estimators))
+
+    return trials
+
+
+def _best_candidates(trials: list[Trial], n_candidates: int) -> list[dict[str, float]]:
+    candidates: list[dict[str, float]] = []
+    for trial in sorted(trials, key=lambda trial: trial.score, reverse=True):
+        if len(candidates) == n_candidates:
+            break
+        if trial.hyper_params not in candidates:
+            candidates.append(trial.hyper_params)
+
+    return candidates
+
+
+def best_trial(trials: list[Trial]) -> Trial:
+    """Best trial among the ones given the biggest budget."""
+
+    max_n_estimators = max(trial.n_estimators for trial in trials)
+    return max(
+        (trial for trial in trials if trial.n_estimators == max_n_estimators),
+        key=lambda trial: trial.score,
+    )
+
+
+def tune(
+    X: pd.DataFrame,
+    y: pd.Series,
+    tuning_params: TuningParams,
+    trial_store: TrialStore | None = None,
+    warm_start: bool = False,
+    memory: joblib.Memory | None = None,
+) -> list[Trial]:
+    """Searches the hyper-parameters maximizing the cross-validated ROC AUC.
+
+    Trials are spread over a pool of `n_jobs` worker processes. With a
+    `trial_store`, every trial is saved as soon as it finishes and trials
+    already in the store are not run again, so that an interrupted search
+    resumes where it stopped. With `warm_start`, the search also starts from
+    every trial stored for the dataset. With a `memory`, the transformed
+    folds are cached and shared by the trials.
+    """
+
+    if tuning_params.strategy not in STRATEGIES:
+        raise ValueError(
+            f"Unknown tuning strategy {tuning_params.strategy!r}. Expected one of {STRATEGIES}."
+        )
+    warm_start_trials = trial_store.trials() if trial_store and warm_start else []
+
+    with Parallel(
+        n_jobs=tuning_params.n_jobs, return_as="generator_unordered"
+    ) as parallel:
+
+        def evaluate(
+            candidates: list[dict[str, float]], n_estimators: int
+        ) -> list[Trial]:
+            trials = []
+            pending_candidates = []
+            for candidate in candidates:
+                stored_trial = (
+                    trial_store.get(trial_key(candidate, n_estimators, tuning_params))
+                    if trial_store
+                    else None
+                )
+                if stored_trial:
+                    trials.append(stored_trial)
+                else:
+                    pending_candidates.append(candidate)
+
+            for trial in parallel(
+                delayed(evaluate_trial)(
+                    X, y, candidate, n_estimators, tuning_params, memory
+                )
+                for candidate in pending_candidates
+            ):
+                if trial_store:
+                    trial_store.add(
+                        trial_key(trial.hyper_params, n_estimators, tuning_params),
+                        trial,
+                    )
+                trials.append(trial)
+
+            return trials
+
+        rng = np.random.default_rng(tuning_params.random_state)
+        if tuning_params.strategy == "tpe":
+            return tpe_search(evaluate, tuning_params, rng, warm_start_trials)
+        return successive_halving(evaluate, tuning_params, rng, warm_start_trials)
 
 
 @click.command(
-    help="Hyper-parameters tuning using training dataset. Prints the best parameters on the standard output."
+    help="Hyper-parameters tuning using training dataset. Writes the best parameters to the `train` section of the params file."
 )
 @click.option("--train-data-path", help="Path to training dataset.")
-def cli(train_data_path: os.PathLike):
-    train_dataset = LoanApplications.from_path(train_data_path)
-
-    params_to_test = {
-        "learning_rate": np.arange(0, 1, 0.1),
-        "max_depth": range(3, 10),
-        "min_child_weight": range(1, 6),
-    }
-    gsearch = GridSearchCV(
-        estimator=xgb.XGBClassifier(
-            learning_rate=0.3,
-            max_depth=5,
-        ),
-        param_grid=params_to_test,
-        scoring="roc_auc",
+@click.option(
+    "--strategy",
+    type=click.Choice(STRATEGIES),
+    default=None,
+    help="Search strategy. Overrides the `tune` params.",
+)
+@click.option(
+    "--n-jobs",
+    type=int,
+    default=None,
+    help="Number of trials run in parallel. Overrides the `tune` params.",
+)
+@click.option(
+    "--trial-store-path",
+    default="tuning_trials.sqlite",
+    show_default=True,
+    help="SQLite file where trials are saved as they finish. Trials already saved for the same training dataset are reused.",
+)
+@click.option(
+    "--warm-start/--no-warm-start",
+    default=False,
+    help="Whether to start the search from the trials of earlier searches on the same training dataset. Only for new searches: an interrupted search run again without it resumes exactly where it stopped.",
+)
+@click.option(
+    "--write-params/--no-write-params",
+    default=True,
+    help="Whether to write the best hyper-parameters to the params file.",
+)
+def cli(
+    train_data_path: os.PathLike,
+    strategy: str | None,
+    n_jobs: int | None,
+    trial_store_path: os.PathLike,
+    warm_start: bool,
+    write_params: bool,
+):
+    train_dataset = load_loan_applications(
+        train_data_path,
+        columns=get_model_features(),
     )
-    gsearch.fit(train_dataset.X, train_dataset.y)
+    tuning_params = TuningParams.from_config()
+    if strategy is not None:
+        tuning_params.strategy = strategy
+    if n_jobs is not None:
+        tuning_params.n_jobs = n_jobs
+
+    trial_store = TrialStore(trial_store_path, fingerprint_file(train_data_path))
+    cache_params = TransformerCacheParams.from_config()
+    memory = transformer_memory(cache_params)
+    try:
+        trials = tune(
+            train_dataset.X,
+            train_dataset.y,
+            tuning_params,
+            trial_store=trial_store,
+            warm_start=warm_start,
+            memory=memory,
+        )
+    finally:
+        trial_store.close()
+        evict_least_recently_used(memory, cache_params)
+    best = best_trial(trials)
+    best_hyper_params = best.to_hyper_params()
 
-    print(gsearch.best_params_, gsearch.best_score_)
+    click.echo(
+        f"Best ROC AUC {best.score:.4f} over {len(trials)} trials: {best_hyper_params}"
+    )
+    if write_params:
+        params.update_stage_params("train", best_hyper_params.to_dict())
@@ -0,0 +1,238 @@
+"""Versioned bundle of a compiled model, fast to load and shared by processes.
+
+A bundle is a directory holding:
+
+- `manifest.json`: the format version, the important features of the params
+  the model was trained on, the layout of its feature matrix, a hash of its
+  input schema and its decision threshold.
+- `booster.ubj`: the XGBoost booster, in its native UBJSON format.
+- `arrays/*.npy`: the fill values and categories of the transformers, as flat
+  NumPy arrays.
+
+Loading a bundle never unpickles a Python object graph: the booster is read by
+XGBoost and the arrays are memory-mapped read-only, so that the scoring
+workers loading the same bundle share their pages.
+
+A bundle is built in a temporary sibling directory, then moved in place of the
+previous one, whose files are removed rather than overwritten: workers never
+see a half-written bundle, and the arrays they mapped keep their content.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import click
+import joblib
+import numpy as np
+import xgboost as xgb
+
+from credit_default_prediction import params
+from credit_default_prediction.compiled_model import CompiledModel, compile_pipeline
+from credit_default_prediction.decision_threshold import (
+    DEFAULT_DECISION_THRESHOLD,
+    load_decision_threshold,
+)
+from credit_default_prediction.feature_engineering import (
+    FeatureEngine,
+    FeatureTransform,
+)
+
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_FILE_NAME = "manifest.json"
+BOOSTER_FILE_NAME = "booster.ubj"
+ARRAYS_DIR_NAME = "arrays"
+
+
+def schema_hash(compiled_model: CompiledModel) -> str:
+    """SHA-256 digest of the columns a compiled model reads, the categories it
+    knows and the transforms it applies to them."""
+
+    schema = {
+        "input_features": compiled_model.input_features,
+        "numeric_features": compiled_model.numeric_features,
+        "categorical_features": compiled_model.categorical_features,
+        "categories": [categories.tolist() for categories in compiled_model.categories],
+        "categorical_encoding": compiled_model.categorical_encoding,
+        "feature_transforms": compiled_model.feature_engine.to_params(),
+    }
+
+    return hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()
+
+
+def save_model_bundle(
+    compiled_model: CompiledModel,
+    bundle_dir: os.PathLike,
+    features: list[str] | None = None,
+):
+    """Saves a compiled model as a bundle directory, replacing the previous
+    bundle atomically.
+
+    Args:
+        compiled_model (CompiledModel): Compiled model to save.
+        bundle_dir (os.PathLike): Directory of the bundle, created when missing.
+        features (list[str] | None): Important features the model was trained
+            on. Defaults to the ones of the params.
+    """
+
+    bundle_dir = Path(bundle_dir)
+    bundle_dir.parent.mkdir(parents=True, exist_ok=True)
+    build_dir = bundle_dir.with_name(f".{bundle_dir.name}.{os.getpid()}.tmp")
+    if build_dir.exists():
+        shutil.rmtree(build_dir)
+    try:
+        write_model_bundle(compiled_model, build_dir, features)
+        replace_directory(build_dir, bundle_dir)
+    finally:
+        if build_dir.exists():
+            shutil.rmtree(build_dir)
+
+
+def write_model_bundle(
+    compiled_model: CompiledModel,
+    bundle_dir: os.PathLike,
+    features: list[str] | None = None,
+):
+    """Writes the files of a bundle into a new directory, the manifest last."""
+
+    arrays_dir = Path(bundle_dir) / ARRAYS_DIR_NAME
+    arrays_dir.mkdir(parents=True)
+
+    compiled_model.booster.save_model(str(Path(bundle_dir) / BOOSTER_FILE_NAME))
+    arrays = {
+        "fill_values": compiled_model.fill_values,
+        "category_offsets": compiled_model.category_offsets,
+    }
+    for index, categories in enumerate(compiled_model.categories):
+        arrays[f"categories_{index}"] = categories
+    for name, array in arrays.items():
+        np.save(arrays_dir / f"{name}.npy", np.ascontiguousarray(array))
+
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "features": features or params.get_important_features(),
+        "schema_hash": schema_hash(compiled_model),
+        "numeric_features": compiled_model.numeric_features,
+        "categorical_features": compiled_model.categorical_features,
+        "feature_transforms": compiled_model.feature_engine.to_params(),
+        "zeros_are_missing": compiled_model.zeros_are_missing,
+        "iteration_range": list(compiled_model.iteration_range),
+        "categorical_encoding": compiled_model.categorical_encoding,
+        "decision_threshold": compiled_model.decision_threshold,
+        "arrays": sorted(arrays),
+    }
+    with open(Path(bundle_dir) / MANIFEST_FILE_NAME, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+
+
+def replace_directory(source_dir: Path, target_dir: Path):
+    """Moves `source_dir` in place of `target_dir`, then removes the previous
+    `target_dir`. Mapped files of the previous directory stay readable until
+    they are unmapped."""
+
+    if not target_dir.exists():
+        os.replace(source_dir, target_dir)
+        return
+
+    previous_dir = source_dir.with_name(f"{source_dir.name}.previous")
+    os.replace(target_dir, previous_dir)
+    os.replace(source_dir, target_dir)
+    shutil.rmtree(previous_dir)
+
+
+def load_bundle_manifest(bundle_dir: os.PathLike) -> dict:
+    with open(Path(bundle_dir) / MANIFEST_FILE_NAME) as manifest_file:
+        manifest = json.load(manifest_file)
+
+    if manifest["format_version"] != BUNDLE_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported model bundle format version {manifest['format_version']} "
+            f"in {bundle_dir}. Expected version {BUNDLE_FORMAT_VERSION}."
+        )
+
+    return manifest
+
+
+def load_model_bundle(
+    bundle_dir: os.PathLike, features: list[str] | None = None
+) -> CompiledModel:
+    """Loads a compiled model from a bundle directory, memory-mapping its arrays.
+
+    Given `features`, checks that the model was trained on these important
+    features.
+    """
+
+    manifest = load_bundle_manifest(bundle_dir)
+    if features is not None and manifest["features"] != features:
+        raise ValueError(
+            f"The model bundle {bundle_dir} was trained on the features "
+            f"{manifest['features']}, not {features}."
+        )
+
+    arrays = {
+        name: np.load(Path(bundle_dir) / ARRAYS_DIR_NAME / f"{name}.npy", mmap_mode="r")
+        for name in manifest["arrays"]
+    }
+    booster = xgb.Booster()
+    booster.load_model(str(Path(bundle_dir) / BOOSTER_FILE_NAME))
+
+    compiled_model = CompiledModel(
+        numeric_features=manifest["numeric_features"],
+        fill_values=arrays["fill_values"],
+        feature_engine=FeatureEngine(
+            [
+                FeatureTransform(**transform)
+                for transform in manifest["feature_transforms"]
+            ]
+        ),
+        categorical_features=manifest["categorical_features"],
+        categories=[
+            arrays[f"categories_{index}"]
+            for index in range(len(manifest["categorical_features"]))
+        ],
+        category_offsets=arrays["category_offsets"],
+        zeros_are_missing=manifest["zeros_are_missing"],
+        iteration_range=tuple(manifest["iteration_range"]),  # type: ignore
+        booster=booster,
+        categorical_encoding=manifest["categorical_encoding"],
+        decision_threshold=manifest.get(
+            "decision_threshold", DEFAULT_DECISION_THRESHOLD
+        ),
+    )
+    if schema_hash(compiled_model) != manifest["schema_hash"]:
+        raise ValueError(
+            f"The schema of the model bundle {bundle_dir} does not match its hash."
+        )
+
+    return compiled_model
+
+
+@click.command(
+    help="Compiles a trained model into a versioned bundle directory, loaded by scoring workers without unpickling the pipeline."
+)
+@click.option("--model-path", help="Path to the trained model.")
+@click.option("--bundle-path", help="Directory where the bundle will be saved.")
+@click.option(
+    "--decision-threshold-path",
+    default=None,
+    help="Path to the decision threshold of the model, saved in the manifest. Defaults to a 0.5 cutoff.",
+)
+def cli(
+    model_path: os.PathLike,
+    bundle_path: os.PathLike,
+    decision_threshold_path: os.PathLike | None,
+):
+    trained_model = joblib.load(model_path)
+    decision_threshold = (
+        load_decision_threshold(decision_threshold_path)
+        if decision_threshold_path
+        else DEFAULT_DECISION_THRESHOLD
+    )
+    save_model_bundle(
+        compile_pipeline(trained_model, decision_threshold=decision_threshold),
+        bundle_path,
+    )
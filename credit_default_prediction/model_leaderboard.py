@@ -0,0 +1,320 @@
+"""Evaluation of many trained models on the same test set."""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import click
+import joblib
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+
+from credit_default_prediction.dataset import MappedLoanApplications
+from credit_default_prediction.decision_threshold import (
+    DEFAULT_DECISION_THRESHOLD,
+    DecisionThresholdParams,
+    load_decision_threshold,
+)
+from credit_default_prediction.evaluation import HoldoutPredictions, evaluate
+from credit_default_prediction.feature_engineering import recorded_feature_engine
+from credit_default_prediction.preprocessing import rule_based_preprocessing
+from credit_default_prediction.storage import read_loan_data, write_loan_data
+
+# Decision threshold looked up next to a model when none is given for it
+DECISION_THRESHOLD_FILE_NAME = "decision_threshold.json"
+LATENCY_MEASURES = [
+    "load_seconds",
+    "scoring_seconds",
+    "rows_per_second",
+    "latency_p50_ms",
+    "latency_p99_ms",
+]
+# Ranking keys for which the smallest value ranks first
+LOWER_IS_BETTER = {
+    "expected_loss",
+    "load_seconds",
+    "scoring_seconds",
+    "latency_p50_ms",
+    "latency_p99_ms",
+}
+
+
+@dataclass
+class ModelReport:
+    model_path: str
+    threshold: float
+    metrics: dict[str, float]
+    load_seconds: float
+    scoring_seconds: float
+    rows_per_second: float
+    latency_p50_ms: float
+    latency_p99_ms: float
+
+    def value(self, key: str) -> float:
+        """Metric of the evaluation, or latency measure, named `key`."""
+
+        if key in self.metrics:
+            return self.metrics[key]
+        if key in LATENCY_MEASURES:
+            return getattr(self, key)
+        raise KeyError(
+            f"Unknown ranking key {key!r}. Expected one of "
+            f"{list(self.metrics) + LATENCY_MEASURES}."
+        )
+
+
+def prepare_test_set(test_dataset_path: os.PathLike, prepared_test_path: os.PathLike):
+    """Applies the preprocessing rules to the test set, once for every model,
+    and saves it as an Arrow IPC file to be memory-mapped by the workers.
+
+    Features are engineered by the workers, as each model may have been
+    trained with different transforms.
+    """
+
+    test_data = read_loan_data(test_dataset_path)
+    write_loan_data(rule_based_preprocessing(test_data), prepared_test_path)
+
+
+def evaluate_model_artifact(
+    model_path: os.PathLike,
+    prepared_test_path: os.PathLike,
+    threshold: float = DEFAULT_DECISION_THRESHOLD,
+    threshold_params: DecisionThresholdParams | None = None,
+    latency_samples: int = 100,
+    n_threads: int | None = None,
+) -> ModelReport:
+    """Scores the prepared test set with the model saved at `model_path`.
+
+    The test set is memory-mapped, so that the workers evaluating models in
+    parallel share its pages instead of each holding a copy, and its features
+    are engineered with the transforms the model records. Besides the
+    `evaluate` metrics, reports the time to load the model, to score the
+    whole test set, and the median and 99th percentile latencies of scoring
+    a single application, over the first `latency_samples` applications.
+    """
+
+    start = time.perf_counter()
+    model = joblib.load(model_path)
+    load_seconds = time.perf_counter() - start
+    if n_threads:
+        model.named_steps["classifier"].set_params(n_jobs=n_threads)
+
+    feature_engine = recorded_feature_engine(model)
+    if feature_engine is None:
+        raise ValueError(
+            f"The model {model_path} does not record the feature transforms it "
+            "was trained with. Train it again to evaluate it."
+        )
+
+    test_dataset = MappedLoanApplications.from_path(prepared_test_path)
+    X_test = feature_engine.transform(test_dataset.X)
+
+    start = time.perf_counter()
+    y_score = model.predict_proba(X_test)[:, 1]
+    scoring_seconds = time.perf_counter() - start
+
+    latencies = []
+    for index in range(min(latency_samples, len(X_test))):
+        application = X_test.iloc[[index]]
+        start = time.perf_counter()
+        model.predict_proba(application)
+        latencies.append(time.perf_counter() - start)
+
+    predictions = HoldoutPredictions(
+        y_true=test_dataset.y.to_numpy(), y_score=y_score, threshold=threshold
+    )
+    latency_p50, latency_p99 = (
+        np.percentile(latencies, [50, 99]) if latencies else (np.nan, np.nan)
+    )
+
+    return ModelReport(
+        model_path=str(model_path),
+        threshold=threshold,
+        metrics=evaluate(predictions, threshold_params),
+        load_seconds=load_seconds,
+        scoring_seconds=scoring_seconds,
+        rows_per_second=(
+            len(X_test) / scoring_seconds if scoring_seconds else float("inf")
+        ),
+        latency_p50_ms=float(latency_p50 * 1e3),
+        latency_p99_ms=float(latency_p99 * 1e3),
+    )
+
+
+def model_decision_threshold(model_path: os.PathLike | str) -> float:
+    """Decision threshold saved next to a model by the `cross_validation`
+    stage, or the default cutoff when there is none."""
+
+    decision_threshold_path = Path(model_path).parent / DECISION_THRESHOLD_FILE_NAME
+    if not decision_threshold_path.exists():
+        return DEFAULT_DECISION_THRESHOLD
+    return load_decision_threshold(decision_threshold_path)
+
+
+def rank_models(
+    reports: list[ModelReport], rank_by: str = "ROC_AUC"
+) -> list[ModelReport]:
+    """Sorts the reports from the best to the worst `rank_by` value."""
+
+    return sorted(
+        reports,
+        key=lambda report: report.value(rank_by),
+        reverse=rank_by not in LOWER_IS_BETTER,
+    )
+
+
+def build_leaderboard(
+    model_paths: Sequence[os.PathLike | str],
+    test_dataset_path: os.PathLike,
+    thresholds: Sequence[float] | None = None,
+    threshold_params: DecisionThresholdParams | None = None,
+    rank_by: str = "ROC_AUC",
+    latency_samples: int = 100,
+    n_jobs: int | None = None,
+) -> list[ModelReport]:
+    """Evaluates every model on the test set, ranked by `rank_by`.
+
+    Each model is evaluated at its own decision threshold, in the order of
+    `thresholds`, or at the default cutoff when no thresholds are given.
+
+    The test set is read and filtered by the preprocessing rules once, then
+    the models are loaded and scored, with their own feature transforms, in a
+    pool of `n_jobs` worker processes, the cores being shared
+    between the XGBoost threads of the workers.
+    """
+
+    if thresholds is None:
+        thresholds = [DEFAULT_DECISION_THRESHOLD] * len(model_paths)
+    if len(thresholds) != len(model_paths):
+        raise ValueError(
+            f"Got {len(thresholds)} decision thresholds for {len(model_paths)} "
+            "models. Give one threshold per model."
+        )
+
+    n_workers = min(effective_n_jobs(n_jobs), len(model_paths))
+    n_threads = max(1, (os.cpu_count() or 1) // n_workers)
+
+    with tempfile.TemporaryDirectory() as prepared_test_dir:
+        prepared_test_path = Path(prepared_test_dir) / "test.arrow"
+        prepare_test_set(test_dataset_path, prepared_test_path)
+
+        reports = Parallel(n_jobs=n_workers, return_as="generator_unordered")(
+            delayed(evaluate_model_artifact)(
+                model_path,
+                prepared_test_path,
+                threshold,
+                threshold_params,
+                latency_samples,
+                n_threads,
+            )
+            for model_path, threshold in zip(model_paths, thresholds)
+        )
+        return rank_models(list(reports), rank_by)
+
+
+def format_leaderboard(reports: list[ModelReport], rank_by: str = "ROC_AUC") -> str:
+    lines = [
+        f"{'rank':<6}{'model':<40}{rank_by:>14}{'ROC AUC':>9}{'cutoff':>9}"
+        f"{'load s':>9}"
+        f"{'score s':>9}{'rows/s':>12}{'p50 ms':>9}{'p99 ms':>9}"
+    ]
+    for rank, report in enumerate(reports, start=1):
+        lines.append(
+            f"{rank:<6}{report.model_path:<40}{report.value(rank_by):>14.4f}"
+            f"{report.metrics['ROC_AUC']:>9.4f}{report.threshold:>9.3f}"
+            f"{report.load_seconds:>9.3f}"
+            f"{report.scoring_seconds:>9.3f}{report.rows_per_second:>12,.0f}"
+            f"{report.latency_p50_ms:>9.2f}{report.latency_p99_ms:>9.2f}"
+        )
+
+    return "\n".join(lines)
+
+
+@click.command(
+    help="Evaluates many trained models on the same test data and ranks them in a leaderboard."
+)
+@click.option(
+    "--model-path",
+    "model_paths",
+    multiple=True,
+    required=True,
+    help="Path to a trained model. Can be repeated.",
+)
+@click.option("--test-dataset-path", help="Path to the test data.")
+@click.option(
+    "--decision-threshold-path",
+    "decision_threshold_paths",
+    multiple=True,
+    help=f"Path to the decision threshold of a model, repeated once per model in the order of --model-path. Defaults to the {DECISION_THRESHOLD_FILE_NAME} next to each model, or a 0.5 cutoff.",
+)
+@click.option(
+    "--rank-by",
+    default="ROC_AUC",
+    show_default=True,
+    help="Metric of `evaluate` or latency measure the models are ranked by.",
+)
+@click.option(
+    "--latency-samples",
+    type=int,
+    default=100,
+    show_default=True,
+    help="Number of applications scored one at a time to measure the latency.",
+)
+@click.option(
+    "--n-jobs",
+    type=int,
+    default=-1,
+    show_default=True,
+    help="Number of worker processes, -1 for one per core.",
+)
+@click.option(
+    "--leaderboard-path",
+    default=None,
+    help="Path of a JSON file where the leaderboard will be saved.",
+)
+def cli(
+    model_paths: tuple[str, ...],
+    test_dataset_path: os.PathLike,
+    decision_threshold_paths: tuple[str, ...],
+    rank_by: str,
+    latency_samples: int,
+    n_jobs: int,
+    leaderboard_path: os.PathLike | None,
+):
+    if decision_threshold_paths and len(decision_threshold_paths) != len(model_paths):
+        raise click.UsageError(
+            "Give one --decision-threshold-path per --model-path, or none."
+        )
+
+    thresholds = (
+        [load_decision_threshold(Path(path)) for path in decision_threshold_paths]
+        if decision_threshold_paths
+        else [model_decision_threshold(model_path) for model_path in model_paths]
+    )
+    reports = build_leaderboard(
+        model_paths,
+        test_dataset_path,
+        thresholds=thresholds,
+        threshold_params=DecisionThresholdParams.from_config(),
+        rank_by=rank_by,
+        latency_samples=latency_samples,
+        n_jobs=n_jobs,
+    )
+    click.echo(format_leaderboard(reports, rank_by))
+
+    if leaderboard_path:
+        with open(leaderboard_path, "w") as leaderboard_file:
+            json.dump(
+                [
+                    {"rank": rank, **asdict(report)}
+                    for rank, report in enumerate(reports, start=1)
+                ],
+                leaderboard_file,
+                indent=4,
+            )
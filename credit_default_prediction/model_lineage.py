@@ -0,0 +1,77 @@
+"""Lineage of a model trained in several increments."""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sklearn.pipeline import Pipeline
+
+from credit_default_prediction.storage import fingerprint_file
+
+
+@dataclass
+class LineageEntry:
+    """Training run of a model.
+
+    A `full` run trains the model from scratch, an `incremental` run
+    continues boosting the model saved at `base_model_path` on new loan
+    applications only.
+    """
+
+    mode: str
+    dataset_path: str
+    dataset_fingerprint: str
+    n_rows: int
+    boosted_rounds: int
+    total_boosted_rounds: int
+    base_model_fingerprint: str | None
+    trained_at: str
+
+
+def lineage_entry(
+    model: Pipeline,
+    dataset_path: os.PathLike,
+    n_rows: int,
+    base_model_path: os.PathLike | None = None,
+    base_boosted_rounds: int = 0,
+) -> LineageEntry:
+    total_boosted_rounds = (
+        model.named_steps["classifier"].get_booster().num_boosted_rounds()
+    )
+
+    return LineageEntry(
+        mode="incremental" if base_model_path else "full",
+        dataset_path=str(dataset_path),
+        dataset_fingerprint=fingerprint_file(dataset_path),
+        n_rows=n_rows,
+        boosted_rounds=total_boosted_rounds - base_boosted_rounds,
+        total_boosted_rounds=total_boosted_rounds,
+        base_model_fingerprint=(
+            fingerprint_file(base_model_path) if base_model_path else None
+        ),
+        trained_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    )
+
+
+def load_lineage(lineage_path: os.PathLike) -> list[LineageEntry]:
+    if not Path(lineage_path).exists():
+        return []
+
+    with open(lineage_path) as lineage_file:
+        return [LineageEntry(**entry) for entry in json.load(lineage_file)]
+
+
+def record_lineage(lineage_path: os.PathLike, entry: LineageEntry):
+    """Appends `entry` to the lineage. A full run starts a new lineage."""
+
+    lineage = load_lineage(lineage_path) if entry.mode == "incremental" else []
+    with open(lineage_path, "w") as lineage_file:
+        json.dump(
+            [asdict(lineage_entry) for lineage_entry in [*lineage, entry]],
+            lineage_file,
+            indent=4,
+        )
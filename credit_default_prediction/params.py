@@ -1,29 +1,178 @@
+"""Pipeline parameters, read from the params file.
+
+The params file is parsed once and cached until it changes on disk. Any
+parameter can be overridden without rewriting the file, either with
+`SECTION.KEY=VALUE` overrides (`credit_default_prediction --set`) or with
+`CDP_PARAMS__SECTION__KEY=VALUE` environment variables. Override values are
+parsed as YAML, and command line overrides win over environment variables.
+Overrides may only set the parameters of the file, the optional parameters
+of a stage and the keys of open sections, so that a misspelled key fails
+right away.
+"""
+
+from __future__ import annotations
+
+import copy
+import os
+from collections.abc import Iterable
 from pathlib import Path
+from typing import Any
 
 import yaml
 
 PARAMS_FILE_PATH = Path(__file__).parent.parent / "params.yaml"
+ENV_OVERRIDE_PREFIX = "CDP_PARAMS__"
+
+ParamOverride = tuple[tuple[str, ...], Any]
+
+# Parameters read with a default by their stage, which may be overridden
+# without being in the params file
+OPTIONAL_PARAMS: dict[tuple[str, ...], set[str]] = {
+    ("train",): {"max_depth", "min_child_weight", "n_estimators"},
+    ("split",): {"strategy", "key_columns"},
+    ("incremental_training",): {"learning_rate"},
+}
+# Sections whose keys, and the keys of their subsections, are chosen by the user
+OPEN_SECTIONS = {("tune", "search_space")}
+
+# Parsed params file by path, along with the modification time and size it was parsed at
+_params_file_cache: dict[Path, tuple[tuple[int, int], dict]] = {}
+_overrides: list[ParamOverride] = []
+
+
+def _read_params_file() -> dict:
+    """Parsed params file, parsed again only when the file changed."""
+
+    params_file_path = Path(PARAMS_FILE_PATH)
+    file_stat = params_file_path.stat()
+    signature = (file_stat.st_mtime_ns, file_stat.st_size)
+
+    cached = _params_file_cache.get(params_file_path)
+    if cached is None or cached[0] != signature:
+        with open(params_file_path) as params_file:
+            cached = (signature, yaml.safe_load(params_file))
+        _params_file_cache[params_file_path] = cached
+
+    return cached[1]
+
+
+def parse_override(override: str) -> ParamOverride:
+    """Parses a `SECTION.KEY=VALUE` override, VALUE being YAML."""
+
+    name, separator, value = override.partition("=")
+    if not separator or "." not in name:
+        raise ValueError(
+            f"Invalid params override {override!r}, expected SECTION.KEY=VALUE."
+        )
+
+    return tuple(name.strip().split(".")), yaml.safe_load(value)
+
+
+def _env_overrides() -> list[ParamOverride]:
+    return [
+        (
+            tuple(name.removeprefix(ENV_OVERRIDE_PREFIX).lower().split("__")),
+            yaml.safe_load(value),
+        )
+        for name, value in sorted(os.environ.items())
+        if name.startswith(ENV_OVERRIDE_PREFIX)
+    ]
+
+
+def set_overrides(overrides: Iterable[str]):
+    """Overrides parameters for the rest of the process."""
+
+    _overrides.extend(parse_override(override) for override in overrides)
+
+
+def clear_overrides():
+    _overrides.clear()
+
+
+def _apply_override(pipeline_params: dict, override: ParamOverride):
+    keys, value = override
+    if keys[0] not in pipeline_params:
+        raise ValueError(
+            f"Cannot override {'.'.join(keys)}: there is no {keys[0]!r} section "
+            f"in {PARAMS_FILE_PATH}."
+        )
+
+    section = pipeline_params
+    for depth, key in enumerate(keys):
+        section_keys = keys[:depth]
+        if not isinstance(section, dict):
+            raise ValueError(
+                f"Cannot override {'.'.join(keys)}: {'.'.join(section_keys)} is "
+                "not a section."
+            )
+        optional_keys = OPTIONAL_PARAMS.get(section_keys, set())
+        if (
+            key not in section
+            and key not in optional_keys
+            and not any(
+                section_keys[: len(open_section)] == open_section
+                for open_section in OPEN_SECTIONS
+            )
+        ):
+            raise ValueError(
+                f"Cannot override {'.'.join(keys)}: there is no {key!r} parameter "
+                f"in the {'.'.join(section_keys)} section. Expected one of "
+                f"{sorted(set(section) | optional_keys)}."
+            )
+        if depth < len(keys) - 1:
+            section = section.setdefault(key, {})
+    section[keys[-1]] = value
 
 
 def _load_pipeline_params() -> dict:
-    with open(PARAMS_FILE_PATH) as params_file:
-        pipeline_params = yaml.safe_load(params_file)
+    # Copied so that callers and overrides never modify the cached params
+    pipeline_params = copy.deepcopy(_read_params_file())
+    for override in _env_overrides() + _overrides:
+        _apply_override(pipeline_params, override)
 
     return pipeline_params
 
 
 def load_stage_params(stage_name: str) -> dict:
     pipeline_params = _load_pipeline_params()
+    if stage_name not in pipeline_params:
+        raise KeyError(
+            f"No {stage_name!r} section in {PARAMS_FILE_PATH}. "
+            f"Available sections: {list(pipeline_params)}."
+        )
+
     return pipeline_params[stage_name]
 
 
 def get_hyperparameters() -> dict[str, float]:
-    with open(PARAMS_FILE_PATH) as params_file:
-        params = yaml.safe_load(params_file)
-
-    return params["train"]
+    return load_stage_params("train")
 
 
 def get_important_features() -> list[str]:
     feature_engineering_params = load_stage_params("feature_engineering")
     return feature_engineering_params["important_columns"]
+
+
+class _ParamsDumper(yaml.SafeDumper):
+    """Indents lists under their key, as in the hand-written params file."""
+
+    def increase_indent(self, flow=False, indentless=False):
+        return super().increase_indent(flow, False)
+
+
+def update_stage_params(stage_name: str, stage_params: dict):
+    """Overwrites the parameters of `stage_name` in the params file,
+    keeping the other stages and their order untouched. Overrides are not
+    written to the file."""
+
+    pipeline_params = copy.deepcopy(_read_params_file())
+    pipeline_params[stage_name] = stage_params
+
+    with open(PARAMS_FILE_PATH, "w") as params_file:
+        params_file.write(
+            "\n".join(
+                yaml.dump({name: section}, Dumper=_ParamsDumper, sort_keys=False)
+                for name, section in pipeline_params.items()
+            )
+        )
+    _params_file_cache.pop(Path(PARAMS_FILE_PATH), None)
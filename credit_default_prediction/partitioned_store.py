@@ -0,0 +1,257 @@
+"""Partitioned stores of transformed loan applications, updated incrementally.
+
+A store is a directory of Parquet partitions, each holding the transformed
+rows of a fixed block of input rows, and of a `_manifest.json` file recording
+the fingerprint of every partition. The fingerprint of a partition combines
+the row hashes of its input block with the source code and parameters of the
+transform, so that rerunning a stage only transforms the blocks whose rows
+changed, or every block when the transform changed, and reuses the other
+partitions as they are.
+
+Appending loan applications to the input only changes its last blocks: the
+update then costs time proportional to the appended rows, plus reading and
+hashing the input. A store is itself an input of the next stage, whose
+partitions follow the ones of the store, without reading the reused ones.
+
+The directory reads as a single dataset made of the partitions listed in the
+manifest (see `storage`). An update writes new partitions under new file
+names, then replaces the manifest atomically, and only then removes the
+partitions it no longer lists: readers see either the old or the new
+partitions, never both, even when the update is interrupted.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+from credit_default_prediction import tracing
+from credit_default_prediction.storage import (
+    MANIFEST_FILE_NAME,
+    fingerprint_file,
+    iter_loan_data_chunks,
+    read_loan_data,
+    write_loan_data,
+)
+from credit_default_prediction.streaming import LoanDataTransform, peak_rss_bytes
+
+
+@dataclass
+class Partition:
+    """Transformed rows of a block of input rows, saved in `file_name`."""
+
+    file_name: str
+    # Fingerprint of the input block and of the transform
+    fingerprint: str
+    rows_read: int
+    rows_written: int
+
+
+@dataclass
+class InputPartition:
+    """Block of input rows, only loaded when it has to be transformed."""
+
+    fingerprint: str
+    rows: int
+    load: Callable[[], pd.DataFrame]
+
+
+@dataclass
+class PartitionUpdateStats:
+    reused_partitions: int
+    transformed_partitions: int
+    removed_partitions: int
+    rows_read: int
+    rows_transformed: int
+    elapsed_seconds: float
+    peak_rss_bytes: int
+
+    def report(self) -> str:
+        return (
+            f"Transformed {self.transformed_partitions} partitions "
+            f"({self.rows_transformed} of {self.rows_read} rows), "
+            f"reused {self.reused_partitions}, removed {self.removed_partitions} "
+            f"in {self.elapsed_seconds:.2f}s, "
+            f"peak RSS {self.peak_rss_bytes / 2**20:.1f} MiB"
+        )
+
+
+def fingerprint_loan_data(loan_data: pd.DataFrame) -> str:
+    """SHA-256 digest of the row hashes and column names of `loan_data`.
+
+    The row hashes only depend on the values of each row, not on the index.
+    """
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps(loan_data.columns.to_list()).encode())
+    digest.update(
+        pd.util.hash_pandas_object(loan_data, index=False).to_numpy().tobytes()
+    )
+
+    return digest.hexdigest()
+
+
+def fingerprint_transform(
+    transform: LoanDataTransform, transform_params: object = None
+) -> str:
+    """SHA-256 digest of the name of `transform`, of the source file of its
+    module, which changes with the transform and the helpers it calls, and of
+    the parameters it reads."""
+
+    digest = hashlib.sha256()
+    digest.update(f"{transform.__module__}.{transform.__qualname__}".encode())
+    digest.update(json.dumps(transform_params, sort_keys=True).encode())
+    digest.update(fingerprint_file(Path(inspect.getfile(transform))).encode())
+
+    return digest.hexdigest()
+
+
+def load_manifest(store_dir: os.PathLike) -> list[Partition]:
+    manifest_path = Path(store_dir) / MANIFEST_FILE_NAME
+    if not manifest_path.exists():
+        return []
+
+    with open(manifest_path) as manifest_file:
+        return [Partition(**partition) for partition in json.load(manifest_file)]
+
+
+def save_manifest(store_dir: os.PathLike, partitions: list[Partition]):
+    """Replaces the manifest of a store atomically, writing it to a temporary
+    file first."""
+
+    manifest_path = Path(store_dir) / MANIFEST_FILE_NAME
+    temporary_path = manifest_path.with_name(f"{MANIFEST_FILE_NAME}.tmp")
+    with open(temporary_path, "w") as manifest_file:
+        json.dump(
+            [asdict(partition) for partition in partitions], manifest_file, indent=4
+        )
+    os.replace(temporary_path, manifest_path)
+
+
+def file_partitions(
+    dataset_path: os.PathLike, partition_size: int
+) -> Iterator[InputPartition]:
+    """Blocks of `partition_size` rows of a loan applications dataset."""
+
+    for chunk in iter_loan_data_chunks(dataset_path, partition_size):
+        yield InputPartition(
+            fingerprint=fingerprint_loan_data(chunk),
+            rows=len(chunk),
+            load=partial(chunk.copy, deep=False),
+        )
+
+
+def store_partitions(store_dir: os.PathLike) -> Iterator[InputPartition]:
+    """Partitions of a store, read from their file when loaded."""
+
+    for partition in load_manifest(store_dir):
+        yield InputPartition(
+            fingerprint=partition.fingerprint,
+            rows=partition.rows_written,
+            load=partial(read_loan_data, Path(store_dir) / partition.file_name),
+        )
+
+
+def input_partitions(
+    input_path: os.PathLike, partition_size: int
+) -> Iterator[InputPartition]:
+    """Partitions of a store directory, or blocks of rows of a dataset file."""
+
+    if (Path(input_path) / MANIFEST_FILE_NAME).exists():
+        return store_partitions(input_path)
+    return file_partitions(input_path, partition_size)
+
+
+def update_partitioned_store(
+    input_path: os.PathLike,
+    store_dir: os.PathLike,
+    transform: LoanDataTransform,
+    partition_size: int,
+    transform_params: object = None,
+) -> PartitionUpdateStats:
+    """Applies `transform` to the partitions of `input_path` whose fingerprint
+    is not in the store yet, and removes the partitions left over.
+
+    Args:
+        input_path (os.PathLike): Input dataset file, read in blocks of
+            `partition_size` rows, or store, whose partitions are kept as they are.
+        store_dir (os.PathLike): Directory of the output store, created when missing.
+        transform (LoanDataTransform): Row-wise transformation to apply, such as
+            `rule_based_preprocessing` or `engineer_features`.
+        partition_size (int): Number of input rows per partition.
+        transform_params (object): JSON-serializable parameters the transform
+            reads, changing them transforms every partition again.
+
+    Returns:
+        PartitionUpdateStats: Reused and transformed partitions and rows.
+    """
+
+    start = time.perf_counter()
+    Path(store_dir).mkdir(parents=True, exist_ok=True)
+    stored_partitions = {
+        partition.fingerprint: partition for partition in load_manifest(store_dir)
+    }
+    transform_fingerprint = fingerprint_transform(transform, transform_params)
+
+    partitions = []
+    reused_partitions = rows_read = rows_transformed = 0
+    for index, input_partition in enumerate(
+        input_partitions(input_path, partition_size)
+    ):
+        fingerprint = hashlib.sha256(
+            f"{transform_fingerprint}{input_partition.fingerprint}".encode()
+        ).hexdigest()
+        # The fingerprint is part of the file name, so that a partition is
+        # never overwritten by the transformed rows of another input block
+        file_name = f"part-{index:05d}-{fingerprint[:16]}.parquet"
+        rows_read += input_partition.rows
+
+        stored_partition = stored_partitions.get(fingerprint)
+        if (
+            stored_partition is not None
+            and stored_partition.file_name == file_name
+            and (Path(store_dir) / file_name).exists()
+        ):
+            partitions.append(stored_partition)
+            reused_partitions += 1
+            continue
+
+        with tracing.span("partitioned_store.transform", rows=input_partition.rows):
+            transformed_partition = transform(input_partition.load())
+        write_loan_data(transformed_partition, Path(store_dir) / file_name)
+        partitions.append(
+            Partition(
+                file_name=file_name,
+                fingerprint=fingerprint,
+                rows_read=input_partition.rows,
+                rows_written=len(transformed_partition),
+            )
+        )
+        rows_transformed += input_partition.rows
+
+    save_manifest(store_dir, partitions)
+    kept_file_names = {partition.file_name for partition in partitions}
+    removed_partitions = 0
+    for partition_path in Path(store_dir).glob("part-*.parquet"):
+        if partition_path.name not in kept_file_names:
+            partition_path.unlink()
+            removed_partitions += 1
+
+    return PartitionUpdateStats(
+        reused_partitions=reused_partitions,
+        transformed_partitions=len(partitions) - reused_partitions,
+        removed_partitions=removed_partitions,
+        rows_read=rows_read,
+        rows_transformed=rows_transformed,
+        elapsed_seconds=time.perf_counter() - start,
+        peak_rss_bytes=peak_rss_bytes(),
+    )
@@ -0,0 +1,371 @@
+"""In-process runner of the training pipeline.
+
+The DVC stages each run in their own process, importing pandas, scikit-learn
+and XGBoost again and reading back the files written by the previous stage.
+This runner executes the same stages as a DAG in a single process: stages
+pass their DataFrames and models in memory, stages whose inputs are ready run
+concurrently on a pool of threads, and only the artifacts tracked by DVC are
+written to disk. As in `dvc.yaml`, the preprocessed data and the feature store
+are partitioned stores, updated incrementally, and the model is trained on the
+feature store read back from disk.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any
+
+import click
+from dvclive.live import Live
+from sklearn.base import clone
+
+from credit_default_prediction import inference, params, tracing
+from credit_default_prediction.compiled_model import compile_pipeline
+from credit_default_prediction.cross_validation import (
+    CrossValidationParams,
+    cross_validate_model,
+)
+from credit_default_prediction.dataset import LoanApplications
+from credit_default_prediction.decision_threshold import (
+    DecisionThresholdParams,
+    save_decision_threshold,
+    select_decision_threshold,
+)
+from credit_default_prediction.evaluation import HoldoutPredictions, evaluate, log_plots
+from credit_default_prediction.experiment_tracking.dvc_experiment_tracker import (
+    DVCExperimentTracker,
+)
+from credit_default_prediction.feature_engineering import (
+    FeatureEngine,
+    engineer_features,
+    get_model_features,
+)
+from credit_default_prediction.hyper_params import HyperParams
+from credit_default_prediction.model_bundle import save_model_bundle
+from credit_default_prediction.partitioned_store import update_partitioned_store
+from credit_default_prediction.preprocessing import rule_based_preprocessing
+from credit_default_prediction.split import SplitParams, split_data
+from credit_default_prediction.storage import read_loan_data
+from credit_default_prediction.training import save_model_artifact, train_from_config
+from credit_default_prediction.transformer_cache import (
+    TransformerCacheParams,
+    evict_least_recently_used,
+    transformer_memory,
+)
+
+# Number of input rows per partition of the stores, as in `dvc.yaml`
+PARTITION_SIZE = 100_000
+
+
+@dataclass
+class Stage:
+    """Step of the pipeline, computing its `outputs` from its `inputs`.
+
+    `run` is called with the inputs as keyword arguments and returns a
+    dictionary of the outputs.
+    """
+
+    name: str
+    run: Callable[..., dict[str, Any]]
+    inputs: list[str]
+    outputs: list[str]
+
+
+@dataclass
+class StageTiming:
+    name: str
+    started_at: float
+    elapsed_seconds: float
+
+
+def run_dag(
+    stages: list[Stage],
+    artifacts: dict[str, Any] | None = None,
+    max_workers: int | None = None,
+) -> tuple[dict[str, Any], list[StageTiming]]:
+    """Runs stages as soon as their inputs are available.
+
+    Independent stages run concurrently on `max_workers` threads. The first
+    stage failing stops the run: no stage is started after it and its
+    exception is raised once the running stages are done.
+
+    Returns:
+        tuple[dict[str, Any], list[StageTiming]]: Every artifact, by name, and
+            the timing of each stage relative to the start of the run.
+    """
+
+    artifacts = dict(artifacts or {})
+    producers = {output: stage.name for stage in stages for output in stage.outputs}
+    for stage in stages:
+        missing_inputs = [
+            name
+            for name in stage.inputs
+            if name not in producers and name not in artifacts
+        ]
+        if missing_inputs:
+            raise ValueError(
+                f"Stage {stage.name!r} needs {missing_inputs}, which no stage produces."
+            )
+
+    start = time.perf_counter()
+    timings = []
+    pending_stages = list(stages)
+    running: dict[Future, tuple[Stage, float]] = {}
+
+    def run_stage(stage: Stage) -> dict[str, Any]:
+        with tracing.span(f"stage/{stage.name}"):
+            return stage.run(**{name: artifacts[name] for name in stage.inputs})
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending_stages or running:
+            ready_stages = [
+                stage
+                for stage in pending_stages
+                if all(name in artifacts for name in stage.inputs)
+            ]
+            for stage in ready_stages:
+                pending_stages.remove(stage)
+                running[executor.submit(run_stage, stage)] = (
+                    stage,
+                    time.perf_counter() - start,
+                )
+            if not running:
+                raise ValueError(
+                    f"Stages {[stage.name for stage in pending_stages]} depend on each other."
+                )
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, started_at = running.pop(future)
+                if future.exception() is not None:
+                    pending_stages.clear()
+                    wait(running)
+                    raise future.exception()  # type: ignore
+                artifacts.update(future.result())
+                timings.append(
+                    StageTiming(
+                        name=stage.name,
+                        started_at=started_at,
+                        elapsed_seconds=time.perf_counter() - start - started_at,
+                    )
+                )
+
+    return artifacts, timings
+
+
+@dataclass
+class PipelinePaths:
+    """Files and partitioned stores tracked by DVC, at the paths of `dvc.yaml`."""
+
+    raw_data_path: str = "data/raw/cr_loan2.csv"
+    train_data_path: str = "data/raw/train.csv"
+    test_data_path: str = "data/raw/test.csv"
+    preprocessed_data_path: str = "data/clean/train"
+    feature_store_path: str = "data/feature_store/train"
+    model_path: str = "model.pkl"
+    decision_threshold_path: str = "decision_threshold.json"
+    compiled_model_path: str = "model.npz"
+    bundle_path: str = "model_bundle"
+
+
+def build_training_pipeline(paths: PipelinePaths) -> list[Stage]:
+    """Stages of `dvc.yaml`, from the raw loan applications to the evaluation
+    of the model. The test set is prepared while the model is trained and
+    cross-validated, the decision threshold being selected on the folds, then
+    the model is compiled and bundled while it is evaluated."""
+
+    important_features = params.get_important_features()
+    model_features = get_model_features()
+
+    def split(raw_loan_data):
+        training_dataset, test_dataset = split_data(
+            raw_loan_data, SplitParams.from_config()
+        )
+        training_dataset.save(paths.train_data_path)
+        test_dataset.save(paths.test_data_path)
+
+        return {
+            "raw_train_data_path": paths.train_data_path,
+            "raw_test_data": test_dataset.data.reset_index(drop=True),
+        }
+
+    def preprocess(raw_train_data_path):
+        update_partitioned_store(
+            raw_train_data_path,
+            paths.preprocessed_data_path,
+            rule_based_preprocessing,
+            partition_size=PARTITION_SIZE,
+        )
+
+        return {"preprocessed_data_path": paths.preprocessed_data_path}
+
+    def feature_engineering(preprocessed_data_path):
+        update_partitioned_store(
+            preprocessed_data_path,
+            paths.feature_store_path,
+            engineer_features,
+            partition_size=PARTITION_SIZE,
+            transform_params=FeatureEngine.from_config().to_params(),
+        )
+        feature_store = read_loan_data(paths.feature_store_path, columns=model_features)
+
+        return {"train_dataset": LoanApplications.from_dataframe(feature_store)}
+
+    def prepare_test_set(raw_test_data):
+        prepared_test_data = inference.rule_based_preparation(
+            raw_test_data[important_features]
+        )
+
+        return {"test_dataset": LoanApplications.from_dataframe(prepared_test_data)}
+
+    def train(train_dataset):
+        model = train_from_config(train_dataset.X, train_dataset.y)
+        save_model_artifact(model, paths.model_path)
+
+        return {"model": model}
+
+    def compile_model(model, decision_threshold):
+        compiled_model = compile_pipeline(model, decision_threshold=decision_threshold)
+        compiled_model.save(paths.compiled_model_path)
+
+        return {"compiled_model": compiled_model}
+
+    def bundle_model(compiled_model):
+        save_model_bundle(compiled_model, paths.bundle_path)
+
+        return {}
+
+    def cross_validation(model, train_dataset):
+        cache_params = TransformerCacheParams.from_config()
+        memory = transformer_memory(cache_params)
+        # The folds are fitted on clones, the trained model stays untouched
+        cv_results = cross_validate_model(
+            clone(model).set_params(memory=memory),
+            train_dataset.X,
+            train_dataset.y,
+            CrossValidationParams.from_config(),
+            out_of_fold=True,
+        )
+        evict_least_recently_used(memory, cache_params)
+
+        threshold_params = DecisionThresholdParams.from_config()
+        decision_threshold = select_decision_threshold(
+            train_dataset.y.to_numpy(),
+            cv_results.out_of_fold_scores,  # type: ignore
+            threshold_params,
+        )
+        save_decision_threshold(
+            decision_threshold, threshold_params, paths.decision_threshold_path
+        )
+
+        return {
+            "cross_validation_metrics": cv_results.summary(),
+            "decision_threshold": decision_threshold["threshold"],
+        }
+
+    def evaluation(model, decision_threshold, test_dataset):
+        predictions = HoldoutPredictions(
+            y_true=test_dataset.y.to_numpy(),
+            y_score=tracing.predict_proba(model, test_dataset.X)[:, 1],
+            threshold=decision_threshold,
+        )
+
+        return {
+            "predictions": predictions,
+            "test_metrics": evaluate(
+                predictions, DecisionThresholdParams.from_config()
+            ),
+        }
+
+    return [
+        Stage(
+            "split", split, ["raw_loan_data"], ["raw_train_data_path", "raw_test_data"]
+        ),
+        Stage(
+            "preprocess",
+            preprocess,
+            ["raw_train_data_path"],
+            ["preprocessed_data_path"],
+        ),
+        Stage(
+            "feature_engineering",
+            feature_engineering,
+            ["preprocessed_data_path"],
+            ["train_dataset"],
+        ),
+        Stage(
+            "prepare_test_set", prepare_test_set, ["raw_test_data"], ["test_dataset"]
+        ),
+        Stage("train", train, ["train_dataset"], ["model"]),
+        Stage(
+            "cross_validation",
+            cross_validation,
+            ["model", "train_dataset"],
+            ["cross_validation_metrics", "decision_threshold"],
+        ),
+        Stage(
+            "compile_model",
+            compile_model,
+            ["model", "decision_threshold"],
+            ["compiled_model"],
+        ),
+        Stage("bundle_model", bundle_model, ["compiled_model"], []),
+        Stage(
+            "evaluate",
+            evaluation,
+            ["model", "decision_threshold", "test_dataset"],
+            ["predictions", "test_metrics"],
+        ),
+    ]
+
+
+def log_experiment(artifacts: dict[str, Any]):
+    """Logs the parameters, metrics and plots of a run in a single Live."""
+
+    with Live() as live:
+        experiment_tracker = DVCExperimentTracker(live)
+        experiment_tracker.log_params(HyperParams.from_config())
+        experiment_tracker.log_metrics(
+            artifacts["cross_validation_metrics"], phase="cross_validation"
+        )
+        experiment_tracker.log_metrics(artifacts["test_metrics"], phase="test")
+        if tracing.tracer.enabled:
+            experiment_tracker.log_timings(tracing.tracer.summary())
+        log_plots(artifacts["model"], artifacts["predictions"], live)
+
+
+@click.command(
+    help="Runs the whole training pipeline in a single process, passing data between stages in memory."
+)
+@click.option(
+    "--raw-data-path",
+    default=PipelinePaths.raw_data_path,
+    show_default=True,
+    help="Path to the raw loan applications.",
+)
+@click.option(
+    "--max-workers",
+    type=int,
+    default=None,
+    help="Number of stages run concurrently. Defaults to the thread pool default.",
+)
+def cli(raw_data_path: os.PathLike, max_workers: int | None):
+    start = time.perf_counter()
+    paths = PipelinePaths(raw_data_path=str(raw_data_path))
+
+    artifacts, timings = run_dag(
+        build_training_pipeline(paths),
+        artifacts={"raw_loan_data": read_loan_data(raw_data_path)},
+        max_workers=max_workers,
+    )
+    log_experiment(artifacts)
+
+    for timing in timings:
+        click.echo(
+            f"{timing.name:<20} started at {timing.started_at:6.2f}s, took {timing.elapsed_seconds:6.2f}s"
+        )
+    click.echo(f"Pipeline ran in {time.perf_counter() - start:.2f}s")
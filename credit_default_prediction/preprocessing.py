@@ -1,38 +1,93 @@
 """Data preprocessing Transformers and pipelines."""
 
+from __future__ import annotations
+
 import os
+from collections.abc import Mapping
 
 import click
+import numpy as np
 import pandas as pd
+from numpy.typing import ArrayLike
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
+
+from credit_default_prediction import tracing
+from credit_default_prediction.partitioned_store import update_partitioned_store
+from credit_default_prediction.storage import read_loan_data, write_loan_data
+from credit_default_prediction.streaming import stream_transform
 
 PERSON_EMP_LENGTH_MAX = 60
+CATEGORICAL_ENCODINGS = ["one_hot", "native"]
 
 
-def rule_based_preprocessing(loan_data: pd.DataFrame) -> pd.DataFrame:
+def passes_preprocessing_rules(
+    loan_data: pd.DataFrame | Mapping[str, ArrayLike],
+) -> np.ndarray:
+    """Flags the loan applications kept by the rule-based preprocessing.
+
+    Works on a DataFrame as well as on a mapping of column arrays.
+    """
+
+    loan_int_rate = np.asarray(loan_data["loan_int_rate"], dtype=float)
+    person_emp_length = np.asarray(loan_data["person_emp_length"], dtype=float)
+
     # Loan interests are mandatory. Observations
     # without it are not helpful
-    clean_loan_data = loan_data.dropna(subset="loan_int_rate")
+    has_loan_int_rate = ~np.isnan(loan_int_rate)
     # Removing outlier employment lengths
-    clean_loan_data = clean_loan_data[
-        clean_loan_data["person_emp_length"] <= PERSON_EMP_LENGTH_MAX
-    ]
+    has_plausible_emp_length = person_emp_length <= PERSON_EMP_LENGTH_MAX
+
+    return has_loan_int_rate & has_plausible_emp_length
+
+
+def rule_based_preprocessing(loan_data: pd.DataFrame) -> pd.DataFrame:
+    with tracing.span("rule_based_preprocessing", rows=len(loan_data)):
+        clean_loan_data = loan_data[passes_preprocessing_rules(loan_data)]
 
     return clean_loan_data
 
 
+def infer_feature_types(X: pd.DataFrame) -> tuple[list[str], list[str]]:
+    """Splits loan features into numeric and categorical features."""
+
+    numeric_features = X.select_dtypes(include=np.number).columns.to_list()
+    categorical_features = X.select_dtypes(
+        include=["object", "category"]
+    ).columns.to_list()
+
+    return numeric_features, categorical_features
+
+
 def build_infered_transformers(
-    numeric_features: list[str], categorical_features: list[str]
+    numeric_features: list[str],
+    categorical_features: list[str],
+    categorical_encoding: str = "one_hot",
 ) -> ColumnTransformer:
+    """Imputes numeric features and encodes categorical features.
+
+    With the `one_hot` encoding, each category becomes its own column. With
+    the `native` encoding, each categorical feature stays a single column of
+    category codes, to be handled by XGBoost native categorical support
+    (see `categorical_classifier_params`).
+    """
+
+    if categorical_encoding not in CATEGORICAL_ENCODINGS:
+        raise ValueError(
+            f"Unknown categorical encoding {categorical_encoding!r}. Expected one of {CATEGORICAL_ENCODINGS}."
+        )
+
     num_transformer = Pipeline(
         [
             ("imputer", SimpleImputer(strategy="median")),
         ]
     )
-    cat_transformer = Pipeline([("encoder", OneHotEncoder())])
+    if categorical_encoding == "native":
+        cat_transformer = Pipeline([("encoder", OrdinalEncoder())])
+    else:
+        cat_transformer = Pipeline([("encoder", OneHotEncoder())])
 
     infered_transformers = ColumnTransformer(
         transformers=[
@@ -43,15 +98,82 @@ def build_infered_transformers(
     return infered_transformers
 
 
+def categorical_classifier_params(
+    numeric_features: list[str],
+    categorical_features: list[str],
+    categorical_encoding: str = "one_hot",
+) -> dict:
+    """XGBoost parameters matching the output of `build_infered_transformers`.
+
+    Category codes of the `native` encoding are flagged as categorical
+    features, split on by the `hist` tree method.
+    """
+
+    if categorical_encoding != "native":
+        return {}
+
+    return {
+        "enable_categorical": True,
+        "tree_method": "hist",
+        "feature_types": ["q"] * len(numeric_features)
+        + ["c"] * len(categorical_features),
+    }
+
+
 @click.command(
     help="Performs deterministic data preprocessing steps. Data preprocessing cleans the data so they represent reality faithfully."
 )
-@click.option("--raw-data-path", help="Path to a CSV raw loan applications dataset.")
+@click.option(
+    "--raw-data-path",
+    help="Path to a raw loan applications dataset (CSV, Parquet or Arrow IPC).",
+)
 @click.option(
     "--preprocessed-data-path",
-    help="Path where the preprocessed data CSV will be saved.",
+    help="Path where the preprocessed data will be saved. The file extension sets the format.",
 )
-def cli(raw_data_path: os.PathLike, preprocessed_data_path: os.PathLike):
-    loan_data = pd.read_csv(raw_data_path)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=None,
+    help="Preprocess the data in chunks of this many rows to bound memory usage.",
+)
+@click.option(
+    "--partition-size",
+    type=int,
+    default=None,
+    help="Save the preprocessed data as a partitioned store directory, of this many raw rows per partition. Only the partitions whose rows changed since the last run are preprocessed again.",
+)
+def cli(
+    raw_data_path: os.PathLike,
+    preprocessed_data_path: os.PathLike,
+    chunk_size: int | None,
+    partition_size: int | None,
+):
+    if chunk_size and partition_size:
+        raise click.UsageError(
+            "--chunk-size and --partition-size cannot be used together."
+        )
+
+    if partition_size:
+        update_stats = update_partitioned_store(
+            raw_data_path,
+            preprocessed_data_path,
+            rule_based_preprocessing,
+            partition_size=partition_size,
+        )
+        click.echo(update_stats.report())
+        return
+
+    if chunk_size:
+        stats = stream_transform(
+            raw_data_path,
+            preprocessed_data_path,
+            rule_based_preprocessing,
+            chunk_size=chunk_size,
+        )
+        click.echo(stats.report())
+        return
+
+    loan_data = read_loan_data(raw_data_path)
     loan_data = rule_based_preprocessing(loan_data)
-    loan_data.to_csv(preprocessed_data_path, index=False)
+    write_loan_data(loan_data, preprocessed_data_path)
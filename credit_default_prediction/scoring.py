@@ -0,0 +1,97 @@
+"""Online scoring of raw loan applications."""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from credit_default_prediction.compiled_model import CompiledModel, compile_pipeline
+from credit_default_prediction.model_bundle import load_model_bundle
+from credit_default_prediction.preprocessing import passes_preprocessing_rules
+
+LoanApplication = Mapping[str, object]
+
+PREPROCESSING_RULES_FEATURES = ["loan_int_rate", "person_emp_length"]
+
+
+class LoanScorer:
+    """Scores raw loan applications with a compiled model.
+
+    Applications are turned into column arrays and scored by the compiled
+    model, instead of going through a DataFrame and the trained pipeline on
+    every request. Applications rejected by the rule-based preprocessing get a
+    `None` probability. Defaults are predicted at the decision threshold of
+    the model.
+    """
+
+    def __init__(self, model: CompiledModel) -> None:
+        self._model = model
+        self._features = list(
+            dict.fromkeys(model.input_features + PREPROCESSING_RULES_FEATURES)
+        )
+
+    @classmethod
+    def from_path(cls, model_path: os.PathLike) -> LoanScorer:
+        """Loads a model bundle directory or a compiled model (`.npz`), or
+        compiles a trained pipeline."""
+
+        if Path(model_path).is_dir():
+            return cls(load_model_bundle(model_path))
+        if Path(model_path).suffix == ".npz":
+            return cls(CompiledModel.load(model_path))
+        return cls(compile_pipeline(joblib.load(model_path)))
+
+    def vectorize(
+        self, applications: Sequence[LoanApplication]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Turns raw loan applications into the model feature matrix.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Feature matrix of the accepted
+            applications, and a boolean mask of the accepted applications.
+        """
+
+        columns = {
+            feature: np.asarray(
+                [application.get(feature) for application in applications],
+                dtype=object,
+            )
+            for feature in self._features
+        }
+        accepted = passes_preprocessing_rules(columns)
+        accepted_columns = {
+            feature: values[accepted] for feature, values in columns.items()
+        }
+
+        return self._model.transform(accepted_columns), accepted
+
+    def score(self, applications: Sequence[LoanApplication]) -> list[float | None]:
+        """Computes the default probability of each loan application."""
+
+        features, accepted = self.vectorize(applications)
+        probabilities = iter(self._model.predict_proba(features).tolist())
+
+        return [
+            next(probabilities) if is_accepted else None for is_accepted in accepted
+        ]
+
+    @property
+    def decision_threshold(self) -> float:
+        """Probability above which a default is predicted, saved with the model."""
+
+        return self._model.decision_threshold
+
+    def predict_defaults(
+        self, probabilities: Sequence[float | None]
+    ) -> list[bool | None]:
+        """Credit decisions for the probabilities computed by `score`: whether
+        a default is predicted, `None` for rejected applications."""
+
+        return [
+            None if probability is None else probability > self.decision_threshold
+            for probability in probabilities
+        ]
@@ -0,0 +1,94 @@
+"""Local HTTP scoring server."""
+
+from __future__ import annotations
+
+import json
+import os
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import click
+
+from credit_default_prediction.scoring import LoanScorer
+
+
+def make_handler(scorer: LoanScorer) -> type[BaseHTTPRequestHandler]:
+    """Builds a request handler scoring loan applications with `scorer`.
+
+    `POST /score` accepts either a single loan application or a list of loan
+    applications as JSON, and answers with their default probabilities and
+    the defaults predicted at the decision threshold of the model.
+    """
+
+    class ScoringHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path != "/health":
+                self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+                return
+            self._send_json(HTTPStatus.OK, {"status": "ok"})
+
+        def do_POST(self):
+            if self.path != "/score":
+                self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+                return
+
+            try:
+                content_length = int(self.headers.get("Content-Length", 0))
+                if content_length < 0:
+                    raise ValueError(f"Invalid Content-Length {content_length}.")
+                applications = json.loads(self.rfile.read(content_length))
+                if isinstance(applications, dict):
+                    applications = [applications]
+                probabilities = scorer.score(applications)
+            except (ValueError, TypeError, AttributeError) as error:
+                # The body may be left unread, it cannot be told from the next request
+                self.close_connection = True
+                self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(error)})
+                return
+
+            self._send_json(
+                HTTPStatus.OK,
+                {
+                    "probabilities": probabilities,
+                    "defaults": scorer.predict_defaults(probabilities),
+                },
+            )
+
+        def _send_json(self, status: HTTPStatus, payload: dict):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Access logs cost more than scoring a loan application
+            pass
+
+    return ScoringHandler
+
+
+def make_server(scorer: LoanScorer, host: str, port: int) -> ThreadingHTTPServer:
+    return ThreadingHTTPServer((host, port), make_handler(scorer))
+
+
+@click.command(
+    help="Serves default probabilities of loan applications over HTTP. The model is loaded once at startup."
+)
+@click.option("--model-path", help="Path to the trained model.")
+@click.option("--host", default="127.0.0.1", help="Interface to listen on.")
+@click.option("--port", default=8000, type=int, help="Port to listen on.")
+def cli(model_path: os.PathLike, host: str, port: int):
+    scorer = LoanScorer.from_path(model_path)
+    server = make_server(scorer, host, port)
+
+    click.echo(f"Scoring loan applications on http://{host}:{port}/score")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -5,17 +5,50 @@ from dataclasses import dataclass
 from pathlib import Path
 
 import click
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
-from credit_default_prediction import params
-from credit_default_prediction.dataset import LoanApplications
+from credit_default_prediction import params, tracing
+from credit_default_prediction.dataset import TARGET, LoanApplications
+from credit_default_prediction.storage import (
+    LoanDataWriter,
+    iter_loan_data_chunks,
+    read_loan_data,
+)
+
+SPLIT_STRATEGIES = ["random", "hash", "stratified"]
+# Resolution of the test share with the hash strategy
+HASH_BUCKETS = 1_000_000
 
 
 @dataclass
 class SplitParams:
+    """Share of the test set and how loan applications are assigned to it.
+
+    - `random` shuffles the whole dataset, as `train_test_split` does.
+    - `hash` puts an application in the test set based on a hash of its
+      `key_columns` (every feature by default), so that an application is
+      always assigned to the same set, whatever the other rows.
+    - `stratified` puts every `1 / test_size`-th application of each
+      `loan_status` in the test set, in file order, so that both sets have
+      the same default rate.
+
+    The `hash` and `stratified` assignments work in a single streaming pass,
+    and appending applications to the raw file never moves existing ones
+    between sets.
+    """
+
     test_size: float
     random_state: int
+    strategy: str = "random"
+    key_columns: list[str] | None = None
+
+    def __post_init__(self):
+        if self.strategy not in SPLIT_STRATEGIES:
+            raise ValueError(
+                f"Unknown split strategy {self.strategy!r}. Expected one of {SPLIT_STRATEGIES}."
+            )
 
     @classmethod
     def from_config(cls) -> SplitParams:
@@ -23,6 +56,53 @@ class SplitParams:
         return SplitParams(
             test_size=pipeline_params["test_size"],
             random_state=pipeline_params["random_state"],
+            strategy=pipeline_params.get("strategy", "random"),
+            key_columns=pipeline_params.get("key_columns"),
+        )
+
+
+def hash_test_mask(loan_data: pd.DataFrame, split_params: SplitParams) -> np.ndarray:
+    """Flags the applications whose key hashes into the test share.
+
+    Numeric columns are hashed as floats, so that a value hashes the same
+    whether it was read in an integer or a float column.
+    """
+
+    key_columns = split_params.key_columns or [
+        column for column in loan_data.columns if column != TARGET
+    ]
+    keys = loan_data[key_columns]
+    numeric_columns = keys.select_dtypes(include=np.number).columns
+    keys = keys.astype({column: np.float64 for column in numeric_columns})
+    # The random state salts the hash, hash keys are 16 characters long
+    hashes = pd.util.hash_pandas_object(
+        keys, index=False, hash_key=f"{split_params.random_state:016d}"[-16:]
+    ).to_numpy()
+
+    return hashes % HASH_BUCKETS < round(split_params.test_size * HASH_BUCKETS)
+
+
+class StratifiedAssigner:
+    """Assigns applications to the test set in file order, every
+    `1 / test_size`-th application of each class, across chunks."""
+
+    def __init__(self, split_params: SplitParams) -> None:
+        self._test_size = split_params.test_size
+        # Shifts which applications of each period are picked
+        self._phase = np.random.default_rng(split_params.random_state).random()
+        self._class_counts: dict[object, int] = {}
+
+    def test_mask(self, loan_data: pd.DataFrame) -> np.ndarray:
+        labels = loan_data[TARGET]
+        # Rank of each application within its class, over every chunk so far
+        ranks = labels.groupby(labels).cumcount().to_numpy() + labels.map(
+            self._class_counts
+        ).fillna(0).to_numpy(dtype=np.int64)
+        for label, count in labels.value_counts().items():
+            self._class_counts[label] = self._class_counts.get(label, 0) + count
+
+        return np.floor((ranks + 1) * self._test_size + self._phase) > np.floor(
+            ranks * self._test_size + self._phase
         )
 
 
@@ -40,52 +120,136 @@ def split_data(
     """
 
     loan_dataset = LoanApplications.from_dataframe(loan_data)
-    X_train, X_test, y_train, y_test = train_test_split(
-        loan_dataset.X,
-        loan_dataset.y,
-        test_size=split_params.test_size,
-        random_state=split_params.random_state,
-    )
+    with tracing.span("split_data", rows=len(loan_data)):
+        if split_params.strategy == "random":
+            X_train, X_test, y_train, y_test = train_test_split(
+                loan_dataset.X,
+                loan_dataset.y,
+                test_size=split_params.test_size,
+                random_state=split_params.random_state,
+            )
+        else:
+            is_test = assign_test_rows(loan_data, split_params)
+            X_train, X_test = loan_dataset.X[~is_test], loan_dataset.X[is_test]
+            y_train, y_test = loan_dataset.y[~is_test], loan_dataset.y[is_test]
 
     training_data = LoanApplications(X=X_train, y=y_train)
     test_data = LoanApplications(X=X_test, y=y_test)
     return training_data, test_data
 
 
+def assign_test_rows(loan_data: pd.DataFrame, split_params: SplitParams) -> np.ndarray:
+    """Flags the applications of the test set, for the `hash` and
+    `stratified` strategies."""
+
+    if split_params.strategy == "hash":
+        return hash_test_mask(loan_data, split_params)
+    return StratifiedAssigner(split_params).test_mask(loan_data)
+
+
+def stream_split(
+    raw_data_path: os.PathLike,
+    train_path: os.PathLike,
+    test_path: os.PathLike,
+    split_params: SplitParams,
+    chunk_size: int = 100_000,
+):
+    """Splits a raw loan applications file in a single pass, writing the
+    training and test datasets as the chunks are read, with the `hash` or
+    `stratified` strategy."""
+
+    if split_params.strategy == "random":
+        raise ValueError("The random split needs the whole dataset, it cannot stream.")
+
+    assigner = StratifiedAssigner(split_params)
+    empty_chunk: pd.DataFrame | None = None
+    rows_written = {"train": 0, "test": 0}
+    with LoanDataWriter(train_path) as train_writer, LoanDataWriter(
+        test_path
+    ) as test_writer:
+        writers = {"train": train_writer, "test": test_writer}
+        for chunk in iter_loan_data_chunks(raw_data_path, chunk_size):
+            with tracing.span("split_data", rows=len(chunk)):
+                if split_params.strategy == "hash":
+                    is_test = hash_test_mask(chunk, split_params)
+                else:
+                    is_test = assigner.test_mask(chunk)
+            if empty_chunk is None:
+                empty_chunk = chunk.iloc[:0]
+            for name, rows in (("train", chunk[~is_test]), ("test", chunk[is_test])):
+                if not rows.empty:
+                    writers[name].write(rows)
+                    rows_written[name] += len(rows)
+
+        # So that both files always exist, even without any row
+        for name, writer in writers.items():
+            if rows_written[name] == 0 and empty_chunk is not None:
+                writer.write(empty_chunk)
+
+
 def split_data_from_path(
     raw_data_path: os.PathLike,
     split_data_dir: os.PathLike,
     split_params: SplitParams,
+    file_format: str = "csv",
+    chunk_size: int = 100_000,
 ):
     """Reads raw loan applications from `raw_data_path`
     and splits them into training and test datasets.
 
     Args:
         raw_data_path (os.PathLike): Path to raw loan applications.
-        split_data_dir (os.PathLike): Directory where training and test datasets CSV files are to be saved.
+        split_data_dir (os.PathLike): Directory where training and test datasets files are to be saved.
         split_params (SplitParams): Parameters required to appropriately split the data.
+        file_format (str): Format of the saved datasets: "csv", "parquet" or "arrow".
+        chunk_size (int): Number of rows read at a time by the `hash` and
+            `stratified` strategies.
     """
 
-    loan_applications = pd.read_csv(raw_data_path)
-    train_path = Path(split_data_dir) / "train.csv"
-    test_path = Path(split_data_dir) / "test.csv"
+    train_path = Path(split_data_dir) / f"train.{file_format}"
+    test_path = Path(split_data_dir) / f"test.{file_format}"
+
+    if split_params.strategy != "random":
+        stream_split(raw_data_path, train_path, test_path, split_params, chunk_size)
+        return
 
+    loan_applications = read_loan_data(raw_data_path)
     training_dataset, test_dataset = split_data(loan_applications, split_params)
 
-    training_dataset.save_to_csv(train_path)
-    test_dataset.save_to_csv(test_path)
+    training_dataset.save(train_path)
+    test_dataset.save(test_path)
 
 
 @click.command()
 @click.option("--raw-data-path", help="Path to raw data.")
 @click.option(
-    "--split-data-dir", help="Path where training and test CSV datasets will be saved."
+    "--split-data-dir", help="Path where training and test datasets will be saved."
 )
-def cli(raw_data_path: os.PathLike, split_data_dir: os.PathLike):
+@click.option(
+    "--file-format",
+    type=click.Choice(["csv", "parquet", "arrow"]),
+    default="csv",
+    help="Format of the training and test datasets.",
+)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=100_000,
+    show_default=True,
+    help="Number of rows read at a time by the hash and stratified split strategies.",
+)
+def cli(
+    raw_data_path: os.PathLike,
+    split_data_dir: os.PathLike,
+    file_format: str,
+    chunk_size: int,
+):
     split_params = SplitParams.from_config()
 
     split_data_from_path(
         raw_data_path=raw_data_path,
         split_data_dir=split_data_dir,
         split_params=split_params,
+        file_format=file_format,
+        chunk_size=chunk_size,
     )
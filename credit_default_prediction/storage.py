@@ -0,0 +1,306 @@
+"""Reading and writing loan applications datasets.
+
+Datasets are stored as CSV, Parquet (`.parquet`) or Arrow IPC (`.arrow`,
+`.feather`) files depending on their file extension. Columnar formats keep
+the column types, store categorical columns dictionary-encoded and only read
+the requested columns. A directory is read as a partitioned Parquet dataset,
+made of the partitions listed in its `_manifest.json` (see `partitioned_store`),
+or of its `.parquet` files in name order when it has no manifest.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from types import TracebackType
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+CSV_SUFFIXES = {".csv"}
+PARQUET_SUFFIXES = {".parquet"}
+ARROW_SUFFIXES = {".arrow", ".feather"}
+# Partitions of a partitioned store directory, in order
+MANIFEST_FILE_NAME = "_manifest.json"
+
+
+def storage_format(path: os.PathLike) -> str:
+    if Path(path).is_dir():
+        return "parquet"
+    suffix = Path(path).suffix
+    if suffix in CSV_SUFFIXES:
+        return "csv"
+    if suffix in PARQUET_SUFFIXES:
+        return "parquet"
+    if suffix in ARROW_SUFFIXES:
+        return "arrow"
+    raise ValueError(
+        f"Unsupported dataset file extension {suffix!r}. "
+        "Expected one of .csv, .parquet, .arrow or .feather."
+    )
+
+
+def parquet_files(dataset_path: os.PathLike) -> list[Path]:
+    """Files of a dataset: the partitions listed in the manifest of a store,
+    the `.parquet` files of another directory, in name order, or the dataset
+    file itself.
+
+    Following the manifest, partitions being written or left over by an
+    interrupted update of a store are never read.
+    """
+
+    if not Path(dataset_path).is_dir():
+        return [Path(dataset_path)]
+
+    manifest_path = Path(dataset_path) / MANIFEST_FILE_NAME
+    if not manifest_path.exists():
+        return sorted(Path(dataset_path).glob("*.parquet"))
+    with open(manifest_path) as manifest_file:
+        return [
+            Path(dataset_path) / partition["file_name"]
+            for partition in json.load(manifest_file)
+        ]
+
+
+def fingerprint_file(path: os.PathLike, block_size: int = 2**20) -> str:
+    """SHA-256 digest of the content of a file, or of the Parquet files of a
+    partitioned dataset directory."""
+
+    digest = hashlib.sha256()
+    for file_path in parquet_files(path):
+        with open(file_path, "rb") as dataset_file:
+            while block := dataset_file.read(block_size):
+                digest.update(block)
+
+    return digest.hexdigest()
+
+
+def encode_categories(loan_data: pd.DataFrame) -> pd.DataFrame:
+    """Stores text columns as categoricals, so that they are dictionary-encoded."""
+
+    text_columns = loan_data.select_dtypes(include=object).columns
+    if text_columns.empty:
+        return loan_data
+
+    return loan_data.astype({column: "category" for column in text_columns})
+
+
+def downcast_loan_data(loan_data: pd.DataFrame) -> pd.DataFrame:
+    """Shrinks the column types of loan applications.
+
+    Floats become float32, which is the precision XGBoost works with, the
+    `loan_status` label becomes int8, other integers int32 and text columns
+    categoricals. The types do not depend on the values, so that every chunk
+    of a dataset written chunk by chunk gets the same schema.
+    """
+
+    downcast_dtypes: dict = {}
+    for column in loan_data.columns:
+        values = loan_data[column]
+        if pd.api.types.is_float_dtype(values):
+            downcast_dtypes[column] = np.float32
+        elif column == "loan_status":
+            downcast_dtypes[column] = np.int8
+        elif pd.api.types.is_integer_dtype(values):
+            downcast_dtypes[column] = np.int32
+
+    return encode_categories(loan_data.astype(downcast_dtypes))
+
+
+def read_loan_data(
+    dataset_path: os.PathLike, columns: list[str] | None = None
+) -> pd.DataFrame:
+    """Reads a loan applications dataset, only loading `columns` when given."""
+
+    dataset_format = storage_format(dataset_path)
+    if dataset_format == "parquet" and Path(dataset_path).is_dir():
+        loan_data = (
+            pq.ParquetDataset(parquet_files(dataset_path))
+            .read(columns=columns)
+            .to_pandas()
+        )
+    elif dataset_format == "parquet":
+        loan_data = pd.read_parquet(dataset_path, columns=columns)
+    elif dataset_format == "arrow":
+        loan_data = pd.read_feather(dataset_path, columns=columns)
+    else:
+        loan_data = pd.read_csv(dataset_path, usecols=columns)
+
+    if columns:
+        loan_data = loan_data[columns]
+
+    return loan_data
+
+
+def map_loan_data(
+    dataset_path: os.PathLike, columns: list[str] | None = None
+) -> pd.DataFrame:
+    """Memory-maps an Arrow IPC loan applications dataset.
+
+    Each column of the returned DataFrame is a read-only view on the mapped
+    file, so that the dataset is paged in by the OS instead of being copied
+    into memory. Columns with missing values, and files written in several
+    chunks, are copied: pandas needs NaNs in place of Arrow nulls and a single
+    buffer per column.
+    """
+
+    if storage_format(dataset_path) != "arrow":
+        raise ValueError(
+            f"Only Arrow IPC datasets can be memory-mapped, got {dataset_path}."
+        )
+
+    with pa.memory_map(str(dataset_path)) as source:
+        table = ipc.open_file(source).read_all()
+    if columns:
+        table = table.select(columns)
+
+    return table.to_pandas(split_blocks=True)
+
+
+def write_loan_data(loan_data: pd.DataFrame, dataset_path: os.PathLike):
+    with LoanDataWriter(dataset_path) as writer:
+        writer.write(loan_data)
+
+
+def iter_loan_data_chunks(
+    dataset_path: os.PathLike, chunk_size: int
+) -> Iterator[pd.DataFrame]:
+    """Reads a loan applications dataset `chunk_size` rows at a time."""
+
+    dataset_format = storage_format(dataset_path)
+    if dataset_format == "parquet":
+        for parquet_path in parquet_files(dataset_path):
+            parquet_file = pq.ParquetFile(parquet_path)
+            for batch in parquet_file.iter_batches(batch_size=chunk_size):
+                yield batch.to_pandas()
+    elif dataset_format == "arrow":
+        with pa.memory_map(str(dataset_path)) as source:
+            reader = ipc.open_file(source)
+            for batch_index in range(reader.num_record_batches):
+                table = pa.Table.from_batches([reader.get_batch(batch_index)])
+                for offset in range(0, table.num_rows, chunk_size):
+                    yield table.slice(offset, chunk_size).to_pandas()
+    else:
+        with pd.read_csv(dataset_path, chunksize=chunk_size) as chunks:
+            yield from chunks
+
+
+class LoanDataWriter:
+    """Writes a loan applications dataset incrementally, one chunk at a time.
+
+    Categories are accumulated across chunks, so that chunks with different
+    categories are stored under a single dictionary per column, which Arrow
+    IPC files extend with deltas. The schema is set by the first chunk with
+    rows: empty chunks are only written when no chunk has any row.
+    """
+
+    def __init__(self, dataset_path: os.PathLike) -> None:
+        self._dataset_path = dataset_path
+        self._format = storage_format(dataset_path)
+        self._writer: pq.ParquetWriter | ipc.RecordBatchFileWriter | None = None
+        self._schema: pa.Schema | None = None
+        self._categories: dict[str, list] = {}
+        self._empty_table: pa.Table | None = None
+        self._has_written = False
+
+    def write(self, loan_data: pd.DataFrame):
+        if self._format == "csv":
+            loan_data.to_csv(
+                self._dataset_path,
+                mode="a" if self._has_written else "w",
+                header=not self._has_written,
+                index=False,
+            )
+            self._has_written = True
+            return
+
+        table = pa.Table.from_pandas(
+            self._unify_categories(encode_categories(loan_data)),
+            schema=self._schema,
+            preserve_index=False,
+        )
+        if self._writer is None:
+            if table.num_rows == 0:
+                self._empty_table = self._empty_table or table
+                return
+            self._schema = writer_schema(table.schema)
+            table = table.cast(self._schema)
+            self._writer = self._open_writer(self._schema)
+        self._writer.write_table(table)
+        self._has_written = True
+
+    def close(self):
+        if self._writer is None and self._empty_table is not None:
+            self._writer = self._open_writer(self._empty_table.schema)
+            self._writer.write_table(self._empty_table)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self) -> LoanDataWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ):
+        self.close()
+
+    def _open_writer(
+        self, schema: pa.Schema
+    ) -> pq.ParquetWriter | ipc.RecordBatchFileWriter:
+        if self._format == "parquet":
+            return pq.ParquetWriter(self._dataset_path, schema)
+        return ipc.new_file(
+            self._dataset_path,
+            schema,
+            options=ipc.IpcWriteOptions(emit_dictionary_deltas=True),
+        )
+
+    def _unify_categories(self, loan_data: pd.DataFrame) -> pd.DataFrame:
+        categorical_columns = loan_data.select_dtypes(include="category").columns
+        unified_data = loan_data.copy(deep=False)
+        for column in categorical_columns:
+            known_categories = self._categories.setdefault(column, [])
+            known_categories.extend(
+                category
+                for category in loan_data[column].cat.categories
+                if category not in known_categories
+            )
+            # Unlike `astype`, reorders categories that are already known, so
+            # that the dictionary of a chunk extends the previous ones
+            unified_data[column] = loan_data[column].cat.set_categories(
+                list(known_categories)
+            )
+
+        return unified_data
+
+
+def writer_schema(schema: pa.Schema) -> pa.Schema:
+    """Schema of a dataset written chunk by chunk, from its first chunk.
+
+    Dictionary indices are widened to int32 and the dictionaries of columns
+    without any value in the first chunk hold strings, so that they fit the
+    categories of the next chunks.
+    """
+
+    for index, field in enumerate(schema):
+        if pa.types.is_dictionary(field.type):
+            value_type = (
+                pa.string()
+                if pa.types.is_null(field.type.value_type)
+                else field.type.value_type
+            )
+            schema = schema.set(
+                index, field.with_type(pa.dictionary(pa.int32(), value_type))
+            )
+
+    return schema
@@ -0,0 +1,95 @@
+"""Out-of-core processing of loan applications datasets."""
+
+from __future__ import annotations
+
+import os
+import resource
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import pandas as pd
+
+from credit_default_prediction.storage import (
+    LoanDataWriter,
+    iter_loan_data_chunks,
+    read_loan_data,
+)
+
+LoanDataTransform = Callable[[pd.DataFrame], pd.DataFrame]
+
+
+@dataclass
+class StreamingStats:
+    rows_read: int
+    rows_written: int
+    elapsed_seconds: float
+    peak_rss_bytes: int
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.elapsed_seconds == 0:
+            return float("inf")
+        return self.rows_read / self.elapsed_seconds
+
+    def report(self) -> str:
+        return (
+            f"Processed {self.rows_read} rows ({self.rows_written} written) "
+            f"in {self.elapsed_seconds:.2f}s: {self.rows_per_second:,.0f} rows/s, "
+            f"peak RSS {self.peak_rss_bytes / 2**20:.1f} MiB"
+        )
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of the current process."""
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def stream_transform(
+    input_path: os.PathLike,
+    output_path: os.PathLike,
+    transform: LoanDataTransform,
+    chunk_size: int,
+) -> StreamingStats:
+    """Applies `transform` to a loan applications dataset chunk by chunk.
+
+    Only one chunk is held in memory at a time and the transformed chunks are
+    appended to the output file as they are produced, so memory usage only
+    depends on `chunk_size`, not on the size of the input file. The output
+    file is always created, empty when no row is written.
+
+    Args:
+        input_path (os.PathLike): Input CSV, Parquet or Arrow IPC file.
+        output_path (os.PathLike): Output CSV, Parquet or Arrow IPC file.
+        transform (LoanDataTransform): Row-wise transformation to apply, such as
+            `rule_based_preprocessing` or `engineer_features`.
+        chunk_size (int): Number of rows per chunk.
+
+    Returns:
+        StreamingStats: Processed rows, throughput and peak memory.
+    """
+
+    start = time.perf_counter()
+    rows_read = 0
+    rows_written = 0
+
+    with LoanDataWriter(output_path) as writer:
+        for chunk in iter_loan_data_chunks(input_path, chunk_size):
+            transformed_chunk = transform(chunk)
+            writer.write(transformed_chunk)
+            rows_read += len(chunk)
+            rows_written += len(transformed_chunk)
+        if rows_read == 0:
+            # Empty columnar files have no chunk to take the columns from
+            writer.write(transform(read_loan_data(input_path)))
+
+    return StreamingStats(
+        rows_read=rows_read,
+        rows_written=rows_written,
+        elapsed_seconds=time.perf_counter() - start,
+        peak_rss_bytes=peak_rss_bytes(),
+    )
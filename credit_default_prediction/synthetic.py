@@ -0,0 +1,445 @@
+"""Synthetic loan applications with the schema of `cr_loan2.csv`, to test
+how the pipeline scales beyond the raw dataset.
+
+Applications are either drawn from built-in distributions close to those of
+`cr_loan2.csv`, or from a `LoanDataProfile` fitted on real loan applications.
+Generation is vectorized and can be done in chunks, so that datasets larger
+than memory are written one chunk at a time.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+import click
+import numpy as np
+import pandas as pd
+
+from credit_default_prediction.dataset import TARGET, LoanApplications
+from credit_default_prediction.preprocessing import PERSON_EMP_LENGTH_MAX
+from credit_default_prediction.storage import LoanDataWriter, read_loan_data
+from credit_default_prediction.streaming import StreamingStats, peak_rss_bytes
+
+# Category frequencies of the raw loan applications
+HOME_OWNERSHIP_FREQUENCIES = {
+    "RENT": 0.505,
+    "MORTGAGE": 0.413,
+    "OWN": 0.079,
+    "OTHER": 0.003,
+}
+LOAN_INTENT_FREQUENCIES = {
+    "EDUCATION": 0.198,
+    "MEDICAL": 0.186,
+    "VENTURE": 0.175,
+    "PERSONAL": 0.170,
+    "DEBTCONSOLIDATION": 0.160,
+    "HOMEIMPROVEMENT": 0.111,
+}
+LOAN_GRADE_FREQUENCIES = {
+    "A": 0.331,
+    "B": 0.321,
+    "C": 0.198,
+    "D": 0.111,
+    "E": 0.030,
+    "F": 0.007,
+    "G": 0.002,
+}
+# Average interest rate of each loan grade
+LOAN_GRADE_INTEREST_RATES = {
+    "A": 7.3,
+    "B": 11.0,
+    "C": 13.5,
+    "D": 15.4,
+    "E": 17.0,
+    "F": 18.6,
+    "G": 20.3,
+}
+# Fitted numeric columns are sampled by interpolating between these quantiles
+QUANTILE_LEVELS = np.linspace(0, 1, 1001)
+
+
+@dataclass
+class DataQuality:
+    """Share of the generated loan applications with a missing interest
+    rate, a missing employment length, or an employment length above
+    `PERSON_EMP_LENGTH_MAX`. The defaults are those of `cr_loan2.csv`."""
+
+    loan_int_rate_missing_rate: float = 0.096
+    person_emp_length_missing_rate: float = 0.027
+    person_emp_length_outlier_rate: float = 0.0002
+
+
+@dataclass
+class LoanDataProfile:
+    """Distributions fitted on loan applications.
+
+    Numeric columns are described by their quantiles, and the default rate
+    by its mean, within each category of `strata_column` (the loan grade),
+    so that the strongest relationships between the grade, the interest rate
+    and the defaults are kept. Other categorical columns are described by
+    their category frequencies.
+    """
+
+    columns: list[str]
+    strata_column: str
+    strata_frequencies: dict[str, float]
+    numeric_quantiles: dict[str, dict[str, list[float]]]
+    integer_columns: list[str]
+    default_rates: dict[str, float]
+    category_frequencies: dict[str, dict[str, float]]
+
+    @classmethod
+    def fit(
+        cls, loan_applications: LoanApplications, strata_column: str = "loan_grade"
+    ) -> LoanDataProfile:
+        """Fits the distributions of the loan applications. Missing values and
+        implausible employment lengths are left out, their rates being set by
+        `DataQuality` when generating."""
+
+        loan_data = loan_applications.data
+        strata = loan_data[strata_column].astype(str)
+        numeric_columns = [
+            column
+            for column in loan_data.select_dtypes(include=np.number).columns
+            if column != TARGET
+        ]
+        categorical_columns = [
+            column
+            for column in loan_data.columns
+            if column not in numeric_columns and column not in [TARGET, strata_column]
+        ]
+
+        numeric_quantiles: dict[str, dict[str, list[float]]] = {}
+        for column in numeric_columns:
+            values = loan_data[column]
+            plausible = values.notna()
+            if column == "person_emp_length":
+                plausible &= values <= PERSON_EMP_LENGTH_MAX
+            numeric_quantiles[column] = {
+                stratum: np.quantile(stratum_values, QUANTILE_LEVELS).tolist()
+                for stratum, stratum_values in values[plausible].groupby(
+                    strata[plausible]
+                )
+            }
+
+        return cls(
+            columns=loan_data.columns.to_list(),
+            strata_column=strata_column,
+            strata_frequencies=_frequencies(strata),
+            numeric_quantiles=numeric_quantiles,
+            integer_columns=[
+                column
+                for column in numeric_columns
+                if pd.api.types.is_integer_dtype(loan_data[column])
+            ],
+            default_rates={
+                str(stratum): float(default_rate)
+                for stratum, default_rate in loan_applications.y.groupby(strata)
+                .mean()
+                .items()
+            },
+            category_frequencies={
+                column: _frequencies(loan_data[column].astype(str))
+                for column in categorical_columns
+            },
+        )
+
+    def sample(self, n_rows: int, rng: np.random.Generator) -> pd.DataFrame:
+        strata = _choice(rng, self.strata_frequencies, n_rows)
+        loan_data = {self.strata_column: strata}
+
+        for column, quantiles_by_stratum in self.numeric_quantiles.items():
+            values = np.full(n_rows, np.nan)
+            for stratum, quantiles in quantiles_by_stratum.items():
+                in_stratum = strata == stratum
+                values[in_stratum] = np.interp(
+                    rng.random(int(in_stratum.sum())), QUANTILE_LEVELS, quantiles
+                )
+            loan_data[column] = values
+        for column, frequencies in self.category_frequencies.items():
+            loan_data[column] = _choice(rng, frequencies, n_rows)
+
+        derives_percent_income = {
+            "loan_percent_income",
+            "loan_amnt",
+            "person_income",
+        } <= set(loan_data)
+        if derives_percent_income:
+            loan_data["loan_percent_income"] = np.minimum(
+                loan_data["loan_amnt"] / loan_data["person_income"], 1
+            )
+        default_rates = pd.Series(self.default_rates).reindex(strata).to_numpy()
+        loan_data[TARGET] = (rng.random(n_rows) < default_rates).astype(np.int64)
+
+        loan_data_frame = pd.DataFrame(loan_data)[self.columns]
+        for column in self.integer_columns:
+            # Strata missing from the fit leave missing values
+            loan_data_frame[column] = (
+                loan_data_frame[column].round().fillna(0).astype(np.int64)
+            )
+        if derives_percent_income:
+            loan_data_frame["loan_percent_income"] = loan_data_frame[
+                "loan_percent_income"
+            ].round(2)
+
+        return loan_data_frame
+
+
+def _frequencies(values: pd.Series) -> dict[str, float]:
+    return {
+        str(category): float(frequency)
+        for category, frequency in values.value_counts(normalize=True).items()
+    }
+
+
+def _choice(
+    rng: np.random.Generator, frequencies: dict[str, float], n_rows: int
+) -> np.ndarray:
+    categories = np.array(list(frequencies))
+    probabilities = np.array(list(frequencies.values()))
+
+    return categories[
+        rng.choice(len(categories), size=n_rows, p=probabilities / probabilities.sum())
+    ]
+
+
+def _sample_default_distributions(
+    n_rows: int, rng: np.random.Generator
+) -> pd.DataFrame:
+    """Loan applications following the distributions of `cr_loan2.csv`.
+
+    Defaults are more likely for lower loan grades, for loans taking a larger
+    share of the income and for renters, so that a model has something to
+    learn.
+    """
+
+    person_age = np.clip(rng.gamma(9.0, 3.1, size=n_rows), 20, 144).round()
+    person_income = np.clip(
+        rng.lognormal(np.log(55_000), 0.55, size=n_rows), 4_000, 6_000_000
+    ).round()
+    person_home_ownership = _choice(rng, HOME_OWNERSHIP_FREQUENCIES, n_rows)
+    person_emp_length = np.minimum(
+        rng.exponential(4.8, size=n_rows), person_age - 14
+    ).round()
+
+    loan_intent = _choice(rng, LOAN_INTENT_FREQUENCIES, n_rows)
+    loan_grade = _choice(rng, LOAN_GRADE_FREQUENCIES, n_rows)
+    loan_amnt = (
+        np.clip(rng.lognormal(np.log(8_000), 0.6, size=n_rows), 500, 35_000) // 25 * 25
+    )
+    grade_interest_rates = pd.Series(LOAN_GRADE_INTEREST_RATES)[loan_grade].to_numpy()
+    loan_int_rate = np.clip(
+        grade_interest_rates + rng.normal(0, 1.2, size=n_rows), 5.42, 23.22
+    ).round(2)
+    loan_percent_income = np.minimum(loan_amnt / person_income, 0.83).round(2)
+
+    grade_index = pd.Series(range(len(LOAN_GRADE_FREQUENCIES)), LOAN_GRADE_FREQUENCIES)
+    default_log_odds = (
+        -4.1
+        + 0.75 * grade_index[loan_grade].to_numpy()
+        + 6.0 * loan_percent_income
+        + 0.9 * (person_home_ownership == "RENT")
+    )
+    loan_status = (rng.random(n_rows) < 1 / (1 + np.exp(-default_log_odds))).astype(
+        np.int64
+    )
+
+    cb_person_default_on_file = np.where(
+        (grade_index[loan_grade].to_numpy() >= 3) & (rng.random(n_rows) < 0.8),
+        "Y",
+        "N",
+    )
+    cb_person_cred_hist_length = np.clip(
+        (person_age - 18) * rng.uniform(0.2, 0.6, size=n_rows), 2, 30
+    ).round()
+
+    return pd.DataFrame(
+        {
+            "person_age": person_age.astype(np.int64),
+            "person_income": person_income.astype(np.int64),
+            "person_home_ownership": person_home_ownership,
+            "person_emp_length": person_emp_length,
+            "loan_intent": loan_intent,
+            "loan_grade": loan_grade,
+            "loan_amnt": loan_amnt.astype(np.int64),
+            "loan_int_rate": loan_int_rate,
+            "loan_status": loan_status,
+            "loan_percent_income": loan_percent_income,
+            "cb_person_default_on_file": cb_person_default_on_file,
+            "cb_person_cred_hist_length": cb_person_cred_hist_length.astype(np.int64),
+        }
+    )
+
+
+def _degrade(loan_data: pd.DataFrame, quality: DataQuality, rng: np.random.Generator):
+    """Blanks interest rates and employment lengths, and makes some
+    employment lengths implausible, at the rates of `quality`."""
+
+    n_rows = len(loan_data)
+    if "loan_int_rate" in loan_data:
+        loan_int_rate = loan_data["loan_int_rate"].to_numpy(dtype=float, copy=True)
+        loan_int_rate[rng.random(n_rows) < quality.loan_int_rate_missing_rate] = np.nan
+        loan_data["loan_int_rate"] = loan_int_rate
+    if "person_emp_length" in loan_data:
+        person_emp_length = loan_data["person_emp_length"].to_numpy(
+            dtype=float, copy=True
+        )
+        is_outlier = rng.random(n_rows) < quality.person_emp_length_outlier_rate
+        person_emp_length[is_outlier] = rng.integers(
+            PERSON_EMP_LENGTH_MAX + 1, 124, size=int(is_outlier.sum())
+        )
+        person_emp_length[
+            rng.random(n_rows) < quality.person_emp_length_missing_rate
+        ] = np.nan
+        loan_data["person_emp_length"] = person_emp_length
+
+
+def generate_loan_applications(
+    n_rows: int,
+    seed: int | np.random.SeedSequence = 0,
+    profile: LoanDataProfile | None = None,
+    quality: DataQuality | None = None,
+) -> pd.DataFrame:
+    """Generates raw loan applications.
+
+    Args:
+        n_rows (int): Number of loan applications.
+        seed (int | np.random.SeedSequence): Seed of the random generator.
+            The same seed always generates the same applications.
+        profile (LoanDataProfile | None): Distributions to draw the
+            applications from. Defaults to the built-in distributions of
+            `cr_loan2.csv`.
+        quality (DataQuality | None): Rates of missing and implausible
+            values. Defaults to those of `cr_loan2.csv`.
+
+    Returns:
+        pd.DataFrame: Loan applications, with the columns of the profile or
+            of `cr_loan2.csv`.
+    """
+
+    rng = np.random.default_rng(seed)
+    if profile is None:
+        loan_data = _sample_default_distributions(n_rows, rng)
+    else:
+        loan_data = profile.sample(n_rows, rng)
+    _degrade(loan_data, quality or DataQuality(), rng)
+
+    return loan_data
+
+
+def iter_loan_applications(
+    n_rows: int,
+    chunk_size: int,
+    seed: int = 0,
+    profile: LoanDataProfile | None = None,
+    quality: DataQuality | None = None,
+) -> Iterator[pd.DataFrame]:
+    """Generates `n_rows` loan applications, `chunk_size` rows at a time.
+
+    Each chunk has its own random generator, spawned from `seed`, so that the
+    chunks are independent and the same seed and chunk size always generate
+    the same dataset.
+    """
+
+    n_chunks = math.ceil(n_rows / chunk_size)
+    chunk_seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    for chunk_index, chunk_seed in enumerate(chunk_seeds):
+        chunk_n_rows = min(chunk_size, n_rows - chunk_index * chunk_size)
+        yield generate_loan_applications(chunk_n_rows, chunk_seed, profile, quality)
+
+
+def write_loan_applications(
+    output_path: os.PathLike,
+    n_rows: int,
+    chunk_size: int = 1_000_000,
+    seed: int = 0,
+    profile: LoanDataProfile | None = None,
+    quality: DataQuality | None = None,
+) -> StreamingStats:
+    """Writes generated loan applications as CSV, Parquet or Arrow IPC,
+    holding a single chunk in memory at a time."""
+
+    start = time.perf_counter()
+    rows_written = 0
+    with LoanDataWriter(output_path) as writer:
+        for chunk in iter_loan_applications(n_rows, chunk_size, seed, profile, quality):
+            writer.write(chunk)
+            rows_written += len(chunk)
+
+    return StreamingStats(
+        rows_read=rows_written,
+        rows_written=rows_written,
+        elapsed_seconds=time.perf_counter() - start,
+        peak_rss_bytes=peak_rss_bytes(),
+    )
+
+
+@click.command(
+    help="Generates synthetic raw loan applications with the schema of cr_loan2.csv, to test the pipeline at scale."
+)
+@click.option("--n-rows", type=int, help="Number of loan applications to generate.")
+@click.option(
+    "--output-path",
+    help="Path where the loan applications will be saved. The file extension sets the format.",
+)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=1_000_000,
+    show_default=True,
+    help="Number of rows generated and written at a time.",
+)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option(
+    "--profile-data-path",
+    default=None,
+    help="Loan applications to fit the distributions on. Defaults to built-in distributions close to cr_loan2.csv.",
+)
+@click.option(
+    "--loan-int-rate-missing-rate",
+    type=float,
+    default=DataQuality.loan_int_rate_missing_rate,
+    show_default=True,
+)
+@click.option(
+    "--person-emp-length-missing-rate",
+    type=float,
+    default=DataQuality.person_emp_length_missing_rate,
+    show_default=True,
+)
+@click.option(
+    "--person-emp-length-outlier-rate",
+    type=float,
+    default=DataQuality.person_emp_length_outlier_rate,
+    show_default=True,
+    help=f"Share of employment lengths above {PERSON_EMP_LENGTH_MAX} years.",
+)
+def cli(
+    n_rows: int,
+    output_path: os.PathLike,
+    chunk_size: int,
+    seed: int,
+    profile_data_path: os.PathLike | None,
+    loan_int_rate_missing_rate: float,
+    person_emp_length_missing_rate: float,
+    person_emp_length_outlier_rate: float,
+):
+    profile = None
+    if profile_data_path:
+        profile = LoanDataProfile.fit(
+            LoanApplications.from_dataframe(read_loan_data(profile_data_path))
+        )
+    quality = DataQuality(
+        loan_int_rate_missing_rate=loan_int_rate_missing_rate,
+        person_emp_length_missing_rate=person_emp_length_missing_rate,
+        person_emp_length_outlier_rate=person_emp_length_outlier_rate,
+    )
+
+    stats = write_loan_applications(
+        output_path, n_rows, chunk_size, seed, profile, quality
+    )
+    click.echo(stats.report())
@@ -0,0 +1,171 @@
+"""Lightweight tracing of the pipeline hot paths.
+
+Stages and the steps of the trained pipeline are wrapped in spans, recording
+their duration, the number of rows they processed and the peak memory of the
+process when they ended. Tracing is disabled by default: `span` then returns
+a shared no-op context manager, so instrumented code runs at the same speed.
+
+Recorded spans are summarized per name for the experiment tracker, and can be
+exported as a Chrome trace, to be opened in `chrome://tracing` or Perfetto.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from credit_default_prediction.streaming import peak_rss_bytes
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    from sklearn.pipeline import Pipeline
+
+_NO_SPAN: AbstractContextManager[None] = contextlib.nullcontext()
+
+
+@dataclass
+class Span:
+    name: str
+    # Seconds since the tracer was created
+    started_at: float
+    elapsed_seconds: float
+    thread_id: int
+    rows: int | None
+    peak_rss_bytes: int
+
+
+@dataclass
+class SpanSummary:
+    calls: int
+    seconds: float
+    rows: int
+    peak_rss_bytes: int
+
+    def to_metrics(self) -> dict[str, float]:
+        metrics = {"calls": self.calls, "seconds": self.seconds}
+        if self.rows:
+            metrics["rows"] = self.rows
+            metrics["rows_per_second"] = (
+                self.rows / self.seconds if self.seconds else float("inf")
+            )
+        metrics["peak_rss_bytes"] = self.peak_rss_bytes
+
+        return metrics
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.spans: list[Span] = []
+        self._origin = time.perf_counter()
+
+    def span(self, name: str, rows: int | None = None) -> AbstractContextManager[None]:
+        """Times the code run within the returned context manager."""
+
+        if not self.enabled:
+            return _NO_SPAN
+        return self._record(name, rows)
+
+    @contextlib.contextmanager
+    def _record(self, name: str, rows: int | None) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            # Appending to a list is atomic, spans can end on any thread
+            self.spans.append(
+                Span(
+                    name=name,
+                    started_at=start - self._origin,
+                    elapsed_seconds=end - start,
+                    thread_id=threading.get_ident(),
+                    rows=rows,
+                    peak_rss_bytes=peak_rss_bytes(),
+                )
+            )
+
+    def clear(self):
+        self.spans = []
+        self._origin = time.perf_counter()
+
+    def summary(self) -> dict[str, SpanSummary]:
+        """Number of calls, total time and rows, and peak memory per span name."""
+
+        summaries: dict[str, SpanSummary] = {}
+        for span in self.spans:
+            summary = summaries.setdefault(span.name, SpanSummary(0, 0.0, 0, 0))
+            summary.calls += 1
+            summary.seconds += span.elapsed_seconds
+            summary.rows += span.rows or 0
+            summary.peak_rss_bytes = max(summary.peak_rss_bytes, span.peak_rss_bytes)
+
+        return summaries
+
+    def chrome_trace(self) -> dict:
+        """Spans in the Chrome trace event format, as complete events."""
+
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": span.name,
+                    "ph": "X",
+                    "ts": span.started_at * 1e6,
+                    "dur": span.elapsed_seconds * 1e6,
+                    "pid": pid,
+                    "tid": span.thread_id,
+                    "args": {
+                        "rows": span.rows,
+                        "peak_rss_bytes": span.peak_rss_bytes,
+                    },
+                }
+                for span in self.spans
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def save_chrome_trace(self, trace_path: os.PathLike):
+        with open(trace_path, "w") as trace_file:
+            json.dump(self.chrome_trace(), trace_file)
+
+
+# Tracer of the process, shared by every module
+tracer = Tracer()
+
+
+def span(name: str, rows: int | None = None) -> AbstractContextManager[None]:
+    return tracer.span(name, rows)
+
+
+def enable_tracing():
+    tracer.clear()
+    tracer.enabled = True
+
+
+def disable_tracing():
+    tracer.enabled = False
+
+
+def predict_proba(model: Pipeline, X: pd.DataFrame) -> np.ndarray:
+    """`model.predict_proba`, with a span per step of the pipeline when
+    tracing is enabled."""
+
+    if not tracer.enabled:
+        return model.predict_proba(X)
+
+    X_transformed = X
+    for name, step in model.steps[:-1]:
+        with tracer.span(f"{name}.transform", rows=len(X)):
+            X_transformed = step.transform(X_transformed)
+    final_name, final_step = model.steps[-1]
+    with tracer.span(f"{final_name}.predict_proba", rows=len(X)):
+        return final_step.predict_proba(X_transformed)
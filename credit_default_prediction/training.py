@@ -3,65 +3,255 @@
 from __future__ import annotations
 
 import os
+from dataclasses import dataclass
+from typing import Any
 
 import click
 import joblib
-import numpy as np
 import pandas as pd
 import xgboost as xgb
 from dvclive.live import Live
+from sklearn.base import TransformerMixin, clone
 from sklearn.pipeline import Pipeline
 
-from credit_default_prediction import params
-from credit_default_prediction.dataset import LoanApplications
+from credit_default_prediction import params, tracing
+from credit_default_prediction.dataset import load_loan_applications
 from credit_default_prediction.experiment_tracking.dvc_experiment_tracker import (
     DVCExperimentTracker,
 )
+from credit_default_prediction.feature_engineering import (
+    FeatureEngine,
+    get_model_features,
+    record_feature_engine,
+    recorded_feature_engine,
+)
 from credit_default_prediction.hyper_params import HyperParams
-from credit_default_prediction.preprocessing import build_infered_transformers
+from credit_default_prediction.model_lineage import lineage_entry, record_lineage
+from credit_default_prediction.preprocessing import (
+    build_infered_transformers,
+    categorical_classifier_params,
+    infer_feature_types,
+)
+from credit_default_prediction.transformer_cache import (
+    TransformerCacheParams,
+    evict_least_recently_used,
+    transformer_memory,
+)
+
+
+@dataclass
+class ModelParams:
+    categorical_encoding: str = "one_hot"
+
+    @classmethod
+    def from_config(cls) -> ModelParams:
+        return cls(**params.load_stage_params("model"))
+
+
+@dataclass
+class IncrementalTrainingParams:
+    """Boosting rounds added to a trained model by an incremental run, and
+    their learning rate. Without a learning rate, the one of the trained
+    model is kept."""
+
+    n_estimators: int = 25
+    learning_rate: float | None = None
+
+    @classmethod
+    def from_config(cls) -> IncrementalTrainingParams:
+        return cls(**params.load_stage_params("incremental_training"))
 
 
-def train(X: pd.DataFrame, y: pd.Series, hyper_parameters: HyperParams):
+def fit_transform(
+    transformer: TransformerMixin, X: pd.DataFrame, y: pd.Series
+) -> tuple[TransformerMixin, Any]:
+    """Fits `transformer`, returning it along with the transformed `X`."""
+
+    X_transformed = transformer.fit_transform(X, y)
+    return transformer, X_transformed
+
+
+def train(
+    X: pd.DataFrame,
+    y: pd.Series,
+    hyper_parameters: HyperParams,
+    memory: joblib.Memory | None = None,
+    categorical_encoding: str = "one_hot",
+):
+    """Fits the training pipeline.
+
+    With a `memory`, the fitted transformers are looked up in the cache
+    before being fitted, so that only the classifier is fitted again when
+    only the hyper-parameters changed. `categorical_encoding` chooses between
+    one-hot encoded categorical features and XGBoost native categorical
+    support.
+    """
+
     # Build infered transformers
-    all_numeric_features = X.select_dtypes(include=np.number).columns.to_list()
-    all_categorical_features = X.select_dtypes(include=object).columns.to_list()
+    all_numeric_features, all_categorical_features = infer_feature_types(X)
     infered_transformers = build_infered_transformers(
         numeric_features=all_numeric_features,
         categorical_features=all_categorical_features,
+        categorical_encoding=categorical_encoding,
     )
     # Classifier
-    loan_default_classifier = xgb.XGBClassifier(**hyper_parameters.to_dict())
+    loan_default_classifier = xgb.XGBClassifier(
+        **hyper_parameters.to_dict(),
+        **categorical_classifier_params(
+            all_numeric_features, all_categorical_features, categorical_encoding
+        ),
+    )
+
+    # The steps are fitted one at a time, as `Pipeline.fit` does, so that
+    # each of them is traced
+    fit_transformers = memory.cache(fit_transform) if memory else fit_transform
+    with tracing.span("infered_transformers.fit_transform", rows=len(X)):
+        infered_transformers, X_transformed = fit_transformers(
+            infered_transformers, X, y
+        )
+    with tracing.span("classifier.fit", rows=len(X)):
+        loan_default_classifier.fit(X_transformed, y)
 
-    training_pipeline = Pipeline(
+    return Pipeline(
         steps=[
             ("infered_transformers", infered_transformers),
             ("classifier", loan_default_classifier),
         ]
     )
-    training_pipeline.fit(X, y)
 
-    return training_pipeline
+
+def train_incrementally(
+    model: Pipeline,
+    X: pd.DataFrame,
+    y: pd.Series,
+    incremental_params: IncrementalTrainingParams,
+) -> Pipeline:
+    """Continues boosting a trained pipeline on new loan applications only.
+
+    The fitted transformers are reused as they are, the new applications are
+    only transformed, and `incremental_params.n_estimators` trees are added
+    to the existing booster, so that the cost of the run depends on the new
+    applications, not on the whole history. Categories unseen by the fitted
+    transformers cannot be encoded: the model must then be trained from
+    scratch. `model` is left untouched, its recorded feature transforms
+    are carried over.
+    """
+
+    infered_transformers = model.named_steps["infered_transformers"]
+    base_classifier = model.named_steps["classifier"]
+    with tracing.span("infered_transformers.transform", rows=len(X)):
+        X_transformed = infered_transformers.transform(X)
+
+    loan_default_classifier = clone(base_classifier).set_params(
+        n_estimators=incremental_params.n_estimators
+    )
+    if incremental_params.learning_rate is not None:
+        loan_default_classifier.set_params(
+            learning_rate=incremental_params.learning_rate
+        )
+    with tracing.span("classifier.fit", rows=len(X)):
+        loan_default_classifier.fit(
+            X_transformed, y, xgb_model=base_classifier.get_booster()
+        )
+
+    incremental_model = Pipeline(
+        steps=[
+            ("infered_transformers", infered_transformers),
+            ("classifier", loan_default_classifier),
+        ]
+    )
+    feature_engine = recorded_feature_engine(model)
+    if feature_engine is not None:
+        record_feature_engine(incremental_model, feature_engine)
+
+    return incremental_model
 
 
 def save_model_artifact(model, model_path):
     joblib.dump(model, model_path)
 
 
+def train_from_config(X: pd.DataFrame, y: pd.Series) -> Pipeline:
+    """Trains the model set up in the params file, recording on it the
+    feature transforms of the params, which the training data went through.
+
+    The decision threshold is selected afterwards, on the out-of-fold
+    predictions of the cross-validation folds (see `cross_validation`).
+    """
+
+    hyperparameters = HyperParams.from_config()
+    cache_params = TransformerCacheParams.from_config()
+    memory = transformer_memory(cache_params)
+    model_params = ModelParams.from_config()
+    model = train(
+        X,
+        y,
+        hyperparameters,
+        memory,
+        categorical_encoding=model_params.categorical_encoding,
+    )
+    record_feature_engine(model, FeatureEngine.from_config())
+    evict_least_recently_used(memory, cache_params)
+
+    return model
+
+
 @click.command()
 @click.option("--train-dataset-path", help="Path to the training dataset.")
 @click.option("--model-path", help="Path where the model will be saved after training.")
-def cli(train_dataset_path: os.PathLike, model_path: os.PathLike):
-    train_dataset = LoanApplications.from_path(
+@click.option(
+    "--base-model-path",
+    default=None,
+    help="Trained model to continue boosting on the training dataset, which then only holds the new loan applications.",
+)
+@click.option(
+    "--lineage-path",
+    default=None,
+    help="JSON file recording the training runs the model went through. A full training starts a new lineage.",
+)
+def cli(
+    train_dataset_path: os.PathLike,
+    model_path: os.PathLike,
+    base_model_path: os.PathLike | None,
+    lineage_path: os.PathLike | None,
+):
+    train_dataset = load_loan_applications(
         train_dataset_path,
-        columns=params.get_important_features(),
+        columns=get_model_features(),
     )
 
     with Live() as live:
         experiment_tracker = DVCExperimentTracker(live)
 
-        hyperparameters = HyperParams.from_config()
-        model = train(train_dataset.X, train_dataset.y, hyperparameters)
+        base_boosted_rounds = 0
+        if base_model_path:
+            base_model = joblib.load(base_model_path)
+            base_boosted_rounds = (
+                base_model.named_steps["classifier"].get_booster().num_boosted_rounds()
+            )
+            model = train_incrementally(
+                base_model,
+                train_dataset.X,
+                train_dataset.y,
+                IncrementalTrainingParams.from_config(),
+            )
+        else:
+            model = train_from_config(train_dataset.X, train_dataset.y)
 
-        experiment_tracker.log_params(hyperparameters)
+        experiment_tracker.log_params(HyperParams.from_config())
+        if tracing.tracer.enabled:
+            experiment_tracker.log_timings(tracing.tracer.summary())
 
+    if lineage_path:
+        # Recorded before saving, the base model may be overwritten
+        record_lineage(
+            lineage_path,
+            lineage_entry(
+                model,
+                train_dataset_path,
+                len(train_dataset.y),
+                base_model_path,
+                base_boosted_rounds,
+            ),
+        )
     save_model_artifact(model, model_path)
@@ -0,0 +1,46 @@
+"""On-disk cache of fitted feature transformers.
+
+Fitting the infered transformers only depends on the training data and on the
+numeric and categorical columns, not on the XGBoost hyper-parameters. Their
+fitted state and transformed matrices are cached with `joblib.Memory`, under
+a hash of the input data and of the unfitted transformers, so that training,
+cross-validation and tuning runs only refit the classifier when only its
+hyper-parameters changed.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import joblib
+
+from credit_default_prediction import params
+
+
+@dataclass
+class TransformerCacheParams:
+    location: str | None = ".transformer_cache"
+    bytes_limit: int = 2**30
+
+    @classmethod
+    def from_config(cls) -> TransformerCacheParams:
+        return cls(**params.load_stage_params("transformer_cache"))
+
+
+def transformer_memory(cache_params: TransformerCacheParams) -> joblib.Memory | None:
+    """Cache of fitted transformers, or None when caching is disabled."""
+
+    if cache_params.location is None:
+        return None
+
+    return joblib.Memory(cache_params.location, verbose=0)
+
+
+def evict_least_recently_used(
+    memory: joblib.Memory | None, cache_params: TransformerCacheParams
+):
+    """Removes the least recently used cache entries until the cache
+    fits in `bytes_limit`."""
+
+    if memory is not None:
+        memory.reduce_size(bytes_limit=cache_params.bytes_limit)
@@ -0,0 +1,121 @@
+"""On-disk store of hyper-parameters tuning trials."""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+
+from credit_default_prediction.hyper_params import HyperParams
+
+
+@dataclass
+class Trial:
+    hyper_params: dict[str, float]
+    n_estimators: int
+    fold_scores: list[float]
+    best_n_estimators: int
+    fit_time: float
+    seed: int
+
+    @property
+    def score(self) -> float:
+        return float(np.mean(self.fold_scores))
+
+    def to_hyper_params(self) -> HyperParams:
+        return HyperParams.from_dict(
+            {**self.hyper_params, "n_estimators": self.best_n_estimators}
+        )
+
+
+class TrialStore:
+    """SQLite store of the trials of hyper-parameters searches.
+
+    Trials are saved as soon as they finish, under the fingerprint of the
+    dataset they were run on and a key identifying how they were evaluated.
+    A search run again on the same dataset reuses them instead of evaluating
+    the same candidates again.
+    """
+
+    def __init__(self, store_path: os.PathLike, dataset_fingerprint: str) -> None:
+        self._dataset_fingerprint = dataset_fingerprint
+        self._connection = sqlite3.connect(store_path)
+        with self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS trials (
+                    dataset_fingerprint TEXT NOT NULL,
+                    trial_key TEXT NOT NULL,
+                    hyper_params TEXT NOT NULL,
+                    n_estimators INTEGER NOT NULL,
+                    fold_scores TEXT NOT NULL,
+                    best_n_estimators INTEGER NOT NULL,
+                    fit_time REAL NOT NULL,
+                    seed INTEGER NOT NULL,
+                    finished_at TEXT NOT NULL,
+                    PRIMARY KEY (dataset_fingerprint, trial_key)
+                )
+                """
+            )
+
+    def get(self, trial_key: str) -> Trial | None:
+        row = self._connection.execute(
+            f"SELECT {_TRIAL_COLUMNS} FROM trials "
+            "WHERE dataset_fingerprint = ? AND trial_key = ?",
+            (self._dataset_fingerprint, trial_key),
+        ).fetchone()
+
+        return _trial_from_row(row) if row else None
+
+    def add(self, trial_key: str, trial: Trial):
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO trials VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self._dataset_fingerprint,
+                    trial_key,
+                    json.dumps(trial.hyper_params),
+                    trial.n_estimators,
+                    json.dumps(trial.fold_scores),
+                    trial.best_n_estimators,
+                    trial.fit_time,
+                    trial.seed,
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+
+    def trials(self) -> list[Trial]:
+        """Every trial run on the dataset, whatever the search it was part of."""
+
+        rows = self._connection.execute(
+            f"SELECT {_TRIAL_COLUMNS} FROM trials "
+            "WHERE dataset_fingerprint = ? ORDER BY finished_at",
+            (self._dataset_fingerprint,),
+        ).fetchall()
+
+        return [_trial_from_row(row) for row in rows]
+
+    def close(self):
+        self._connection.close()
+
+
+_TRIAL_COLUMNS = (
+    "hyper_params, n_estimators, fold_scores, best_n_estimators, fit_time, seed"
+)
+
+
+def _trial_from_row(row: tuple) -> Trial:
+    hyper_params, n_estimators, fold_scores, best_n_estimators, fit_time, seed = row
+
+    return Trial(
+        hyper_params=json.loads(hyper_params),
+        n_estimators=n_estimators,
+        fold_scores=json.loads(fold_scores),
+        best_n_estimators=best_n_estimators,
+        fit_time=fit_time,
+        seed=seed,
+    )
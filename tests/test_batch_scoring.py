@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.testing import assert_array_equal
+
+from credit_default_prediction.batch_scoring import batch_score
+from credit_default_prediction.feature_engineering import engineer_features
+from credit_default_prediction.hyper_params import HyperParams
+from credit_default_prediction.preprocessing import passes_preprocessing_rules
+from credit_default_prediction.storage import read_loan_data
+from credit_default_prediction.training import train
+
+
+@pytest.fixture
+def loan_applications():
+    rng = np.random.default_rng(5)
+    n_rows = 500
+    loan_int_rate = rng.uniform(5, 20, size=n_rows)
+    loan_int_rate[::13] = np.nan
+
+    return pd.DataFrame(
+        {
+            "application_id": np.arange(n_rows),
+            "person_income": rng.integers(10_000, 200_000, size=n_rows),
+            "person_emp_length": rng.integers(0, 30, size=n_rows).astype(float),
+            "loan_int_rate": loan_int_rate,
+            "loan_grade": rng.choice(["A", "B", "C"], size=n_rows),
+            "loan_amnt": rng.integers(500, 35_000, size=n_rows),
+        }
+    )
+
+
+@pytest.fixture
+def model(loan_applications):
+    X = engineer_features(loan_applications.dropna()).drop("application_id", axis=1)
+    y = (X["loan_int_rate"] > 12).astype(int)
+
+    return train(X, y, HyperParams(learning_rate=0.3))
+
+
+@pytest.mark.parametrize("output_file", ["scores.csv", "scores.parquet"])
+def test_batch_score(tmp_path, loan_applications, model, output_file):
+    """Given unlabeled loan applications,
+    When we score them in parallel chunks,
+    Then probabilities are written in input order, missing for the
+    applications rejected by the preprocessing rules,
+    and the threads of the model are left as they were."""
+
+    input_path = tmp_path / "applications.csv"
+    output_path = tmp_path / output_file
+    loan_applications.to_csv(input_path, index=False)
+    model.named_steps["classifier"].set_params(n_jobs=7)
+
+    stats = batch_score(
+        model,
+        input_path,
+        output_path,
+        chunk_size=64,
+        n_workers=3,
+        threshold=0.5,
+        id_column="application_id",
+    )
+
+    scores = read_loan_data(output_path)
+    accepted = passes_preprocessing_rules(loan_applications)
+    expected_probabilities = model.predict_proba(
+        engineer_features(loan_applications[accepted])[model.feature_names_in_]
+    )[:, 1]
+    assert stats.rows_read == stats.rows_written == len(loan_applications)
+    assert model.named_steps["classifier"].get_params()["n_jobs"] == 7
+    assert_array_equal(scores["application_id"], loan_applications["application_id"])
+    assert scores["default_probability"][~accepted].isna().all()
+    np.testing.assert_allclose(
+        scores["default_probability"][accepted], expected_probabilities, rtol=1e-6
+    )
+    assert_array_equal(
+        scores["predicted_default"][accepted], expected_probabilities > 0.5
+    )
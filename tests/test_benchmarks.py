@@ -0,0 +1,70 @@
+import pytest
+from click.testing import CliRunner
+
+from credit_default_prediction.benchmarks import (
+    BENCHMARKED_STAGES,
+    BenchmarkResult,
+    cli,
+    compare_to_baseline,
+    load_benchmark_results,
+    run_benchmarks,
+    save_benchmark_results,
+)
+
+
+def test_run_benchmarks():
+    results = run_benchmarks([5_000], repeat=1)
+
+    assert [result.stage for result in results] == BENCHMARKED_STAGES
+    for result in results:
+        assert result.n_rows == 5_000
+        assert result.seconds > 0
+        assert result.peak_memory_bytes > 0
+
+
+@pytest.mark.parametrize(
+    "current, expected_metrics",
+    [
+        (BenchmarkResult("train", 1_000, 1.2, 100), []),
+        (BenchmarkResult("train", 1_000, 1.3, 100), ["seconds"]),
+        (BenchmarkResult("train", 1_000, 1.0, 200), ["peak_memory_bytes"]),
+        (BenchmarkResult("train", 2_000, 9.0, 900), []),
+    ],
+)
+def test_compare_to_baseline(current, expected_metrics):
+    baseline = [BenchmarkResult("train", 1_000, 1.0, 100)]
+
+    regressions = compare_to_baseline([current], baseline, max_regression=0.25)
+
+    assert [regression.metric for regression in regressions] == expected_metrics
+
+
+def test_benchmark_results_round_trip(tmp_path):
+    results = [BenchmarkResult("evaluate", 30_000, 0.005, 2**20)]
+
+    save_benchmark_results(results, tmp_path / "benchmarks.json")
+
+    assert load_benchmark_results(tmp_path / "benchmarks.json") == results
+
+
+def test_regressions_fail_the_benchmark(tmp_path):
+    baseline = [BenchmarkResult("split_data", 5_000, 1e-9, 1)]
+    save_benchmark_results(baseline, tmp_path / "baseline.json")
+
+    result = CliRunner().invoke(
+        cli,
+        [
+            "--n-rows",
+            "5000",
+            "--repeat",
+            "1",
+            "--output-path",
+            str(tmp_path / "benchmarks.json"),
+            "--baseline-path",
+            str(tmp_path / "baseline.json"),
+        ],
+    )
+
+    assert result.exit_code == 1
+    assert "split_data (5000 rows): seconds went from" in result.output
+    assert (tmp_path / "benchmarks.json").exists()
@@ -0,0 +1,78 @@
+import json
+import subprocess
+import sys
+import time
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from credit_default_prediction.cli import SUBCOMMANDS, cli
+
+# Cold start budget of `credit_default_prediction --help`
+STARTUP_TIME_BUDGET_SECONDS = 0.5
+HEAVY_MODULES = ["pandas", "sklearn", "xgboost", "dvclive", "pyarrow"]
+
+
+@pytest.mark.parametrize("cmd_name", sorted(SUBCOMMANDS))
+def test_subcommands_are_loaded_on_use(cmd_name):
+    command = cli.get_command(click.Context(cli), cmd_name)
+
+    assert isinstance(command, click.Command)
+    result = CliRunner().invoke(cli, [cmd_name, "--help"])
+    assert result.exit_code == 0, result.output
+
+
+def test_help_does_not_import_heavy_modules():
+    """Given the CLI dispatcher,
+    When we list its commands,
+    Then none of the heavy dependencies of the commands is imported."""
+
+    script = (
+        "import json, sys\n"
+        "from click.testing import CliRunner\n"
+        "from credit_default_prediction.cli import cli\n"
+        "CliRunner().invoke(cli, ['--help'])\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+
+    assert json.loads(output) == []
+
+
+def test_help_cold_start_time():
+    cold_start_times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "credit_default_prediction", "--help"],
+            capture_output=True,
+            check=True,
+        )
+        cold_start_times.append(time.perf_counter() - start)
+
+    assert min(cold_start_times) < STARTUP_TIME_BUDGET_SECONDS
+
+
+def test_params_overrides(mocker):
+    set_overrides = mocker.patch("credit_default_prediction.params.set_overrides")
+
+    result = CliRunner().invoke(
+        cli, ["--set", "train.learning_rate=0.1", "train", "--help"]
+    )
+
+    assert result.exit_code == 0, result.output
+    set_overrides.assert_called_once_with(("train.learning_rate=0.1",))
+
+
+def test_trace_path(tmp_path):
+    trace_path = tmp_path / "trace.json"
+
+    result = CliRunner().invoke(
+        cli, ["--trace-path", str(trace_path), "split", "--help"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert json.loads(trace_path.read_text())["traceEvents"] == []
@@ -0,0 +1,218 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+from numpy.testing import assert_array_equal
+
+from credit_default_prediction.compiled_model import (
+    CompiledModel,
+    compile_pipeline,
+    prediction_iteration_range,
+)
+from credit_default_prediction.feature_engineering import (
+    FeatureEngine,
+    FeatureTransform,
+    engineer_features,
+    record_feature_engine,
+)
+from credit_default_prediction.hyper_params import HyperParams
+from credit_default_prediction.training import train
+
+
+@pytest.fixture
+def clean_loan_applications():
+    rng = np.random.default_rng(7)
+    n_rows = 300
+    person_emp_length = rng.integers(0, 30, size=n_rows).astype(float)
+    person_emp_length[::11] = np.nan
+
+    return pd.DataFrame(
+        {
+            "person_income": rng.integers(10_000, 200_000, size=n_rows),
+            "person_emp_length": person_emp_length,
+            "loan_int_rate": rng.uniform(5, 20, size=n_rows),
+            "loan_amnt": rng.integers(500, 35_000, size=n_rows),
+            "loan_grade": rng.choice(["A", "B", "C"], size=n_rows),
+            "loan_intent": rng.choice(["EDUCATION", "MEDICAL"], size=n_rows),
+            "loan_status": rng.integers(0, 2, size=n_rows),
+        }
+    )
+
+
+@pytest.fixture
+def model(clean_loan_applications):
+    feature_engineered = engineer_features(clean_loan_applications)
+    X = feature_engineered.drop("loan_status", axis=1)
+
+    model = train(X, feature_engineered["loan_status"], HyperParams(learning_rate=0.3))
+
+    return record_feature_engine(model, FeatureEngine.from_config())
+
+
+def test_compiled_model_matches_trained_pipeline(model, clean_loan_applications):
+    """Given a trained pipeline and preprocessed loan applications,
+    When we score them with the compiled pipeline,
+    Then we get exactly the probabilities of the trained pipeline."""
+
+    X = clean_loan_applications.drop("loan_status", axis=1)
+    compiled_model = compile_pipeline(model)
+
+    probabilities = compiled_model.predict_proba(compiled_model.transform(X))
+
+    expected_probabilities = model.predict_proba(engineer_features(X))[:, 1]
+    assert_array_equal(probabilities, expected_probabilities)
+
+
+def test_compiled_model_feature_matrix_layout(model, clean_loan_applications):
+    compiled_model = compile_pipeline(model)
+
+    features = compiled_model.transform(clean_loan_applications)
+
+    assert features.dtype == np.float32
+    assert features.flags.c_contiguous
+    assert features.shape == (len(clean_loan_applications), 9)
+
+
+def test_saved_compiled_model_scores_identically(
+    tmp_path, model, clean_loan_applications
+):
+    compiled_model_path = tmp_path / "model.npz"
+    compiled_model = compile_pipeline(model)
+    compiled_model.save(compiled_model_path)
+
+    loaded_model = CompiledModel.load(compiled_model_path)
+
+    features = compiled_model.transform(clean_loan_applications)
+    assert_array_equal(
+        loaded_model.predict_proba(loaded_model.transform(clean_loan_applications)),
+        compiled_model.predict_proba(features),
+    )
+
+
+def test_compiled_model_rejects_unknown_categories(model, clean_loan_applications):
+    loan_applications = clean_loan_applications.head(3).copy()
+    loan_applications["loan_grade"] = ["A", "Z", "B"]
+
+    with pytest.raises(ValueError, match="loan_grade"):
+        compile_pipeline(model).transform(loan_applications)
+
+
+@pytest.fixture
+def native_model(clean_loan_applications):
+    feature_engineered = engineer_features(clean_loan_applications)
+    X = feature_engineered.drop("loan_status", axis=1)
+
+    native_model = train(
+        X,
+        feature_engineered["loan_status"],
+        HyperParams(learning_rate=0.3),
+        categorical_encoding="native",
+    )
+
+    return record_feature_engine(native_model, FeatureEngine.from_config())
+
+
+def test_compiled_native_model_matches_trained_pipeline(
+    tmp_path, native_model, clean_loan_applications
+):
+    """Given a pipeline trained with native categorical support,
+    When we score loan applications with the saved compiled pipeline,
+    Then each categorical feature is a single column of category codes,
+    we get exactly the probabilities of the trained pipeline
+    and the decision threshold is saved with the compiled pipeline."""
+
+    X = clean_loan_applications.drop("loan_status", axis=1)
+    compiled_model_path = tmp_path / "model.npz"
+    compile_pipeline(native_model, decision_threshold=0.3).save(compiled_model_path)
+    compiled_model = CompiledModel.load(compiled_model_path)
+
+    features = compiled_model.transform(X)
+    probabilities = compiled_model.predict_proba(features)
+
+    assert features.shape == (len(X), 6)
+    assert compiled_model.decision_threshold == 0.3
+    expected_probabilities = native_model.predict_proba(engineer_features(X))[:, 1]
+    assert_array_equal(probabilities, expected_probabilities)
+
+
+def test_compiled_model_computes_derived_features(tmp_path, clean_loan_applications):
+    """Given a saved pipeline trained on derived features,
+    When we compile it and score preprocessed loan applications with the saved
+    compiled model,
+    Then the derived features are computed from the transforms recorded on
+    the pipeline, not from the ones of the params,
+    and we get exactly the probabilities of the trained pipeline."""
+
+    feature_engine = FeatureEngine(
+        [
+            FeatureTransform("log1p", ["person_income"]),
+            FeatureTransform(
+                "ratio", ["loan_amnt", "person_income"], name="loan_to_income"
+            ),
+            FeatureTransform(
+                "bin", ["loan_int_rate"], name="loan_int_rate_bin", bins=[8, 12, 16]
+            ),
+        ]
+    )
+    feature_engineered = feature_engine.transform(clean_loan_applications)
+    model = train(
+        feature_engineered.drop("loan_status", axis=1),
+        feature_engineered["loan_status"],
+        HyperParams(learning_rate=0.3),
+    )
+    joblib.dump(record_feature_engine(model, feature_engine), tmp_path / "model.pkl")
+    compiled_model_path = tmp_path / "model.npz"
+    compile_pipeline(joblib.load(tmp_path / "model.pkl")).save(compiled_model_path)
+    compiled_model = CompiledModel.load(compiled_model_path)
+
+    X = clean_loan_applications.drop("loan_status", axis=1)
+    probabilities = compiled_model.predict_proba(compiled_model.transform(X))
+
+    assert "loan_to_income" not in compiled_model.input_features
+    expected_probabilities = model.predict_proba(feature_engine.transform(X))[:, 1]
+    assert_array_equal(probabilities, expected_probabilities)
+
+
+def test_pipelines_without_recorded_transforms_are_not_compiled(
+    clean_loan_applications,
+):
+    feature_engineered = engineer_features(clean_loan_applications)
+    model = train(
+        feature_engineered.drop("loan_status", axis=1),
+        feature_engineered["loan_status"],
+        HyperParams(learning_rate=0.3),
+    )
+
+    with pytest.raises(ValueError, match="feature transforms"):
+        compile_pipeline(model)
+    compiled_model = compile_pipeline(model, FeatureEngine.from_config())
+    assert compiled_model.feature_engine.to_params() == (
+        FeatureEngine.from_config().to_params()
+    )
+
+
+def test_prediction_iteration_range_stops_at_the_best_iteration():
+    """Given classifiers trained with and without early stopping,
+    When we get the boosting rounds they predict with,
+    Then the booster predicts with them as the classifier does."""
+
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(300, 3))
+    y = (X[:, 0] + rng.normal(size=300) > 0).astype(int)
+    classifier = xgb.XGBClassifier(n_estimators=20).fit(X, y)
+    early_stopped_classifier = xgb.XGBClassifier(
+        n_estimators=200, learning_rate=0.5, early_stopping_rounds=3
+    ).fit(X[:200], y[:200], eval_set=[(X[200:], y[200:])], verbose=False)
+
+    assert prediction_iteration_range(classifier) == (0, 20)
+    assert prediction_iteration_range(early_stopped_classifier) == (
+        0,
+        early_stopped_classifier.best_iteration + 1,
+    )
+    assert prediction_iteration_range(early_stopped_classifier)[1] < 200
+    for fitted_classifier in [classifier, early_stopped_classifier]:
+        probabilities = fitted_classifier.get_booster().inplace_predict(
+            X, iteration_range=prediction_iteration_range(fitted_classifier)
+        )
+        assert_array_equal(probabilities, fitted_classifier.predict_proba(X)[:, 1])
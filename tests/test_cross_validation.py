@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import KFold, cross_val_predict
+
+from credit_default_prediction.cross_validation import (
+    CrossValidationParams,
+    cross_validate_model,
+)
+
+
+class FitCountingClassifier(LogisticRegression):
+    fit_calls = 0
+
+    def fit(self, X, y, sample_weight=None):
+        FitCountingClassifier.fit_calls += 1
+        return super().fit(X, y, sample_weight)
+
+
+@pytest.fixture
+def loan_features():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {
+            "loan_int_rate": rng.uniform(5, 20, size=100),
+            "loan_percent_income": rng.uniform(0, 1, size=100),
+        }
+    )
+    y = pd.Series((X["loan_int_rate"] > 12).astype(int).to_numpy(), name="loan_status")
+
+    return X, y
+
+
+def test_each_fold_is_fitted_once_for_all_metrics(loan_features):
+    """Given loan applications and several metrics to compute,
+    When we cross-validate a model on them,
+    Then the model is fitted exactly once per fold."""
+
+    X, y = loan_features
+    FitCountingClassifier.fit_calls = 0
+    cv_params = CrossValidationParams(n_splits=5, n_jobs=1)
+
+    cv_results = cross_validate_model(FitCountingClassifier(), X, y, cv_params)
+
+    assert FitCountingClassifier.fit_calls == 5
+    assert set(cv_results.fold_scores) == {"accuracy", "precision", "recall", "roc_auc"}
+    assert all(len(scores) == 5 for scores in cv_results.fold_scores.values())
+    assert len(cv_results.fit_times) == 5
+
+
+def test_cross_validation_summary(loan_features):
+    """Given cross-validation results,
+    When we summarize them,
+    Then every metric and timing is averaged over the folds."""
+
+    X, y = loan_features
+    cv_params = CrossValidationParams(n_splits=3, scoring=["accuracy", "roc_auc"])
+
+    summary = cross_validate_model(LogisticRegression(), X, y, cv_params).summary()
+
+    assert set(summary) == {
+        "avg_accuracy",
+        "avg_roc_auc",
+        "avg_fit_time",
+        "avg_score_time",
+    }
+    assert 0 <= summary["avg_accuracy"] <= 1
+
+
+def test_out_of_fold_scores_reuse_the_folds(loan_features):
+    """Given loan applications,
+    When we cross-validate a model on them with out-of-fold predictions,
+    Then no other model than the fold ones is fitted
+    and each application is scored by the model of the fold it was left out of."""
+
+    X, y = loan_features
+    FitCountingClassifier.fit_calls = 0
+    cv_params = CrossValidationParams(n_splits=5, n_jobs=1)
+
+    cv_results = cross_validate_model(
+        FitCountingClassifier(), X, y, cv_params, out_of_fold=True
+    )
+
+    assert FitCountingClassifier.fit_calls == 5
+    expected_scores = cross_val_predict(
+        LogisticRegression(),
+        X,
+        y,
+        cv=KFold(n_splits=5, shuffle=True, random_state=42),
+        method="predict_proba",
+    )[:, 1]
+    np.testing.assert_allclose(cv_results.out_of_fold_scores, expected_scores)
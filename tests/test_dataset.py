@@ -1,8 +1,14 @@
+import numpy as np
 import pandas as pd
 import pytest
 from pandas.testing import assert_frame_equal, assert_series_equal
 
-from credit_default_prediction.dataset import LoanApplications
+from credit_default_prediction.dataset import (
+    LoanApplications,
+    MappedLoanApplications,
+    load_loan_applications,
+)
+from credit_default_prediction.storage import write_loan_data
 
 
 @pytest.fixture
@@ -61,3 +67,38 @@ def test_collect_loan_dataset_from_path(dummy_dataset_path):
     expected_dataset = LoanApplications(X=X, y=y)
     assert_frame_equal(expected_dataset.X, actual_dataset.X)
     assert_series_equal(expected_dataset.y, expected_dataset.y)
+
+
+def test_mapped_loan_dataset_views(tmp_path):
+    """Given loan applications saved as an Arrow IPC file,
+    When we memory-map them,
+    Then features, labels and data share the memory of the mapped columns."""
+
+    dataset_path = tmp_path / "data.arrow"
+    write_loan_data(
+        pd.DataFrame(
+            {
+                "person_age": [22, 25, 40],
+                "person_income": [35000.0, 45000.0, 52000.0],
+                "loan_intent": ["PERSONAL", "MEDICAL", "VENTURE"],
+                "loan_status": [0, 1, 1],
+            }
+        ),
+        dataset_path,
+    )
+
+    dataset = load_loan_applications(dataset_path)
+
+    assert isinstance(dataset, MappedLoanApplications)
+    mapped_income = dataset.data["person_income"].to_numpy()
+    assert not mapped_income.flags.writeable
+    assert np.shares_memory(dataset.X["person_income"].to_numpy(), mapped_income)
+    assert np.shares_memory(
+        dataset.y.to_numpy(), dataset.data["loan_status"].to_numpy()
+    )
+    assert dataset.X.columns.to_list() == [
+        "person_age",
+        "person_income",
+        "loan_intent",
+    ]
+    assert dataset.y.to_list() == [0, 1, 1]
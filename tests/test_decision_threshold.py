@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import confusion_matrix
+
+from credit_default_prediction.cross_validation import (
+    CrossValidationParams,
+    cross_validate_model,
+)
+from credit_default_prediction.decision_threshold import (
+    DecisionCosts,
+    DecisionThresholdParams,
+    load_decision_threshold,
+    recall_at_approval_rate,
+    save_decision_threshold,
+    select_decision_threshold,
+    threshold_sweep,
+)
+from credit_default_prediction.hyper_params import HyperParams
+from credit_default_prediction.training import train
+
+
+@pytest.fixture
+def scores():
+    rng = np.random.default_rng(1)
+    y_true = rng.integers(0, 2, size=300)
+    y_score = np.clip(0.3 * y_true + rng.uniform(0, 0.7, size=300), 0, 1)
+
+    return y_true, y_score
+
+
+def test_threshold_sweep_counts(scores):
+    y_true, y_score = scores
+    y_score = np.round(y_score, 1)
+    thresholds = np.array([0.0, 0.25, 0.3, 0.5, 0.9, 1.0])
+
+    sweep = threshold_sweep(y_true, y_score, thresholds)
+
+    for threshold, row in zip(thresholds, sweep.itertuples()):
+        tn, fp, fn, tp = confusion_matrix(
+            y_true, y_score > threshold, labels=[0, 1]
+        ).ravel()
+        assert (row.tp, row.fp, row.tn, row.fn) == (tp, fp, tn, fn)
+        assert row.approval_rate == pytest.approx((tn + fn) / len(y_true))
+
+
+def test_threshold_sweep_covers_every_distinct_score(scores):
+    """Given predicted probabilities,
+    When we sweep thresholds without giving any,
+    Then every decision from rejecting to approving every application is covered
+    and the expected loss is the brute-force expected loss."""
+
+    y_true, y_score = scores
+    costs = DecisionCosts(false_positive=1.0, false_negative=5.0)
+
+    sweep = threshold_sweep(y_true, y_score, costs=costs)
+
+    assert len(sweep) == len(np.unique(y_score)) + 1
+    assert sweep["approval_rate"].iloc[0] == 0.0
+    assert sweep["approval_rate"].iloc[-1] == 1.0
+    for row in sweep.sample(20, random_state=0).itertuples():
+        y_pred = y_score > row.threshold
+        expected_loss = (
+            np.sum(y_pred & (y_true == 0)) * 1.0 + np.sum(~y_pred & (y_true == 1)) * 5.0
+        ) / len(y_true)
+        assert row.expected_loss == pytest.approx(expected_loss)
+
+
+def test_select_decision_threshold_minimizes_expected_loss(scores):
+    y_true, y_score = scores
+    threshold_params = DecisionThresholdParams(
+        costs=DecisionCosts(false_positive=1.0, false_negative=5.0)
+    )
+
+    decision_threshold = select_decision_threshold(y_true, y_score, threshold_params)
+
+    sweep = threshold_sweep(y_true, y_score, costs=threshold_params.costs)
+    assert decision_threshold["expected_loss"] == sweep["expected_loss"].min()
+    # Missed defaults cost more than rejected applicants, the cutoff is lowered
+    assert decision_threshold["threshold"] < 0.5
+
+
+def test_recall_at_approval_rate():
+    sweep = pd.DataFrame(
+        {"approval_rate": [0.0, 0.4, 0.8, 1.0], "recall": [1.0, 0.9, 0.6, 0.0]}
+    )
+
+    assert recall_at_approval_rate(sweep, 0.8) == 0.6
+    assert recall_at_approval_rate(sweep, 0.5) == 0.9
+
+
+def test_decision_threshold_is_selected_out_of_fold(tmp_path):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {
+            "loan_int_rate": rng.uniform(5, 20, size=200),
+            "loan_grade": rng.choice(["A", "B", "C"], size=200),
+        }
+    )
+    y = pd.Series((X["loan_int_rate"] > 15).astype(int), name="loan_status")
+    model = train(X, y, HyperParams(learning_rate=0.3))
+    threshold_params = DecisionThresholdParams()
+
+    y_score = cross_validate_model(
+        model, X, y, CrossValidationParams(n_splits=3), out_of_fold=True
+    ).out_of_fold_scores
+    decision_threshold = select_decision_threshold(
+        y.to_numpy(), y_score, threshold_params
+    )
+    decision_threshold_path = tmp_path / "decision_threshold.json"
+    save_decision_threshold(
+        decision_threshold, threshold_params, decision_threshold_path
+    )
+
+    assert y_score.shape == (200,)
+    assert (
+        load_decision_threshold(decision_threshold_path)
+        == decision_threshold["threshold"]
+    )
+    assert decision_threshold["recall"] > 0.9
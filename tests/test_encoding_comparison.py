@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from credit_default_prediction.encoding_comparison import (
+    compare_categorical_encodings,
+    format_comparison,
+)
+from credit_default_prediction.hyper_params import HyperParams
+
+
+def test_compare_categorical_encodings():
+    """Given loan applications with categorical features,
+    When we compare the one-hot and native categorical encodings,
+    Then the native encoding feeds a narrower matrix to XGBoost."""
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {
+            "loan_int_rate": rng.uniform(5, 20, size=200),
+            "loan_grade": rng.choice(list("ABCDEFG"), size=200),
+            "loan_intent": rng.choice(["EDUCATION", "MEDICAL", "VENTURE"], size=200),
+        }
+    )
+    y = pd.Series((X["loan_grade"] > "C").astype(int), name="loan_status")
+
+    one_hot, native = compare_categorical_encodings(
+        X[:150], y[:150], X[150:], y[150:], HyperParams(learning_rate=0.3)
+    )
+
+    assert (one_hot.categorical_encoding, native.categorical_encoding) == (
+        "one_hot",
+        "native",
+    )
+    assert one_hot.n_features == 11
+    assert native.n_features == 3
+    assert native.roc_auc > 0.9
+    assert "native vs one_hot" in format_comparison([one_hot, native])
@@ -1,8 +1,24 @@
+import numpy as np
 import pandas as pd
 import pytest
+from numpy.testing import assert_array_equal
 from pandas.testing import assert_frame_equal
+from sklearn.metrics import accuracy_score, precision_score, recall_score, roc_auc_score
 
-from credit_default_prediction.evaluation import generate_feature_importance_data
+from credit_default_prediction.dataset import LoanApplications
+from credit_default_prediction.decision_threshold import (
+    DecisionCosts,
+    DecisionThresholdParams,
+)
+from credit_default_prediction.evaluation import (
+    HoldoutPredictions,
+    evaluate,
+    generate_feature_importance_data,
+    predict_test_set,
+)
+from credit_default_prediction.hyper_params import HyperParams
+from credit_default_prediction.inference import rule_based_preparation
+from credit_default_prediction.training import train
 
 
 @pytest.fixture
@@ -31,3 +47,99 @@ def test_generate_feature_importance_data(model):
         }
     )
     assert_frame_equal(actual_series, expected_series)
+
+
+@pytest.fixture
+def test_loan_data():
+    rng = np.random.default_rng(3)
+    n_rows = 400
+    loan_int_rate = rng.uniform(5, 20, size=n_rows)
+    loan_int_rate[::17] = np.nan
+
+    return pd.DataFrame(
+        {
+            "person_income": rng.integers(10_000, 200_000, size=n_rows),
+            "person_emp_length": rng.integers(0, 30, size=n_rows).astype(float),
+            "person_age": rng.integers(18, 70, size=n_rows),
+            "loan_percent_income": rng.uniform(0, 0.8, size=n_rows),
+            "loan_int_rate": loan_int_rate,
+            "loan_grade": rng.choice(["A", "B", "C"], size=n_rows),
+            "loan_amnt": rng.integers(500, 35_000, size=n_rows),
+            "loan_intent": rng.choice(["EDUCATION", "MEDICAL"], size=n_rows),
+            "person_home_ownership": rng.choice(["OWN", "RENT"], size=n_rows),
+            "loan_status": rng.integers(0, 2, size=n_rows),
+        }
+    )
+
+
+@pytest.fixture
+def trained_model(test_loan_data):
+    test_dataset = LoanApplications.from_dataframe(
+        rule_based_preparation(test_loan_data)
+    )
+
+    return train(test_dataset.X, test_dataset.y, HyperParams(learning_rate=0.3))
+
+
+def test_test_set_is_scored_in_a_single_pass(tmp_path, test_loan_data, trained_model):
+    """Given a test set,
+    When we score it chunk by chunk,
+    Then we get the probabilities of the prepared test set scored at once."""
+
+    test_dataset_path = tmp_path / "test.csv"
+    test_loan_data.to_csv(test_dataset_path, index=False)
+
+    predictions = predict_test_set(trained_model, test_dataset_path, chunk_size=64)
+
+    test_dataset = LoanApplications.from_dataframe(
+        rule_based_preparation(test_loan_data)
+    )
+    assert_array_equal(predictions.y_true, test_dataset.y)
+    assert_array_equal(
+        predictions.y_score, trained_model.predict_proba(test_dataset.X)[:, 1]
+    )
+    assert_array_equal(predictions.y_pred, trained_model.predict(test_dataset.X))
+
+
+@pytest.mark.parametrize("chunk_size", [None, 64])
+def test_test_set_without_valid_applications(
+    tmp_path, test_loan_data, trained_model, chunk_size
+):
+    test_dataset_path = tmp_path / "test.csv"
+    test_loan_data.assign(loan_int_rate=np.nan).to_csv(test_dataset_path, index=False)
+
+    with pytest.raises(ValueError, match="passed the preprocessing rules"):
+        predict_test_set(trained_model, test_dataset_path, chunk_size=chunk_size)
+
+
+def test_evaluate_matches_sklearn_metrics():
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, size=500)
+    y_score = rng.uniform(size=500)
+    predictions = HoldoutPredictions(y_true=y_true, y_score=y_score)
+
+    metrics = evaluate(predictions)
+
+    y_pred = y_score > 0.5
+    assert metrics["accuracy"] == pytest.approx(accuracy_score(y_true, y_pred))
+    assert metrics["precision"] == pytest.approx(precision_score(y_true, y_pred))
+    assert metrics["recall"] == pytest.approx(recall_score(y_true, y_pred))
+    assert metrics["ROC_AUC"] == pytest.approx(roc_auc_score(y_true, y_score))
+
+
+def test_evaluate_at_decision_threshold():
+    y_true = np.array([0, 0, 1, 1, 0, 1])
+    y_score = np.array([0.1, 0.3, 0.35, 0.6, 0.7, 0.9])
+    predictions = HoldoutPredictions(y_true=y_true, y_score=y_score, threshold=0.3)
+    threshold_params = DecisionThresholdParams(
+        costs=DecisionCosts(false_positive=1.0, false_negative=5.0),
+        target_approval_rate=0.5,
+    )
+
+    metrics = evaluate(predictions, threshold_params)
+
+    assert metrics["recall"] == 1.0
+    assert metrics["precision"] == 0.75
+    assert metrics["approval_rate"] == pytest.approx(2 / 6)
+    assert metrics["expected_loss"] == pytest.approx(1 / 6)
+    assert metrics["recall_at_approval_rate"] == pytest.approx(2 / 3)
@@ -1,8 +1,12 @@
 import numpy as np
 import pandas as pd
+import pytest
 from pandas.testing import assert_frame_equal
 
 from credit_default_prediction.feature_engineering import (
+    LARGE_FEATURES,
+    FeatureEngine,
+    FeatureTransform,
     engineer_features,
     log_transform_large_features,
 )
@@ -101,3 +105,106 @@ def test_log_transformation_for_large_features():
         expected_clean_loan_data,
         actual_clean_loan_data,
     )
+
+
+def test_feature_engine_derived_features():
+    """Given preprocessed loan applications,
+    When we apply ratio, binning and interaction transforms,
+    Then the derived features are added next to the original columns."""
+
+    loan_data = pd.DataFrame(
+        {
+            "loan_amnt": [5000, 6000, 9600, 1000],
+            "person_income": [50000.0, 0.0, 48000.0, np.nan],
+            "person_age": [22.0, 25.0, 51.0, np.nan],
+        }
+    )
+    feature_engine = FeatureEngine(
+        [
+            FeatureTransform(
+                "ratio", ["loan_amnt", "person_income"], name="loan_to_income"
+            ),
+            FeatureTransform(
+                "bin", ["person_age"], name="person_age_bin", bins=[25, 35, 50]
+            ),
+            FeatureTransform(
+                "interaction", ["loan_amnt", "person_age"], name="amount_times_age"
+            ),
+        ]
+    )
+
+    engineered_data = feature_engine.transform(loan_data)
+
+    expected_data = loan_data.assign(
+        loan_to_income=[0.1, np.nan, 0.2, np.nan],
+        person_age_bin=[0.0, 1.0, 3.0, np.nan],
+        amount_times_age=[110000.0, 150000.0, 489600.0, np.nan],
+    )
+    assert_frame_equal(engineered_data, expected_data)
+    assert feature_engine.derived_features == [
+        "loan_to_income",
+        "person_age_bin",
+        "amount_times_age",
+    ]
+
+
+def test_feature_engine_transforms_in_order():
+    loan_data = pd.DataFrame(
+        {"loan_amnt": [0.0, np.e - 1], "person_income": [1.0, 2.0]}
+    )
+    feature_engine = FeatureEngine(
+        [
+            FeatureTransform("log1p", ["loan_amnt"]),
+            FeatureTransform(
+                "ratio", ["loan_amnt", "person_income"], name="loan_to_income"
+            ),
+        ]
+    )
+
+    engineered_data = feature_engine.transform(loan_data)
+
+    np.testing.assert_allclose(engineered_data["loan_to_income"], [0.0, 0.5])
+
+
+def test_feature_engine_only_copies_when_asked():
+    """Given loan applications,
+    When we engineer their features,
+    Then the input is left untouched and untransformed columns are shared,
+    unless the features are engineered in place."""
+
+    loan_data = pd.DataFrame(
+        {
+            "loan_amnt": [5000.0, 6000.0],
+            "person_income": [50000.0, 48000.0],
+            "loan_int_rate": [11.14, 12.87],
+        }
+    )
+    original_loan_data = loan_data.copy()
+    feature_engine = FeatureEngine([FeatureTransform("log1p", LARGE_FEATURES)])
+
+    engineered_data = feature_engine.transform(loan_data)
+
+    assert_frame_equal(loan_data, original_loan_data)
+    assert np.shares_memory(
+        engineered_data["loan_int_rate"].to_numpy(),
+        loan_data["loan_int_rate"].to_numpy(),
+    )
+
+    feature_engine.transform(loan_data, inplace=True)
+
+    assert_frame_equal(loan_data, engineered_data)
+
+
+@pytest.mark.parametrize(
+    "transform",
+    [
+        {"type": "sqrt", "columns": ["loan_amnt"]},
+        {"type": "log1p", "columns": ["loan_amnt"], "name": "log_loan_amnt"},
+        {"type": "ratio", "columns": ["loan_amnt"], "name": "loan_ratio"},
+        {"type": "interaction", "columns": ["loan_amnt", "person_income"]},
+        {"type": "bin", "columns": ["person_age"], "name": "age_bin", "bins": [50, 25]},
+    ],
+)
+def test_invalid_feature_transforms(transform):
+    with pytest.raises(ValueError):
+        FeatureTransform(**transform)
@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+from credit_default_prediction import hyperparams_tuning
+from credit_default_prediction.hyperparams_tuning import (
+    ParamRange,
+    TPESampler,
+    Trial,
+    TuningParams,
+    best_trial,
+    evaluate_trial,
+    successive_halving,
+    tune,
+)
+from credit_default_prediction.trial_store import TrialStore
+
+SEARCH_SPACE = {
+    "learning_rate": ParamRange(low=0.01, high=0.5, log=True),
+    "max_depth": ParamRange(low=3, high=9, integer=True),
+}
+
+
+def make_trial(hyper_params, n_estimators, score):
+    return Trial(
+        hyper_params=hyper_params,
+        n_estimators=n_estimators,
+        fold_scores=[score],
+        best_n_estimators=n_estimators,
+        fit_time=0.0,
+        seed=0,
+    )
+
+
+def test_n_estimators_budgets():
+    tuning_params = TuningParams(
+        search_space=SEARCH_SPACE,
+        min_n_estimators=25,
+        max_n_estimators=400,
+        reduction_factor=3,
+    )
+
+    assert tuning_params.n_estimators_budgets == [25, 75, 225, 400]
+
+
+def test_successive_halving_keeps_best_candidates():
+    """Given 27 candidates and a reduction factor of 3,
+    When we run successive halving,
+    Then each rung evaluates the best third of the previous rung
+    with a bigger budget."""
+
+    tuning_params = TuningParams(
+        search_space=SEARCH_SPACE,
+        n_trials=27,
+        min_n_estimators=10,
+        max_n_estimators=270,
+        reduction_factor=3,
+    )
+    evaluated = []
+
+    def evaluate(candidates, n_estimators):
+        evaluated.append((len(candidates), n_estimators))
+        return [
+            make_trial(candidate, n_estimators, score=candidate["learning_rate"])
+            for candidate in candidates
+        ]
+
+    trials = successive_halving(evaluate, tuning_params, np.random.default_rng(0))
+
+    assert evaluated == [(27, 10), (9, 30), (3, 90), (1, 270)]
+    assert best_trial(trials).hyper_params["learning_rate"] == max(
+        trial.hyper_params["learning_rate"] for trial in trials
+    )
+
+
+def test_tpe_sampler_stays_in_search_space():
+    rng = np.random.default_rng(0)
+    trials = [
+        make_trial(
+            {
+                "learning_rate": float(rng.uniform(0.01, 0.5)),
+                "max_depth": int(rng.integers(3, 10)),
+            },
+            n_estimators=100,
+            score=float(rng.uniform()),
+        )
+        for _ in range(12)
+    ]
+    sampler = TPESampler(SEARCH_SPACE, n_startup_trials=10, seed=1)
+
+    for _ in range(20):
+        sample = sampler.sample(trials)
+        assert 0.01 <= sample["learning_rate"] <= 0.5
+        assert sample["max_depth"] in range(3, 10)
+        assert isinstance(sample["max_depth"], int)
+
+
+@pytest.fixture
+def loan_features():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {
+            "loan_int_rate": rng.uniform(5, 20, size=120),
+            "loan_grade": rng.choice(["A", "B", "C"], size=120),
+        }
+    )
+    y = pd.Series((X["loan_int_rate"] > 12).astype(int), name="loan_status")
+
+    return X, y
+
+
+def small_tuning_params(strategy):
+    return TuningParams(
+        search_space=SEARCH_SPACE,
+        strategy=strategy,
+        n_trials=3,
+        n_jobs=1,
+        min_n_estimators=5,
+        max_n_estimators=15,
+        n_startup_trials=2,
+    )
+
+
+@pytest.mark.parametrize("strategy", ["halving", "tpe"])
+def test_tune(loan_features, strategy):
+    X, y = loan_features
+
+    trials = tune(X, y, small_tuning_params(strategy))
+
+    best_hyper_params = best_trial(trials).to_hyper_params()
+    assert 1 <= best_hyper_params.n_estimators <= 15
+    assert all(0 <= trial.score <= 1 for trial in trials)
+
+
+def test_early_stopping_holds_out_part_of_the_training_fold(mocker, loan_features):
+    """Given a candidate to cross-validate on 3 folds,
+    When we evaluate it,
+    Then boosting stops early on a fifth of the training part of each fold,
+    held out from fitting, and never on the validation part."""
+
+    X, y = loan_features
+    fit = mocker.spy(xgb.XGBClassifier, "fit")
+
+    evaluate_trial(
+        X,
+        y,
+        {"learning_rate": 0.3},
+        n_estimators=10,
+        tuning_params=small_tuning_params("halving"),
+    )
+
+    # 80 training and 40 validation rows per fold
+    assert fit.call_count == 3
+    for call in fit.call_args_list:
+        ((X_stopping, _),) = call.kwargs["eval_set"]
+        assert call.args[1].shape[0] == 64
+        assert X_stopping.shape[0] == 16
+
+
+def test_interrupted_tuning_resumes_from_trial_store(
+    tmp_path, monkeypatch, loan_features
+):
+    """Given a search whose trials were saved to a trial store,
+    When we run the same search again,
+    Then no trial is evaluated again."""
+
+    X, y = loan_features
+    trial_store = TrialStore(tmp_path / "trials.sqlite", dataset_fingerprint="abc")
+    first_trials = tune(X, y, small_tuning_params("halving"), trial_store=trial_store)
+
+    evaluated_trials = []
+    evaluate_trial = hyperparams_tuning.evaluate_trial
+
+    def counting_evaluate_trial(*args):
+        evaluated_trials.append(args)
+        return evaluate_trial(*args)
+
+    monkeypatch.setattr(hyperparams_tuning, "evaluate_trial", counting_evaluate_trial)
+    resumed_trials = tune(X, y, small_tuning_params("halving"), trial_store=trial_store)
+
+    assert evaluated_trials == []
+    assert best_trial(resumed_trials) == best_trial(first_trials)
+
+
+def test_cli_resumes_interrupted_searches_by_default():
+    (warm_start_option,) = [
+        param for param in hyperparams_tuning.cli.params if param.name == "warm_start"
+    ]
+
+    assert warm_start_option.default is False
+
+
+def test_tuning_warm_starts_from_stored_trials(tmp_path, loan_features):
+    X, y = loan_features
+    trial_store = TrialStore(tmp_path / "trials.sqlite", dataset_fingerprint="abc")
+    previous_trials = tune(X, y, small_tuning_params("tpe"), trial_store=trial_store)
+
+    tune(X, y, small_tuning_params("tpe"), trial_store=trial_store, warm_start=True)
+
+    assert len(trial_store.trials()) > len(previous_trials)
@@ -0,0 +1,134 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.testing import assert_array_equal
+
+from credit_default_prediction.compiled_model import compile_pipeline
+from credit_default_prediction.feature_engineering import (
+    FeatureEngine,
+    engineer_features,
+    record_feature_engine,
+)
+from credit_default_prediction.hyper_params import HyperParams
+from credit_default_prediction.model_bundle import (
+    BUNDLE_FORMAT_VERSION,
+    MANIFEST_FILE_NAME,
+    load_model_bundle,
+    save_model_bundle,
+)
+from credit_default_prediction.scoring import LoanScorer
+from credit_default_prediction.training import train
+
+FEATURES = [
+    "person_income",
+    "person_emp_length",
+    "loan_int_rate",
+    "loan_amnt",
+    "loan_grade",
+]
+
+
+@pytest.fixture
+def clean_loan_applications():
+    rng = np.random.default_rng(11)
+    n_rows = 300
+    loan_int_rate = rng.uniform(5, 20, size=n_rows)
+    loan_int_rate[::13] = np.nan
+
+    return pd.DataFrame(
+        {
+            "person_income": rng.integers(10_000, 200_000, size=n_rows),
+            "person_emp_length": rng.integers(0, 30, size=n_rows).astype(float),
+            "loan_int_rate": loan_int_rate,
+            "loan_amnt": rng.integers(500, 35_000, size=n_rows),
+            "loan_grade": rng.choice(["A", "B", "C"], size=n_rows),
+            "loan_status": rng.integers(0, 2, size=n_rows),
+        }
+    )
+
+
+@pytest.fixture
+def model(clean_loan_applications):
+    feature_engineered = engineer_features(clean_loan_applications)
+    X = feature_engineered.drop("loan_status", axis=1)
+
+    model = train(X, feature_engineered["loan_status"], HyperParams(learning_rate=0.3))
+
+    return record_feature_engine(model, FeatureEngine.from_config())
+
+
+def test_model_bundle_scores_like_the_trained_pipeline(
+    tmp_path, model, clean_loan_applications
+):
+    """Given a trained pipeline saved as a bundle,
+    When we load the bundle and score preprocessed loan applications,
+    Then we get exactly the probabilities of the trained pipeline
+    and the transformer arrays are memory-mapped read-only."""
+
+    bundle_dir = tmp_path / "model_bundle"
+    save_model_bundle(compile_pipeline(model), bundle_dir, features=FEATURES)
+
+    compiled_model = load_model_bundle(bundle_dir, features=FEATURES)
+
+    X = clean_loan_applications.drop("loan_status", axis=1)
+    probabilities = compiled_model.predict_proba(compiled_model.transform(X))
+    expected_probabilities = model.predict_proba(engineer_features(X))[:, 1]
+    assert_array_equal(probabilities, expected_probabilities)
+    assert isinstance(compiled_model.fill_values, np.memmap)
+    assert not compiled_model.categories[0].flags.writeable
+
+
+def test_loan_scorer_loads_model_bundles(tmp_path, model, clean_loan_applications):
+    bundle_dir = tmp_path / "model_bundle"
+    compiled_model = compile_pipeline(model, decision_threshold=0.3)
+    save_model_bundle(compiled_model, bundle_dir, features=FEATURES)
+
+    scorer = LoanScorer.from_path(bundle_dir)
+
+    records = clean_loan_applications.drop("loan_status", axis=1).to_dict(
+        orient="records"
+    )
+    probabilities = scorer.score(records)
+    assert probabilities == LoanScorer(compiled_model).score(records)
+    assert sum(probability is not None for probability in probabilities) > 0
+    assert scorer.decision_threshold == 0.3
+    assert scorer.predict_defaults([0.2, None, 0.4]) == [False, None, True]
+
+
+def test_model_bundle_checks_features_and_version(tmp_path, model):
+    bundle_dir = tmp_path / "model_bundle"
+    save_model_bundle(compile_pipeline(model), bundle_dir, features=FEATURES)
+
+    with pytest.raises(ValueError, match="trained on the features"):
+        load_model_bundle(bundle_dir, features=FEATURES[:-1])
+
+    manifest_path = bundle_dir / MANIFEST_FILE_NAME
+    manifest = json.loads(manifest_path.read_text())
+    manifest["format_version"] = BUNDLE_FORMAT_VERSION + 1
+    manifest_path.write_text(json.dumps(manifest))
+    with pytest.raises(ValueError, match="Unsupported model bundle format version"):
+        load_model_bundle(bundle_dir)
+
+
+def test_saving_a_bundle_leaves_mapped_arrays_untouched(tmp_path, model):
+    """Given a bundle whose arrays are memory-mapped by a scoring worker,
+    When another model is saved in its place,
+    Then the mapped arrays keep their content, the new bundle is loaded
+    and no temporary directory is left behind."""
+
+    bundle_dir = tmp_path / "model_bundle"
+    compiled_model = compile_pipeline(model)
+    save_model_bundle(compiled_model, bundle_dir, features=FEATURES)
+    mapped_model = load_model_bundle(bundle_dir)
+    mapped_fill_values = np.array(mapped_model.fill_values)
+
+    compiled_model.fill_values = compiled_model.fill_values + 1
+    save_model_bundle(compiled_model, bundle_dir, features=FEATURES)
+
+    assert_array_equal(mapped_model.fill_values, mapped_fill_values)
+    assert_array_equal(
+        load_model_bundle(bundle_dir).fill_values, mapped_fill_values + 1
+    )
+    assert [path.name for path in tmp_path.iterdir()] == ["model_bundle"]
@@ -0,0 +1,202 @@
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from credit_default_prediction.dataset import LoanApplications
+from credit_default_prediction.decision_threshold import DEFAULT_DECISION_THRESHOLD
+from credit_default_prediction.evaluation import (
+    HoldoutPredictions,
+    evaluate,
+    predict_test_set,
+)
+from credit_default_prediction.feature_engineering import (
+    FeatureEngine,
+    record_feature_engine,
+)
+from credit_default_prediction.hyper_params import HyperParams
+from credit_default_prediction.inference import rule_based_preparation
+from credit_default_prediction.model_leaderboard import (
+    ModelReport,
+    build_leaderboard,
+    format_leaderboard,
+    model_decision_threshold,
+    rank_models,
+)
+from credit_default_prediction.preprocessing import rule_based_preprocessing
+from credit_default_prediction.training import save_model_artifact, train
+
+
+@pytest.fixture
+def loan_data():
+    rng = np.random.default_rng(5)
+    n_rows = 600
+    loan_grade = rng.choice(["A", "B", "C"], size=n_rows)
+
+    return pd.DataFrame(
+        {
+            "person_income": rng.integers(10_000, 200_000, size=n_rows),
+            "person_emp_length": rng.integers(0, 30, size=n_rows).astype(float),
+            "person_age": rng.integers(18, 70, size=n_rows),
+            "loan_percent_income": rng.uniform(0, 0.8, size=n_rows),
+            "loan_int_rate": rng.uniform(5, 20, size=n_rows),
+            "loan_grade": loan_grade,
+            "loan_amnt": rng.integers(500, 35_000, size=n_rows),
+            "loan_intent": rng.choice(["EDUCATION", "MEDICAL"], size=n_rows),
+            "person_home_ownership": rng.choice(["OWN", "RENT"], size=n_rows),
+            "loan_status": (
+                (loan_grade == "C") ^ (rng.uniform(size=n_rows) < 0.2)
+            ).astype(int),
+        }
+    )
+
+
+def test_build_leaderboard(tmp_path, loan_data):
+    """Given models trained with different hyper-parameters,
+    When we evaluate them together on a test set,
+    Then each one gets the metrics `evaluate` reports for it alone,
+    at its own decision threshold,
+    and they are ranked from the best to the worst ROC AUC."""
+
+    train_dataset = LoanApplications.from_dataframe(
+        rule_based_preparation(loan_data[:400])
+    )
+    test_dataset_path = tmp_path / "test.csv"
+    loan_data[400:].to_csv(test_dataset_path, index=False)
+    model_paths = []
+    for learning_rate in [0.01, 0.3, 1.0]:
+        model_path = tmp_path / f"model_{learning_rate}.pkl"
+        model = train(
+            train_dataset.X,
+            train_dataset.y,
+            HyperParams(learning_rate=learning_rate),
+        )
+        save_model_artifact(
+            record_feature_engine(model, FeatureEngine.from_config()), model_path
+        )
+        model_paths.append(model_path)
+
+    thresholds = {
+        str(model_path): 0.2 * index
+        for index, model_path in enumerate(model_paths, start=1)
+    }
+    reports = build_leaderboard(
+        model_paths,
+        test_dataset_path,
+        thresholds=list(thresholds.values()),
+        latency_samples=5,
+        n_jobs=2,
+    )
+
+    assert sorted(report.model_path for report in reports) == sorted(
+        str(model_path) for model_path in model_paths
+    )
+    roc_aucs = [report.metrics["ROC_AUC"] for report in reports]
+    assert roc_aucs == sorted(roc_aucs, reverse=True)
+    for report in reports:
+        assert report.threshold == thresholds[report.model_path]
+        expected_metrics = evaluate(
+            predict_test_set(
+                joblib.load(report.model_path),
+                test_dataset_path,
+                threshold=report.threshold,
+            )
+        )
+        assert report.metrics == pytest.approx(expected_metrics)
+        assert report.latency_p99_ms >= report.latency_p50_ms > 0
+    assert str(model_paths[0]) in format_leaderboard(reports)
+
+    with pytest.raises(ValueError, match="one threshold per model"):
+        build_leaderboard(model_paths, test_dataset_path, thresholds=[0.5])
+
+
+def test_model_decision_threshold(tmp_path):
+    model_path = tmp_path / "model.pkl"
+    assert model_decision_threshold(model_path) == DEFAULT_DECISION_THRESHOLD
+
+    (tmp_path / "decision_threshold.json").write_text(json.dumps({"threshold": 0.27}))
+    assert model_decision_threshold(model_path) == 0.27
+
+
+def test_build_leaderboard_engineers_features_with_the_model_transforms(
+    tmp_path, loan_data
+):
+    """Given a model trained with other transforms than those of the params,
+    and a model that does not record its transforms,
+    When we evaluate them on a test set,
+    Then the first one is scored with its own transforms
+    and the second one is rejected."""
+
+    feature_engine = FeatureEngine.from_params(
+        [
+            {"type": "log1p", "columns": ["loan_amnt"]},
+            {
+                "type": "ratio",
+                "columns": ["loan_amnt", "person_income"],
+                "name": "loan_to_income",
+            },
+        ]
+    )
+    train_dataset = LoanApplications.from_dataframe(
+        feature_engine.transform(rule_based_preprocessing(loan_data[:400]))
+    )
+    test_dataset_path = tmp_path / "test.csv"
+    loan_data[400:].to_csv(test_dataset_path, index=False)
+    model = train(train_dataset.X, train_dataset.y, HyperParams(learning_rate=0.3))
+    model_path = tmp_path / "model.pkl"
+    save_model_artifact(record_feature_engine(model, feature_engine), model_path)
+
+    (report,) = build_leaderboard([model_path], test_dataset_path, latency_samples=1)
+
+    test_dataset = LoanApplications.from_dataframe(
+        feature_engine.transform(rule_based_preprocessing(loan_data[400:]))
+    )
+    expected_metrics = evaluate(
+        HoldoutPredictions(
+            y_true=test_dataset.y.to_numpy(),
+            y_score=model.predict_proba(test_dataset.X)[:, 1],
+        )
+    )
+    assert report.metrics == pytest.approx(expected_metrics)
+
+    del model.feature_transforms_
+    save_model_artifact(model, model_path)
+    with pytest.raises(ValueError, match="does not record the feature transforms"):
+        build_leaderboard([model_path], test_dataset_path, latency_samples=1)
+
+
+def test_rank_models_puts_lower_losses_and_latencies_first():
+    reports = [
+        ModelReport(
+            model_path=f"model_{index}.pkl",
+            threshold=0.5,
+            metrics={"ROC_AUC": roc_auc, "expected_loss": expected_loss},
+            load_seconds=0.1,
+            scoring_seconds=0.2,
+            rows_per_second=1000.0,
+            latency_p50_ms=latency_p50_ms,
+            latency_p99_ms=2 * latency_p50_ms,
+        )
+        for index, (roc_auc, expected_loss, latency_p50_ms) in enumerate(
+            [(0.8, 0.3, 1.0), (0.9, 0.4, 3.0), (0.7, 0.2, 2.0)]
+        )
+    ]
+
+    def ranked_paths(rank_by):
+        return [report.model_path for report in rank_models(reports, rank_by)]
+
+    assert ranked_paths("ROC_AUC") == ["model_1.pkl", "model_0.pkl", "model_2.pkl"]
+    assert ranked_paths("expected_loss") == [
+        "model_2.pkl",
+        "model_0.pkl",
+        "model_1.pkl",
+    ]
+    assert ranked_paths("latency_p50_ms") == [
+        "model_0.pkl",
+        "model_2.pkl",
+        "model_1.pkl",
+    ]
+    with pytest.raises(KeyError, match="Unknown ranking key"):
+        rank_models(reports, "speed")
@@ -0,0 +1,70 @@
+import joblib
+import numpy as np
+import pandas as pd
+
+from credit_default_prediction.hyper_params import HyperParams
+from credit_default_prediction.model_lineage import (
+    lineage_entry,
+    load_lineage,
+    record_lineage,
+)
+from credit_default_prediction.storage import fingerprint_file
+from credit_default_prediction.training import (
+    IncrementalTrainingParams,
+    train,
+    train_incrementally,
+)
+
+
+def test_record_lineage(tmp_path):
+    rng = np.random.default_rng(0)
+    loan_data = pd.DataFrame(
+        {
+            "loan_int_rate": rng.uniform(5, 20, size=100),
+            "loan_status": rng.integers(0, 2, size=100),
+        }
+    )
+    loan_data.to_csv(tmp_path / "history.csv", index=False)
+    loan_data.iloc[:30].to_csv(tmp_path / "new_loans.csv", index=False)
+    X, y = loan_data[["loan_int_rate"]], loan_data["loan_status"]
+    lineage_path = tmp_path / "model_lineage.json"
+
+    model = train(X, y, HyperParams(learning_rate=0.3, n_estimators=20))
+    record_lineage(lineage_path, lineage_entry(model, tmp_path / "history.csv", 100))
+    joblib.dump(model, tmp_path / "model.pkl")
+    updated_model = train_incrementally(
+        model, X.iloc[:30], y.iloc[:30], IncrementalTrainingParams(n_estimators=5)
+    )
+    record_lineage(
+        lineage_path,
+        lineage_entry(
+            updated_model,
+            tmp_path / "new_loans.csv",
+            30,
+            base_model_path=tmp_path / "model.pkl",
+            base_boosted_rounds=20,
+        ),
+    )
+
+    full_run, incremental_run = load_lineage(lineage_path)
+    assert (full_run.mode, full_run.boosted_rounds, full_run.n_rows) == (
+        "full",
+        20,
+        100,
+    )
+    assert full_run.base_model_fingerprint is None
+    assert incremental_run.mode == "incremental"
+    assert (incremental_run.boosted_rounds, incremental_run.total_boosted_rounds) == (
+        5,
+        25,
+    )
+    assert incremental_run.base_model_fingerprint == fingerprint_file(
+        tmp_path / "model.pkl"
+    )
+    assert incremental_run.dataset_fingerprint == fingerprint_file(
+        tmp_path / "new_loans.csv"
+    )
+
+    # A full training starts a new lineage
+    record_lineage(lineage_path, lineage_entry(model, tmp_path / "history.csv", 100))
+    assert [entry.mode for entry in load_lineage(lineage_path)] == ["full"]
@@ -29,3 +29,134 @@ def test_get_hyperparameters(monkeypatch, tmp_path, params_file_content):
 
 def test_params_file_presence():
     assert params.PARAMS_FILE_PATH.exists()
+
+
+def test_update_stage_params(monkeypatch, tmp_path):
+    fake_params_file_path = tmp_path / "fake_params.yaml"
+    fake_params_file_path.write_text(
+        "feature_engineering:\n"
+        "  important_columns:\n"
+        "    - person_income\n"
+        "\n"
+        "train:\n"
+        "  learning_rate: 0.3\n"
+        "\n"
+        "split:\n"
+        "  test_size: 0.3\n"
+    )
+    monkeypatch.setattr(params, "PARAMS_FILE_PATH", fake_params_file_path)
+
+    params.update_stage_params("train", {"learning_rate": 0.1, "n_estimators": 42})
+
+    assert fake_params_file_path.read_text() == (
+        "feature_engineering:\n"
+        "  important_columns:\n"
+        "    - person_income\n"
+        "\n"
+        "train:\n"
+        "  learning_rate: 0.1\n"
+        "  n_estimators: 42\n"
+        "\n"
+        "split:\n"
+        "  test_size: 0.3\n"
+    )
+
+
+@pytest.fixture
+def fake_params_file_path(monkeypatch, tmp_path):
+    fake_params_file_path = tmp_path / "fake_params.yaml"
+    fake_params_file_path.write_text(
+        "split:\n" "  test_size: 0.3\n" "\n" "train:\n" "  learning_rate: 0.3\n"
+    )
+    monkeypatch.setattr(params, "PARAMS_FILE_PATH", fake_params_file_path)
+    yield fake_params_file_path
+    params.clear_overrides()
+
+
+def test_params_file_is_parsed_once(fake_params_file_path, mocker):
+    safe_load_spy = mocker.spy(params.yaml, "safe_load")
+
+    for _ in range(3):
+        params.load_stage_params("train")
+
+    assert safe_load_spy.call_count == 1
+
+
+def test_params_are_parsed_again_when_the_file_changes(fake_params_file_path):
+    assert params.get_hyperparameters() == {"learning_rate": 0.3}
+
+    fake_params_file_path.write_text("train:\n  learning_rate: 0.05\n")
+
+    assert params.get_hyperparameters() == {"learning_rate": 0.05}
+
+
+def test_callers_cannot_modify_the_cached_params(fake_params_file_path):
+    params.get_hyperparameters()["learning_rate"] = 1.0
+
+    assert params.get_hyperparameters() == {"learning_rate": 0.3}
+
+
+def test_unknown_section(fake_params_file_path):
+    with pytest.raises(KeyError, match="No 'tune' section"):
+        params.load_stage_params("tune")
+
+
+def test_params_overrides(fake_params_file_path, monkeypatch):
+    monkeypatch.setenv("CDP_PARAMS__TRAIN__LEARNING_RATE", "0.1")
+    monkeypatch.setenv("CDP_PARAMS__TRAIN__MAX_DEPTH", "4")
+    params.set_overrides(
+        ["train.learning_rate=0.2", "split.key_columns=[person_age, loan_amnt]"]
+    )
+
+    assert params.get_hyperparameters() == {"learning_rate": 0.2, "max_depth": 4}
+    assert params.load_stage_params("split") == {
+        "test_size": 0.3,
+        "key_columns": ["person_age", "loan_amnt"],
+    }
+
+    params.update_stage_params("split", {"test_size": 0.25})
+
+    assert "learning_rate: 0.3\n" in fake_params_file_path.read_text()
+
+
+@pytest.mark.parametrize(
+    "override",
+    [
+        "train",
+        "learning_rate=0.1",
+        "tune.n_trials=5",
+        "train.learnin_rate=0.1",
+        "split.stratify=[loan_status]",
+        "train.learning_rate.low=0.1",
+    ],
+)
+def test_invalid_params_overrides(fake_params_file_path, override):
+    with pytest.raises(ValueError):
+        params.set_overrides([override])
+        params.load_stage_params("train")
+
+
+def test_misspelled_environment_overrides(fake_params_file_path, monkeypatch):
+    monkeypatch.setenv("CDP_PARAMS__TRAIN__LEARNIN_RATE", "0.1")
+
+    with pytest.raises(ValueError, match="no 'learnin_rate' parameter"):
+        params.get_hyperparameters()
+
+
+def test_open_sections_accept_new_keys(fake_params_file_path):
+    fake_params_file_path.write_text(
+        "tune:\n"
+        "  n_trials: 27\n"
+        "  search_space:\n"
+        "    max_depth:\n"
+        "      low: 3\n"
+        "      high: 9\n"
+    )
+    params.set_overrides(
+        ["tune.search_space.subsample.low=0.5", "tune.search_space.subsample.high=1"]
+    )
+
+    assert params.load_stage_params("tune")["search_space"] == {
+        "max_depth": {"low": 3, "high": 9},
+        "subsample": {"low": 0.5, "high": 1},
+    }
@@ -0,0 +1,158 @@
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from credit_default_prediction.feature_engineering import engineer_features
+from credit_default_prediction.partitioned_store import (
+    MANIFEST_FILE_NAME,
+    fingerprint_loan_data,
+    update_partitioned_store,
+)
+from credit_default_prediction.preprocessing import rule_based_preprocessing
+from credit_default_prediction.storage import read_loan_data
+
+
+@pytest.fixture
+def loan_applications():
+    rng = np.random.default_rng(0)
+    n_rows = 100
+    return pd.DataFrame(
+        {
+            "person_income": rng.integers(10_000, 100_000, n_rows).astype(float),
+            "person_emp_length": rng.choice([1.0, 5.0, 70.0, np.nan], n_rows),
+            "loan_amnt": rng.integers(1_000, 30_000, n_rows).astype(float),
+            "loan_int_rate": rng.choice([7.5, 11.2, np.nan], n_rows),
+            "loan_intent": rng.choice(["PERSONAL", "MEDICAL", "VENTURE"], n_rows),
+            "loan_status": rng.integers(0, 2, n_rows),
+        }
+    )
+
+
+def test_fingerprint_loan_data_ignores_the_index(loan_applications):
+    shifted_loan_applications = loan_applications.set_axis(loan_applications.index + 50)
+
+    assert fingerprint_loan_data(loan_applications) == fingerprint_loan_data(
+        shifted_loan_applications
+    )
+    assert fingerprint_loan_data(loan_applications) != fingerprint_loan_data(
+        loan_applications.iloc[:-1]
+    )
+
+
+def test_partitioned_store_matches_the_whole_dataset_transform(
+    tmp_path, loan_applications
+):
+    """Given raw loan applications,
+    When we preprocess them and engineer features in partitioned stores,
+    Then the feature store reads as the whole dataset transformed at once."""
+
+    raw_data_path = tmp_path / "raw.csv"
+    loan_applications.to_csv(raw_data_path, index=False)
+
+    update_partitioned_store(
+        raw_data_path, tmp_path / "clean", rule_based_preprocessing, partition_size=30
+    )
+    update_partitioned_store(
+        tmp_path / "clean",
+        tmp_path / "feature_store",
+        engineer_features,
+        partition_size=30,
+    )
+
+    expected_features = engineer_features(
+        rule_based_preprocessing(loan_applications)
+    ).reset_index(drop=True)
+    assert_frame_equal(
+        read_loan_data(tmp_path / "feature_store"),
+        expected_features,
+        check_dtype=False,
+        check_categorical=False,
+    )
+    with open(tmp_path / "clean" / MANIFEST_FILE_NAME) as manifest_file:
+        assert len(json.load(manifest_file)) == 4
+
+
+def test_appended_rows_only_transform_the_last_partitions(tmp_path, loan_applications):
+    """Given a store of preprocessed loan applications,
+    When loan applications are appended to the raw dataset and the store updated,
+    Then only the partitions holding appended rows are preprocessed again."""
+
+    raw_data_path = tmp_path / "raw.csv"
+    store_dir = tmp_path / "clean"
+    loan_applications.iloc[:70].to_csv(raw_data_path, index=False)
+    update_partitioned_store(
+        raw_data_path, store_dir, rule_based_preprocessing, partition_size=30
+    )
+
+    loan_applications.to_csv(raw_data_path, index=False)
+    stats = update_partitioned_store(
+        raw_data_path, store_dir, rule_based_preprocessing, partition_size=30
+    )
+
+    # The last partition held 10 rows, it now holds 30 and a new one 10 rows
+    assert stats.reused_partitions == 2
+    assert stats.transformed_partitions == 2
+    assert stats.rows_transformed == 40
+    assert stats.removed_partitions == 1
+    assert_frame_equal(
+        read_loan_data(store_dir),
+        rule_based_preprocessing(loan_applications).reset_index(drop=True),
+        check_dtype=False,
+        check_categorical=False,
+    )
+
+
+def test_changed_rows_only_transform_their_partition(tmp_path, loan_applications):
+    raw_data_path = tmp_path / "raw.csv"
+    store_dir = tmp_path / "clean"
+    loan_applications.to_csv(raw_data_path, index=False)
+    update_partitioned_store(
+        raw_data_path, store_dir, rule_based_preprocessing, partition_size=30
+    )
+
+    unchanged_stats = update_partitioned_store(
+        raw_data_path, store_dir, rule_based_preprocessing, partition_size=30
+    )
+    loan_applications.loc[45, "loan_amnt"] = 12_345.0
+    loan_applications.to_csv(raw_data_path, index=False)
+    changed_stats = update_partitioned_store(
+        raw_data_path, store_dir, rule_based_preprocessing, partition_size=30
+    )
+
+    assert unchanged_stats.transformed_partitions == 0
+    assert unchanged_stats.reused_partitions == 4
+    assert changed_stats.transformed_partitions == 1
+    assert changed_stats.rows_transformed == 30
+    assert changed_stats.removed_partitions == 1
+    assert_frame_equal(
+        read_loan_data(store_dir),
+        rule_based_preprocessing(loan_applications).reset_index(drop=True),
+        check_dtype=False,
+        check_categorical=False,
+    )
+
+
+def test_partitions_left_out_of_the_manifest_are_not_read(tmp_path, loan_applications):
+    """Given a store whose update was interrupted after writing a partition,
+    When we read the store,
+    Then only the partitions listed in its manifest are read."""
+
+    raw_data_path = tmp_path / "raw.csv"
+    store_dir = tmp_path / "clean"
+    loan_applications.to_csv(raw_data_path, index=False)
+    update_partitioned_store(
+        raw_data_path, store_dir, rule_based_preprocessing, partition_size=30
+    )
+    stored_data = read_loan_data(store_dir)
+
+    shutil.copy(
+        next(store_dir.glob("part-00000-*.parquet")),
+        store_dir / "part-00000-0123456789abcdef.parquet",
+    )
+
+    assert_frame_equal(read_loan_data(store_dir), stored_data)
+    assert not (store_dir / f"{MANIFEST_FILE_NAME}.tmp").exists()
@@ -0,0 +1,122 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from credit_default_prediction.pipeline_runner import (
+    PipelinePaths,
+    Stage,
+    build_training_pipeline,
+    run_dag,
+)
+from credit_default_prediction.storage import MANIFEST_FILE_NAME
+
+
+def test_independent_stages_run_concurrently():
+    """Given two stages depending on the same artifact,
+    When we run the DAG,
+    Then both stages run at the same time and their outputs feed the next stage."""
+
+    both_running = threading.Barrier(2, timeout=5)
+
+    def increment(number):
+        both_running.wait()
+        return {"incremented": number + 1}
+
+    def double(number):
+        both_running.wait()
+        return {"doubled": number * 2}
+
+    stages = [
+        Stage(
+            "add",
+            lambda incremented, doubled: {"sum": incremented + doubled},
+            ["incremented", "doubled"],
+            ["sum"],
+        ),
+        Stage("increment", increment, ["number"], ["incremented"]),
+        Stage("double", double, ["number"], ["doubled"]),
+    ]
+
+    artifacts, timings = run_dag(stages, artifacts={"number": 3}, max_workers=2)
+
+    assert artifacts["sum"] == 10
+    assert [timing.name for timing in timings][-1] == "add"
+
+
+def test_failing_stage_stops_the_run():
+    def fail():
+        raise RuntimeError("Stage failed")
+
+    def never_run(failed):
+        raise AssertionError("Stage depending on a failed stage was run")
+
+    stages = [
+        Stage("fail", fail, [], ["failed"]),
+        Stage("never_run", never_run, ["failed"], []),
+    ]
+
+    with pytest.raises(RuntimeError, match="Stage failed"):
+        run_dag(stages)
+
+
+def test_stages_with_missing_inputs_are_rejected():
+    with pytest.raises(ValueError, match="missing_input"):
+        run_dag([Stage("orphan", lambda missing_input: {}, ["missing_input"], [])])
+
+
+def test_training_pipeline(tmp_path, monkeypatch):
+    """Given raw loan applications,
+    When we run the whole training pipeline in memory,
+    Then the artifacts tracked by DVC are written and the model is evaluated."""
+
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    n_rows = 400
+    raw_loan_data = pd.DataFrame(
+        {
+            "person_age": rng.integers(18, 70, size=n_rows),
+            "person_income": rng.integers(10_000, 200_000, size=n_rows),
+            "person_home_ownership": rng.choice(["OWN", "RENT"], size=n_rows),
+            "person_emp_length": rng.integers(0, 30, size=n_rows).astype(float),
+            "loan_intent": rng.choice(["EDUCATION", "MEDICAL"], size=n_rows),
+            "loan_grade": rng.choice(["A", "B", "C"], size=n_rows),
+            "loan_amnt": rng.integers(500, 35_000, size=n_rows),
+            "loan_int_rate": rng.uniform(5, 20, size=n_rows),
+            "loan_percent_income": rng.uniform(0, 0.8, size=n_rows),
+            "loan_status": rng.integers(0, 2, size=n_rows),
+        }
+    )
+    paths = PipelinePaths(
+        raw_data_path=str(tmp_path / "cr_loan2.csv"),
+        train_data_path=str(tmp_path / "train.csv"),
+        test_data_path=str(tmp_path / "test.csv"),
+        preprocessed_data_path=str(tmp_path / "clean"),
+        feature_store_path=str(tmp_path / "feature_store"),
+        model_path=str(tmp_path / "model.pkl"),
+        decision_threshold_path=str(tmp_path / "decision_threshold.json"),
+        compiled_model_path=str(tmp_path / "model.npz"),
+        bundle_path=str(tmp_path / "model_bundle"),
+    )
+
+    artifacts, timings = run_dag(
+        build_training_pipeline(paths), artifacts={"raw_loan_data": raw_loan_data}
+    )
+
+    for path in [
+        paths.train_data_path,
+        paths.test_data_path,
+        paths.preprocessed_data_path,
+        paths.feature_store_path,
+        paths.model_path,
+        paths.decision_threshold_path,
+        paths.compiled_model_path,
+        paths.bundle_path,
+    ]:
+        assert (tmp_path / path).exists()
+    for store_path in [paths.preprocessed_data_path, paths.feature_store_path]:
+        assert (tmp_path / store_path / MANIFEST_FILE_NAME).exists()
+    assert len(timings) == 9
+    assert 0 <= artifacts["test_metrics"]["ROC_AUC"] <= 1
+    assert 0 <= artifacts["cross_validation_metrics"]["avg_roc_auc"] <= 1
@@ -5,6 +5,7 @@ from pandas.testing import assert_frame_equal
 
 from credit_default_prediction.preprocessing import (
     build_infered_transformers,
+    categorical_classifier_params,
     rule_based_preprocessing,
 )
 
@@ -137,3 +138,28 @@ class TestInferedTransformers:
             transformed,
             expected_clean_loan_applications,
         )
+
+
+def test_native_categorical_encoding_keeps_one_column_per_feature():
+    loan_features = pd.DataFrame(
+        {
+            "loan_int_rate": [11.84, 12.5, 7.14],
+            "loan_grade": ["B", "A", "C"],
+            "loan_intent": ["EDUCATION", "MEDICAL", "EDUCATION"],
+        }
+    )
+    preprocessor = build_infered_transformers(
+        numeric_features=["loan_int_rate"],
+        categorical_features=["loan_grade", "loan_intent"],
+        categorical_encoding="native",
+    )
+
+    transformed = preprocessor.fit_transform(loan_features)
+
+    assert_array_equal(
+        transformed,
+        np.array([[11.84, 1, 0], [12.5, 0, 1], [7.14, 2, 0]]),
+    )
+    assert categorical_classifier_params(
+        ["loan_int_rate"], ["loan_grade", "loan_intent"], "native"
+    )["feature_types"] == ["q", "c", "c"]
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.testing import assert_array_equal
+
+from credit_default_prediction.compiled_model import compile_pipeline
+from credit_default_prediction.feature_engineering import (
+    FeatureEngine,
+    record_feature_engine,
+)
+from credit_default_prediction.hyper_params import HyperParams
+from credit_default_prediction.inference import rule_based_preparation
+from credit_default_prediction.scoring import LoanScorer
+from credit_default_prediction.training import train
+
+
+@pytest.fixture
+def raw_loan_applications():
+    rng = np.random.default_rng(42)
+    n_rows = 200
+    loan_int_rate = rng.uniform(5, 20, size=n_rows)
+    loan_int_rate[::17] = np.nan
+    person_emp_length = rng.integers(0, 30, size=n_rows).astype(float)
+    person_emp_length[::23] = 123
+
+    return pd.DataFrame(
+        {
+            "person_income": rng.integers(10_000, 200_000, size=n_rows),
+            "person_emp_length": person_emp_length,
+            "person_age": rng.integers(20, 70, size=n_rows),
+            "loan_int_rate": loan_int_rate,
+            "loan_amnt": rng.integers(500, 35_000, size=n_rows),
+            "loan_grade": rng.choice(["A", "B", "C", "D"], size=n_rows),
+            "person_home_ownership": rng.choice(["OWN", "RENT"], size=n_rows),
+            "loan_status": rng.integers(0, 2, size=n_rows),
+        }
+    )
+
+
+@pytest.fixture
+def model(raw_loan_applications):
+    prepped = rule_based_preparation(raw_loan_applications)
+    X, y = prepped.drop("loan_status", axis=1), prepped["loan_status"]
+
+    model = train(X, y, HyperParams(learning_rate=0.3))
+
+    return record_feature_engine(model, FeatureEngine.from_config())
+
+
+def test_scorer_matches_trained_pipeline(model, raw_loan_applications):
+    """Given raw loan applications and a trained model,
+    When we score them with the loan scorer,
+    Then we get the same probabilities as the pipeline on prepared data,
+    and no probability for applications rejected by preprocessing."""
+
+    applications = raw_loan_applications.drop("loan_status", axis=1)
+    records = applications.to_dict(orient="records")
+
+    probabilities = LoanScorer(compile_pipeline(model)).score(records)
+
+    prepped = rule_based_preparation(applications)
+    expected_probabilities = model.predict_proba(prepped)[:, 1]
+    accepted = [probability is not None for probability in probabilities]
+    assert_array_equal(np.flatnonzero(accepted), prepped.index)
+    assert_array_equal(
+        [p for p in probabilities if p is not None], expected_probabilities
+    )
+
+
+def test_scorer_rejects_unknown_categories(model, raw_loan_applications):
+    application = raw_loan_applications.iloc[1].to_dict()
+    application["loan_grade"] = "Z"
+
+    with pytest.raises(ValueError, match="loan_grade"):
+        LoanScorer(compile_pipeline(model)).score([application])
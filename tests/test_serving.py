@@ -0,0 +1,68 @@
+import http.client
+import json
+import threading
+import urllib.request
+
+import pytest
+
+from credit_default_prediction.scoring import LoanScorer
+from credit_default_prediction.serving import make_server
+
+
+class FakeScorer(LoanScorer):
+    decision_threshold = 0.2  # type: ignore
+
+    def __init__(self):
+        pass
+
+    def score(self, applications):
+        return [0.25 for _ in applications]
+
+
+@pytest.fixture
+def server_url():
+    server = make_server(FakeScorer(), "127.0.0.1", 0)  # type: ignore
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def post_json(url, payload):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+@pytest.mark.parametrize(
+    "payload, expected_probabilities",
+    [
+        ({"person_age": 22}, [0.25]),
+        ([{"person_age": 22}, {"person_age": 40}], [0.25, 0.25]),
+    ],
+)
+def test_score_loan_applications(server_url, payload, expected_probabilities):
+    response = post_json(f"{server_url}/score", payload)
+
+    assert response == {
+        "probabilities": expected_probabilities,
+        "defaults": [True for _ in expected_probabilities],
+    }
+
+
+@pytest.mark.parametrize("content_length", ["many", "-1"])
+def test_malformed_content_length_is_a_bad_request(server_url, content_length):
+    connection = http.client.HTTPConnection(server_url.removeprefix("http://"))
+    connection.putrequest("POST", "/score")
+    connection.putheader("Content-Length", content_length)
+    connection.endheaders(b"{}")
+    response = connection.getresponse()
+
+    assert response.status == 400
+    assert "error" in json.loads(response.read())
+    connection.close()
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -5,7 +6,10 @@ from credit_default_prediction.split import (
     SplitParams,
     split_data,
     split_data_from_path,
+    stream_split,
 )
+from credit_default_prediction.storage import read_loan_data
+from credit_default_prediction.synthetic import generate_loan_applications
 
 
 def test_split_data():
@@ -87,3 +91,122 @@ def test_split_data_from_path(tmp_path):
     test_file_path = split_data_dir / "test.csv"
     assert train_file_path.exists()
     assert test_file_path.exists()
+
+
+@pytest.mark.parametrize("strategy", ["hash", "stratified"])
+def test_appended_applications_never_move_existing_ones(strategy):
+    """Given loan applications split with a stable strategy,
+    When new applications are appended to them,
+    Then the existing applications stay in the same set."""
+
+    loan_data = generate_loan_applications(10_000, seed=0)
+    new_loan_data = generate_loan_applications(2_000, seed=1)
+    split_params = SplitParams(test_size=0.3, random_state=3, strategy=strategy)
+
+    _, test_data = split_data(loan_data, split_params)
+    _, appended_test_data = split_data(
+        pd.concat([loan_data, new_loan_data], ignore_index=True), split_params
+    )
+
+    assert appended_test_data.X.index[appended_test_data.X.index < 10_000].equals(
+        test_data.X.index
+    )
+    assert len(test_data.y) / len(loan_data) == pytest.approx(0.3, abs=0.02)
+
+
+def test_hash_split_ignores_row_order_and_dtypes():
+    loan_data = generate_loan_applications(5_000, seed=0)
+    split_params = SplitParams(test_size=0.3, random_state=3, strategy="hash")
+    shuffled_loan_data = loan_data.sample(frac=1, random_state=0).astype(
+        {"person_age": np.float64}
+    )
+
+    _, test_data = split_data(loan_data, split_params)
+    _, shuffled_test_data = split_data(shuffled_loan_data, split_params)
+
+    assert sorted(shuffled_test_data.X.index) == sorted(test_data.X.index)
+
+
+def test_stratified_split_keeps_the_default_rate():
+    loan_data = generate_loan_applications(10_000, seed=0)
+    split_params = SplitParams(test_size=0.3, random_state=3, strategy="stratified")
+
+    training_data, test_data = split_data(loan_data, split_params)
+
+    assert test_data.y.mean() == pytest.approx(
+        loan_data["loan_status"].mean(), abs=1e-3
+    )
+    assert training_data.y.mean() == pytest.approx(
+        loan_data["loan_status"].mean(), abs=1e-3
+    )
+
+
+@pytest.mark.parametrize("strategy", ["hash", "stratified"])
+def test_stream_split(tmp_path, strategy):
+    """Given a raw loan applications file,
+    When we split it chunk by chunk,
+    Then both datasets are the same as when splitting it in memory."""
+
+    loan_data = generate_loan_applications(5_000, seed=0)
+    loan_data.to_csv(tmp_path / "raw.csv", index=False)
+    split_params = SplitParams(test_size=0.3, random_state=3, strategy=strategy)
+
+    stream_split(
+        tmp_path / "raw.csv",
+        tmp_path / "train.parquet",
+        tmp_path / "test.parquet",
+        split_params,
+        chunk_size=700,
+    )
+
+    training_data, test_data = split_data(
+        read_loan_data(tmp_path / "raw.csv"), split_params
+    )
+    streamed_test_data = read_loan_data(tmp_path / "test.parquet")
+    assert len(read_loan_data(tmp_path / "train.parquet")) == len(training_data.y)
+    np.testing.assert_array_equal(
+        streamed_test_data["loan_amnt"], test_data.X["loan_amnt"]
+    )
+
+
+@pytest.mark.parametrize("strategy", ["hash", "stratified"])
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_stream_split_in_small_chunks(tmp_path, strategy, file_format):
+    """Given a raw loan applications file,
+    When we split it into a columnar format in chunks of a single row,
+    which mostly belong to a single side,
+    Then both datasets hold all their rows, and an empty test set is saved."""
+
+    loan_data = generate_loan_applications(50, seed=0)
+    loan_data.to_csv(tmp_path / "raw.csv", index=False)
+    split_params = SplitParams(test_size=0.3, random_state=3, strategy=strategy)
+
+    stream_split(
+        tmp_path / "raw.csv",
+        tmp_path / f"train.{file_format}",
+        tmp_path / f"test.{file_format}",
+        split_params,
+        chunk_size=1,
+    )
+    stream_split(
+        tmp_path / "raw.csv",
+        tmp_path / f"all.{file_format}",
+        tmp_path / f"none.{file_format}",
+        SplitParams(test_size=0.0, random_state=3, strategy=strategy),
+        chunk_size=2,
+    )
+
+    training_data, test_data = split_data(loan_data, split_params)
+    assert len(read_loan_data(tmp_path / f"train.{file_format}")) == len(
+        training_data.y
+    )
+    assert len(read_loan_data(tmp_path / f"test.{file_format}")) == len(test_data.y)
+    assert len(read_loan_data(tmp_path / f"all.{file_format}")) == len(loan_data)
+    empty_test_data = read_loan_data(tmp_path / f"none.{file_format}")
+    assert empty_test_data.empty
+    assert empty_test_data.columns.to_list() == loan_data.columns.to_list()
+
+
+def test_unknown_split_strategy():
+    with pytest.raises(ValueError, match="Unknown split strategy"):
+        SplitParams(test_size=0.3, random_state=3, strategy="alphabetical")
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from credit_default_prediction.storage import (
+    LoanDataWriter,
+    downcast_loan_data,
+    iter_loan_data_chunks,
+    read_loan_data,
+    write_loan_data,
+)
+
+
+@pytest.fixture
+def loan_data():
+    return pd.DataFrame(
+        {
+            "person_age": [22, 25, 40, 31],
+            "person_income": [35000.0, 45000.0, 52000.0, 61000.0],
+            "loan_intent": ["PERSONAL", "MEDICAL", "VENTURE", "MEDICAL"],
+            "loan_status": [0, 1, 1, 0],
+        }
+    )
+
+
+@pytest.mark.parametrize("file_name", ["data.parquet", "data.arrow"])
+def test_columnar_formats_keep_types(tmp_path, loan_data, file_name):
+    """Given loan applications,
+    When we save them in a columnar format and read them back,
+    Then the column types are kept and text columns are categorical."""
+
+    dataset_path = tmp_path / file_name
+
+    write_loan_data(loan_data, dataset_path)
+    actual_loan_data = read_loan_data(dataset_path)
+
+    expected_loan_data = loan_data.astype({"loan_intent": "category"})
+    assert_frame_equal(actual_loan_data, expected_loan_data)
+
+
+@pytest.mark.parametrize("file_name", ["data.csv", "data.parquet", "data.arrow"])
+def test_read_loan_data_columns(tmp_path, loan_data, file_name):
+    dataset_path = tmp_path / file_name
+    write_loan_data(loan_data, dataset_path)
+
+    actual_loan_data = read_loan_data(
+        dataset_path, columns=["loan_status", "person_age"]
+    )
+
+    assert actual_loan_data.columns.to_list() == ["loan_status", "person_age"]
+    assert actual_loan_data["person_age"].to_list() == [22, 25, 40, 31]
+
+
+@pytest.mark.parametrize("file_name", ["data.csv", "data.parquet", "data.arrow"])
+def test_chunked_writes_and_reads(tmp_path, loan_data, file_name):
+    """Given loan applications written chunk by chunk,
+    with categories that differ from one chunk to another,
+    When we read them back chunk by chunk,
+    Then we get all the loan applications back."""
+
+    dataset_path = tmp_path / file_name
+
+    with LoanDataWriter(dataset_path) as writer:
+        writer.write(loan_data.iloc[:1])
+        writer.write(loan_data.iloc[1:])
+    chunks = list(iter_loan_data_chunks(dataset_path, chunk_size=3))
+
+    actual_loan_data = pd.concat(chunks, ignore_index=True)
+    assert all(len(chunk) <= 3 for chunk in chunks)
+    assert actual_loan_data["loan_intent"].astype(str).to_list() == [
+        "PERSONAL",
+        "MEDICAL",
+        "VENTURE",
+        "MEDICAL",
+    ]
+
+
+@pytest.mark.parametrize("file_name", ["data.parquet", "data.arrow"])
+def test_chunked_writes_extend_the_categories_of_the_first_chunk(
+    tmp_path, loan_data, file_name
+):
+    """Given a chunk of loan applications with a single category,
+    and a chunk adding a category that sorts before it,
+    When we write them chunk by chunk,
+    Then we read all the categories back."""
+
+    dataset_path = tmp_path / file_name
+
+    with LoanDataWriter(dataset_path) as writer:
+        writer.write(loan_data.iloc[:1].assign(loan_intent="PERSONAL"))
+        writer.write(loan_data.iloc[1:3].assign(loan_intent=["PERSONAL", "MEDICAL"]))
+
+    assert read_loan_data(dataset_path)["loan_intent"].astype(str).to_list() == [
+        "PERSONAL",
+        "PERSONAL",
+        "MEDICAL",
+    ]
+
+
+@pytest.mark.parametrize("file_name", ["data.csv", "data.parquet", "data.arrow"])
+def test_chunked_writes_skip_empty_chunks(tmp_path, loan_data, file_name):
+    dataset_path = tmp_path / file_name
+
+    with LoanDataWriter(dataset_path) as writer:
+        writer.write(loan_data.iloc[:0])
+        writer.write(loan_data)
+        writer.write(loan_data.iloc[:0])
+
+    actual_loan_data = read_loan_data(dataset_path).astype({"loan_intent": object})
+    assert_frame_equal(actual_loan_data, loan_data)
+
+
+@pytest.mark.parametrize("file_name", ["data.csv", "data.parquet", "data.arrow"])
+def test_chunked_writes_of_empty_chunks_only(tmp_path, loan_data, file_name):
+    dataset_path = tmp_path / file_name
+
+    with LoanDataWriter(dataset_path) as writer:
+        writer.write(loan_data.iloc[:0])
+        writer.write(loan_data.iloc[:0])
+
+    actual_loan_data = read_loan_data(dataset_path)
+    assert actual_loan_data.empty
+    assert actual_loan_data.columns.to_list() == loan_data.columns.to_list()
+
+
+def test_unsupported_file_extension(tmp_path, loan_data):
+    with pytest.raises(ValueError, match=".xlsx"):
+        write_loan_data(loan_data, tmp_path / "data.xlsx")
+
+
+def test_downcast_loan_data(loan_data):
+    downcast_data = downcast_loan_data(loan_data)
+
+    assert downcast_data.dtypes.to_dict() == {
+        "person_age": np.int32,
+        "person_income": np.float32,
+        "loan_intent": "category",
+        "loan_status": np.int8,
+    }
+
+
+@pytest.mark.parametrize("file_name", ["data.parquet", "data.arrow"])
+def test_downcast_chunks_share_their_types(tmp_path, loan_data, file_name):
+    """Given loan applications whose later chunks hold larger integers,
+    When we write them downcast chunk by chunk,
+    Then all the chunks are stored under the types of the first one."""
+
+    loan_data["person_age"] = [22, 25, 144, 300]
+    dataset_path = tmp_path / file_name
+
+    with LoanDataWriter(dataset_path) as writer:
+        writer.write(downcast_loan_data(loan_data.iloc[:2]))
+        writer.write(downcast_loan_data(loan_data.iloc[2:]))
+
+    actual_loan_data = read_loan_data(dataset_path)
+    assert actual_loan_data["person_age"].to_list() == [22, 25, 144, 300]
+    assert actual_loan_data["person_age"].dtype == np.int32
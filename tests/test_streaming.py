@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from credit_default_prediction.preprocessing import rule_based_preprocessing
+from credit_default_prediction.storage import read_loan_data, write_loan_data
+from credit_default_prediction.streaming import stream_transform
+
+
+def test_stream_transform(tmp_path):
+    """Given a CSV file of raw loan applications,
+    When we preprocess it in chunks,
+    Then the output is the same as preprocessing it all at once."""
+
+    raw_data_path = tmp_path / "raw.csv"
+    preprocessed_data_path = tmp_path / "clean.csv"
+    loan_applications = pd.DataFrame(
+        {
+            "person_emp_length": [3, 0, 70, 60, 120, np.nan, 8],
+            "loan_int_rate": [11.5, np.nan, 4.5, 6.9, 7.8, 10.1, 9.0],
+            "loan_status": [1, 1, 0, 0, 1, 0, 1],
+        }
+    )
+    loan_applications.to_csv(raw_data_path, index=False)
+
+    stats = stream_transform(
+        raw_data_path,
+        preprocessed_data_path,
+        rule_based_preprocessing,
+        chunk_size=2,
+    )
+
+    expected_clean_loan_applications = rule_based_preprocessing(
+        loan_applications
+    ).reset_index(drop=True)
+    assert_frame_equal(
+        pd.read_csv(preprocessed_data_path),
+        expected_clean_loan_applications,
+        check_dtype=False,
+    )
+    assert stats.rows_read == 7
+    assert stats.rows_written == 3
+    assert stats.peak_rss_bytes > 0
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet", "arrow"])
+@pytest.mark.parametrize("n_rows", [0, 4])
+def test_stream_transform_without_rows_to_write(tmp_path, file_format, n_rows):
+    """Given an empty file, or a file whose applications are all rejected,
+    When we preprocess it in chunks,
+    Then an empty output file is created."""
+
+    raw_data_path = tmp_path / f"raw.{file_format}"
+    preprocessed_data_path = tmp_path / f"clean.{file_format}"
+    write_loan_data(
+        pd.DataFrame(
+            {
+                "person_emp_length": [3.0, 0.0, 70.0, 8.0][:n_rows],
+                "loan_int_rate": [np.nan] * n_rows,
+                "loan_status": [1, 1, 0, 1][:n_rows],
+            }
+        ),
+        raw_data_path,
+    )
+
+    stats = stream_transform(
+        raw_data_path,
+        preprocessed_data_path,
+        rule_based_preprocessing,
+        chunk_size=2,
+    )
+
+    clean_loan_applications = read_loan_data(preprocessed_data_path)
+    assert clean_loan_applications.empty
+    assert clean_loan_applications.columns.to_list() == [
+        "person_emp_length",
+        "loan_int_rate",
+        "loan_status",
+    ]
+    assert stats.rows_read == n_rows
+    assert stats.rows_written == 0
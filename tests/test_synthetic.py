@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from credit_default_prediction.dataset import LoanApplications
+from credit_default_prediction.preprocessing import PERSON_EMP_LENGTH_MAX
+from credit_default_prediction.storage import read_loan_data
+from credit_default_prediction.synthetic import (
+    DataQuality,
+    LoanDataProfile,
+    generate_loan_applications,
+    iter_loan_applications,
+    write_loan_applications,
+)
+
+CR_LOAN2_COLUMNS = [
+    "person_age",
+    "person_income",
+    "person_home_ownership",
+    "person_emp_length",
+    "loan_intent",
+    "loan_grade",
+    "loan_amnt",
+    "loan_int_rate",
+    "loan_status",
+    "loan_percent_income",
+    "cb_person_default_on_file",
+    "cb_person_cred_hist_length",
+]
+
+
+def test_generate_loan_applications():
+    loan_data = generate_loan_applications(50_000, seed=1)
+
+    assert loan_data.columns.to_list() == CR_LOAN2_COLUMNS
+    assert len(loan_data) == 50_000
+    assert 0.15 < loan_data["loan_status"].mean() < 0.3
+    assert 0.08 < loan_data["loan_int_rate"].isna().mean() < 0.11
+    assert (loan_data["person_emp_length"] > PERSON_EMP_LENGTH_MAX).any()
+    assert loan_data["loan_amnt"].between(500, 35_000).all()
+
+
+def test_generated_loan_applications_are_reproducible():
+    assert_frame_equal(
+        generate_loan_applications(1_000, seed=7),
+        generate_loan_applications(1_000, seed=7),
+    )
+    assert not generate_loan_applications(1_000, seed=7).equals(
+        generate_loan_applications(1_000, seed=8)
+    )
+    assert isinstance(generate_loan_applications(0), pd.DataFrame)
+
+
+def test_data_quality():
+    loan_data = generate_loan_applications(
+        20_000,
+        quality=DataQuality(
+            loan_int_rate_missing_rate=0.5,
+            person_emp_length_missing_rate=0.0,
+            person_emp_length_outlier_rate=0.1,
+        ),
+    )
+
+    assert 0.45 < loan_data["loan_int_rate"].isna().mean() < 0.55
+    assert 0.08 < (loan_data["person_emp_length"] > PERSON_EMP_LENGTH_MAX).mean() < 0.12
+    assert not loan_data["person_emp_length"].isna().any()
+
+
+def test_loan_data_profile():
+    """Given loan applications,
+    When we generate loan applications from their fitted profile,
+    Then they have the same columns and follow the same distributions."""
+
+    loan_applications = LoanApplications.from_dataframe(
+        generate_loan_applications(20_000, seed=2)
+    )
+    profile = LoanDataProfile.fit(loan_applications)
+
+    generated_loan_data = generate_loan_applications(20_000, seed=3, profile=profile)
+
+    assert sorted(generated_loan_data.columns) == sorted(CR_LOAN2_COLUMNS)
+    assert generated_loan_data["person_age"].dtype == np.int64
+    for column in ["person_income", "loan_amnt", "loan_int_rate", "loan_status"]:
+        assert generated_loan_data[column].mean() == pytest.approx(
+            loan_applications.data[column].mean(), rel=0.05
+        )
+    assert generated_loan_data["loan_grade"].value_counts(normalize=True)[
+        "A"
+    ] == pytest.approx(profile.strata_frequencies["A"], abs=0.02)
+    # Interest rates and defaults still depend on the loan grade
+    mean_int_rates = generated_loan_data.groupby("loan_grade")["loan_int_rate"].mean()
+    assert mean_int_rates["A"] < mean_int_rates["D"]
+
+
+def test_write_loan_applications(tmp_path):
+    stats = write_loan_applications(
+        tmp_path / "loan_applications.csv", 2_500, chunk_size=1_000, seed=4
+    )
+    loan_data = read_loan_data(tmp_path / "loan_applications.csv")
+
+    assert stats.rows_written == 2_500
+    assert len(loan_data) == 2_500
+    assert_frame_equal(
+        loan_data.iloc[1_000:2_000].reset_index(drop=True),
+        list(iter_loan_applications(2_500, chunk_size=1_000, seed=4))[1],
+        check_dtype=False,
+    )
@@ -0,0 +1,103 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from credit_default_prediction import tracing
+from credit_default_prediction.experiment_tracking.dvc_experiment_tracker import (
+    DVCExperimentTracker,
+)
+from credit_default_prediction.hyper_params import HyperParams
+from credit_default_prediction.training import train
+
+
+@pytest.fixture
+def enabled_tracing():
+    tracing.enable_tracing()
+    yield tracing.tracer
+    tracing.disable_tracing()
+    tracing.tracer.clear()
+
+
+@pytest.fixture
+def loan_features():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {
+            "loan_int_rate": rng.uniform(5, 20, size=100),
+            "loan_grade": rng.choice(["A", "B", "C"], size=100),
+        }
+    )
+    y = pd.Series((X["loan_int_rate"] > 12).astype(int), name="loan_status")
+
+    return X, y
+
+
+def test_disabled_tracing_records_nothing():
+    with tracing.span("split_data", rows=10):
+        pass
+
+    assert tracing.tracer.spans == []
+
+
+def test_spans_summary(enabled_tracing):
+    for rows in [10, 30]:
+        with tracing.span("engineer_features", rows=rows):
+            pass
+    with tracing.span("split_data"):
+        pass
+
+    summary = enabled_tracing.summary()
+
+    assert summary["engineer_features"].calls == 2
+    assert summary["engineer_features"].rows == 40
+    assert summary["split_data"].to_metrics().keys() == {
+        "calls",
+        "seconds",
+        "peak_rss_bytes",
+    }
+
+
+def test_pipeline_steps_are_traced(enabled_tracing, loan_features):
+    X, y = loan_features
+
+    model = train(X, y, HyperParams(learning_rate=0.3))
+    probabilities = tracing.predict_proba(model, X)
+
+    np.testing.assert_array_equal(probabilities, model.predict_proba(X))
+    assert [span.name for span in enabled_tracing.spans] == [
+        "infered_transformers.fit_transform",
+        "classifier.fit",
+        "infered_transformers.transform",
+        "classifier.predict_proba",
+    ]
+    assert all(span.rows == 100 for span in enabled_tracing.spans)
+
+
+def test_chrome_trace(enabled_tracing, tmp_path):
+    with tracing.span("train", rows=5):
+        with tracing.span("classifier.fit", rows=5):
+            pass
+
+    enabled_tracing.save_chrome_trace(tmp_path / "trace.json")
+
+    with open(tmp_path / "trace.json") as trace_file:
+        events = json.load(trace_file)["traceEvents"]
+    inner, outer = events
+    assert outer["name"] == "train" and outer["ph"] == "X"
+    assert outer["ts"] <= inner["ts"]
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert inner["args"]["rows"] == 5
+
+
+def test_timings_are_logged_as_metrics(enabled_tracing, mocker):
+    live = mocker.Mock()
+    with tracing.span("split_data", rows=10):
+        pass
+
+    DVCExperimentTracker(live).log_timings(enabled_tracing.summary())
+
+    logged_metrics = [call.args[0] for call in live.log_metric.call_args_list]
+    assert "timings/split_data/seconds" in logged_metrics
+    assert "timings/split_data/rows_per_second" in logged_metrics
@@ -1,8 +1,20 @@
+import numpy as np
 import pandas as pd
 from sklearn.base import BaseEstimator
+from sklearn.compose import ColumnTransformer
 
+from credit_default_prediction.feature_engineering import (
+    FeatureEngine,
+    FeatureTransform,
+    record_feature_engine,
+    recorded_feature_engine,
+)
 from credit_default_prediction.hyper_params import HyperParams
-from credit_default_prediction.training import train
+from credit_default_prediction.training import (
+    IncrementalTrainingParams,
+    train,
+    train_incrementally,
+)
 
 
 def test_train():
@@ -36,3 +48,48 @@ def test_train():
     trained_model = train(X, y, hyperparameters)
 
     assert isinstance(trained_model, BaseEstimator)
+
+
+def test_train_incrementally(mocker):
+    """Given a trained model,
+    When we train it incrementally on new loan applications,
+    Then trees are added to its booster and its transformers are reused."""
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {
+            "loan_int_rate": rng.uniform(5, 20, size=300),
+            "loan_grade": rng.choice(["A", "B", "C"], size=300),
+        }
+    )
+    y = pd.Series(rng.integers(0, 2, size=300), name="loan_status")
+    model = train(X.iloc[:200], y.iloc[:200], HyperParams(learning_rate=0.3))
+    feature_engine = FeatureEngine([FeatureTransform("log1p", ["loan_int_rate"])])
+    record_feature_engine(model, feature_engine)
+    base_probabilities = model.predict_proba(X)
+    fit_transform = mocker.spy(ColumnTransformer, "fit_transform")
+
+    updated_model = train_incrementally(
+        model,
+        X.iloc[200:],
+        y.iloc[200:],
+        IncrementalTrainingParams(n_estimators=10, learning_rate=0.1),
+    )
+
+    assert fit_transform.call_count == 0
+    assert (
+        updated_model.named_steps["classifier"].get_booster().num_boosted_rounds()
+        == 110
+    )
+    assert updated_model.named_steps["classifier"].learning_rate == 0.1
+    assert (
+        updated_model.named_steps["infered_transformers"]
+        is model.named_steps["infered_transformers"]
+    )
+    assert recorded_feature_engine(updated_model).to_params() == (
+        feature_engine.to_params()
+    )
+    # The base model is left untouched
+    np.testing.assert_array_equal(model.predict_proba(X), base_probabilities)
+    assert model.named_steps["classifier"].get_booster().num_boosted_rounds() == 100
+    assert not np.array_equal(updated_model.predict_proba(X), base_probabilities)
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+
+from credit_default_prediction.hyper_params import HyperParams
+from credit_default_prediction.training import train
+from credit_default_prediction.transformer_cache import (
+    TransformerCacheParams,
+    evict_least_recently_used,
+    transformer_memory,
+)
+
+
+@pytest.fixture
+def loan_features():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {
+            "loan_int_rate": rng.uniform(5, 20, size=50),
+            "person_emp_length": rng.choice([1.0, 4.0, np.nan], size=50),
+            "loan_grade": rng.choice(["A", "B", "C"], size=50),
+        }
+    )
+    y = pd.Series((X["loan_int_rate"] > 12).astype(int), name="loan_status")
+
+    return X, y
+
+
+def test_only_the_classifier_is_refitted_when_hyper_params_change(
+    tmp_path, mocker, loan_features
+):
+    """Given a model trained with a transformer cache,
+    When we train it again with other hyper-parameters,
+    Then the fitted transformers are taken from the cache."""
+
+    X, y = loan_features
+    memory = transformer_memory(TransformerCacheParams(location=str(tmp_path)))
+    fit_transform = mocker.spy(ColumnTransformer, "fit_transform")
+
+    train(X, y, HyperParams(learning_rate=0.3), memory)
+    model = train(X, y, HyperParams(learning_rate=0.1), memory)
+
+    assert fit_transform.call_count == 1
+    assert model.memory is None
+    np.testing.assert_array_equal(
+        model.predict_proba(X),
+        train(X, y, HyperParams(learning_rate=0.1)).predict_proba(X),
+    )
+
+
+def test_transformers_are_refitted_when_the_data_change(
+    tmp_path, mocker, loan_features
+):
+    X, y = loan_features
+    memory = transformer_memory(TransformerCacheParams(location=str(tmp_path)))
+    fit_transform = mocker.spy(ColumnTransformer, "fit_transform")
+
+    train(X, y, HyperParams(learning_rate=0.3), memory)
+    train(X.iloc[1:], y.iloc[1:], HyperParams(learning_rate=0.3), memory)
+
+    assert fit_transform.call_count == 2
+
+
+def test_cache_is_evicted_down_to_its_size_limit(tmp_path, loan_features):
+    X, y = loan_features
+    cache_params = TransformerCacheParams(location=str(tmp_path), bytes_limit=0)
+    memory = transformer_memory(cache_params)
+    train(X, y, HyperParams(learning_rate=0.3), memory)
+
+    evict_least_recently_used(memory, cache_params)
+
+    assert not any(path.is_file() for path in tmp_path.rglob("output.pkl"))
+
+
+def test_caching_can_be_disabled():
+    assert transformer_memory(TransformerCacheParams(location=None)) is None
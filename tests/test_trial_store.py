@@ -0,0 +1,42 @@
+import pytest
+
+from credit_default_prediction.trial_store import Trial, TrialStore
+
+
+@pytest.fixture
+def trial():
+    return Trial(
+        hyper_params={"learning_rate": 0.1, "max_depth": 4},
+        n_estimators=100,
+        fold_scores=[0.91, 0.93, 0.92],
+        best_n_estimators=64,
+        fit_time=1.5,
+        seed=42,
+    )
+
+
+def test_saved_trials_are_found_back(tmp_path, trial):
+    """Given a trial saved in a trial store,
+    When we open the store again for the same dataset,
+    Then the trial is found back under its key."""
+
+    store_path = tmp_path / "trials.sqlite"
+    trial_store = TrialStore(store_path, dataset_fingerprint="abc")
+    trial_store.add("trial-1", trial)
+    trial_store.close()
+
+    reopened_trial_store = TrialStore(store_path, dataset_fingerprint="abc")
+
+    assert reopened_trial_store.get("trial-1") == trial
+    assert reopened_trial_store.get("trial-2") is None
+    assert reopened_trial_store.trials() == [trial]
+
+
+def test_trials_are_scoped_to_their_dataset(tmp_path, trial):
+    store_path = tmp_path / "trials.sqlite"
+    TrialStore(store_path, dataset_fingerprint="abc").add("trial-1", trial)
+
+    other_dataset_trial_store = TrialStore(store_path, dataset_fingerprint="def")
+
+    assert other_dataset_trial_store.get("trial-1") is None
+    assert other_dataset_trial_store.trials() == []